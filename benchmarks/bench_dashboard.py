@@ -0,0 +1,376 @@
+"""Benchmark headless do dashboard com o ``AppTest`` do Streamlit.
+
+Para cada tamanho de dataset sintético (por padrão 5, 50 e 500 OKRs) mede:
+
+- ``cold_run``: primeira execução com todos os caches vazios;
+- ``warm_rerun``: reexecução completa com os caches quentes;
+- ``open_dialog``: clique em "Veja mais" (``open_okr``) do primeiro card;
+- ``switch_kr``: troca de KR dentro de ``okr_dialog_kr``;
+- ``process_start``: primeira execução num processo Python novo (imports do
+  app, leitura dos dados e render), o que o usuário espera depois de um
+  restart do container;
+- ``projection``: ajuste das projeções de fim de ciclo de todos os KRs
+  (``build_projection``), a parte que roda uma vez por versão dos dados;
+- ``chances``: simulação Monte Carlo da chance de atingir a meta
+  (``build_chances``) com as séries cortadas no meio do ciclo.
+
+Os cliques dentro de fragments (cards e diálogo) são reexecutados como no
+navegador, só com o fragment, e não o script inteiro. Para cada cenário o
+relatório registra tempo (mediana e mínimo), quantidade de elementos por
+tipo, bytes de HTML/markdown e bytes de deltas enviados ao cliente.
+
+Uso::
+
+    python benchmarks/bench_dashboard.py --output bench.json
+    python benchmarks/bench_dashboard.py --baseline bench.json --tolerance 0.25
+
+Com ``--baseline``, o processo termina com código 1 se algum tempo piorar
+mais que ``--tolerance`` em relação ao baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import streamlit as st
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "dashboard-okrs.py"
+sys.path.insert(0, str(ROOT))
+
+from okr_dashboard import charts, templates  # noqa: E402
+from okr_dashboard.data import read_dataset  # noqa: E402
+from okr_dashboard.projection import build_projection  # noqa: E402
+from okr_dashboard.simulation import build_chances  # noqa: E402
+from okr_dashboard.table import build_kr_table  # noqa: E402
+
+PASSWORD = "benchmark"
+TIMED_SCENARIOS = ("cold_run", "warm_rerun", "open_dialog", "switch_kr")
+
+
+# ─── Dataset sintético ───────────────────────────────────────────────
+def synthetic_okrs(n_okrs: int, krs_per_okr: int = 5, seed: int = 42, squads_per_okr: int = 0) -> dict:
+    rng = random.Random(seed)
+    formats = [
+        lambda v: f"R$ {v:.1f}M",
+        lambda v: f"{v:.0f}%",
+        lambda v: f"{v:.0f} dias",
+        lambda v: f"{v / 25:.1f}/5",
+        lambda v: f"+{v:.0f}",
+    ]
+    okrs = []
+    for i in range(n_okrs):
+        krs = []
+        for j in range(krs_per_okr):
+            fmt = formats[(i + j) % len(formats)]
+            meta = rng.uniform(20, 100)
+            val = meta * rng.uniform(0.5, 1.1)
+            chart = [round(val * (0.7 + 0.3 * k / 11) * rng.uniform(0.95, 1.05), 3) for k in range(12)]
+            meta_text = fmt(meta) if fmt(meta).startswith(("R$", "+")) or j % 4 else f"≤ {fmt(meta)}"
+            krs.append({"name": f"KR {i + 1}.{j + 1}", "val": fmt(val), "ant": fmt(val * 0.95), "meta": meta_text, "chart": chart})
+        squads = [
+            {
+                "name": f"Squad {i + 1}.{s + 1}",
+                "weight": rng.choice([1, 1, 2, 3]),
+                "krs": [
+                    {"name": f"KR {i + 1}.{s + 1}.{j + 1}", "val": f"{v:.0f}%", "ant": "—", "meta": "100%"}
+                    for j, v in enumerate(rng.uniform(50, 105) for _ in range(3))
+                ],
+            }
+            for s in range(squads_per_okr)
+        ]
+        okrs.append(
+            {
+                "title": f"OKR {i + 1}",
+                "subtitle": f"Objetivo sintético número {i + 1}",
+                "accent": "#54CA30" if i % 2 else "#0058B5",
+                "chart": [float(k) for k in range(12)],
+                "krs": krs,
+                **({"squads": squads} if squads else {}),
+            }
+        )
+    return {"okrs": okrs}
+
+
+# ─── Instrumentação do AppTest ───────────────────────────────────────
+class _Probe:
+    """Conta bytes de deltas e redireciona o próximo run para um fragment."""
+
+    def __init__(self) -> None:
+        self.delta_bytes = 0
+        self.messages: list = []
+        self.fragment_id: str | None = None
+
+    @contextlib.contextmanager
+    def installed(self):
+        original_enqueue = ForwardMsgQueue.enqueue
+        original_rerun_data = local_script_runner.RerunData
+        probe = self
+
+        def enqueue(queue, msg):
+            if msg.WhichOneof("type") == "delta":
+                probe.delta_bytes += msg.ByteSize()
+                probe.messages.append(msg)
+            return original_enqueue(queue, msg)
+
+        def rerun_data(**kwargs):
+            if probe.fragment_id:
+                kwargs["fragment_id_queue"] = [probe.fragment_id]
+            return RerunData(**kwargs)
+
+        ForwardMsgQueue.enqueue = enqueue
+        local_script_runner.RerunData = rerun_data
+        try:
+            yield self
+        finally:
+            ForwardMsgQueue.enqueue = original_enqueue
+            local_script_runner.RerunData = original_rerun_data
+
+    def reset(self) -> None:
+        self.delta_bytes = 0
+        self.messages = []
+        self.fragment_id = None
+
+    def fragment_of(self, widget_key: str) -> str | None:
+        """Fragment que contém o widget ``widget_key`` no último run."""
+        for msg in self.messages:
+            element = msg.delta.new_element
+            kind = element.WhichOneof("type")
+            if kind and getattr(getattr(element, kind), "id", "").endswith(widget_key):
+                return msg.delta.fragment_id or None
+        return None
+
+
+def _walk(node):
+    children = getattr(node, "children", None)
+    if isinstance(children, dict):
+        for child in children.values():
+            yield child
+            yield from _walk(child)
+
+
+def _snapshot(at: AppTest, probe: _Probe, seconds: float) -> dict:
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].message}")
+    counts: dict[str, int] = {}
+    for element in _walk(at._tree):
+        counts[element.type] = counts.get(element.type, 0) + 1
+    html_bytes = sum(len(m.value.encode("utf-8")) for m in at.markdown)
+    return {
+        "seconds": seconds,
+        "elements": sum(counts.values()),
+        "element_types": counts,
+        "markdown_bytes": html_bytes,
+        "delta_bytes": probe.delta_bytes,
+    }
+
+
+def _new_app() -> AppTest:
+    at = AppTest.from_file(str(APP), default_timeout=300)
+    at.secrets["password"] = PASSWORD
+    at.session_state["password_correct"] = True
+    return at
+
+
+def _timed(probe: _Probe, action) -> float:
+    probe.delta_bytes = 0
+    probe.messages = []
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+def _click(at: AppTest, probe: _Probe, key: str) -> float:
+    fragment_id = probe.fragment_of(key)
+    button = at.button(key=key)
+    probe.fragment_id = fragment_id
+    try:
+        return _timed(probe, lambda: button.click().run())
+    finally:
+        probe.fragment_id = None
+
+
+def bench_size(n_okrs: int, repeats: int, workdir: Path) -> dict:
+    data_file = workdir / f"okrs_{n_okrs}.json"
+    data_file.write_text(json.dumps(synthetic_okrs(n_okrs), ensure_ascii=False), encoding="utf-8")
+    os.environ["OKRS_DATA_PATH"] = str(data_file)
+
+    samples: dict[str, list[dict]] = {name: [] for name in TIMED_SCENARIOS}
+    probe = _Probe()
+    with probe.installed():
+        for _ in range(repeats):
+            st.cache_data.clear()
+            st.cache_resource.clear()
+            templates.clear_cache()
+            charts.clear_cache()
+            probe.reset()
+
+            at = _new_app()
+            seconds = _timed(probe, at.run)
+            samples["cold_run"].append(_snapshot(at, probe, seconds))
+
+            seconds = _timed(probe, at.run)
+            samples["warm_rerun"].append(_snapshot(at, probe, seconds))
+
+            seconds = _click(at, probe, "open_0")
+            samples["open_dialog"].append(_snapshot(at, probe, seconds))
+
+            seconds = _click(at, probe, "select_kr_0_1")
+            samples["switch_kr"].append(_snapshot(at, probe, seconds))
+
+    report = {}
+    for name, runs in samples.items():
+        times = [r["seconds"] for r in runs]
+        last = runs[-1]
+        report[name] = {
+            "median_s": statistics.median(times),
+            "min_s": min(times),
+            "elements": last["elements"],
+            "element_types": last["element_types"],
+            "markdown_bytes": last["markdown_bytes"],
+            "delta_bytes": last["delta_bytes"],
+        }
+    return report
+
+
+def _first_paint(data_file: Path) -> int:
+    """Modo filho de ``bench_process_start``: um run num processo novo."""
+    os.environ["OKRS_DATA_PATH"] = str(data_file)
+    before = len(sys.modules)
+    at = _new_app()
+    start = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].message}")
+    print(json.dumps({"seconds": seconds, "modules": len(sys.modules) - before}))
+    return 0
+
+
+def bench_process_start(n_okrs: int, repeats: int, workdir: Path) -> dict:
+    data_file = workdir / f"okrs_{n_okrs}.json"
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, __file__, "--first-paint", str(data_file)], check=True, capture_output=True, text=True
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    times = [r["seconds"] for r in runs]
+    return {"median_s": statistics.median(times), "min_s": min(times), "modules": runs[-1]["modules"]}
+
+
+def bench_projection(n_okrs: int, repeats: int, workdir: Path) -> dict:
+    dataset = read_dataset(workdir / f"okrs_{n_okrs}.json")
+    table = build_kr_table(dataset.okrs)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        build_projection(dataset.okrs, table)
+        times.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(times), "min_s": min(times), "krs": int(table.pct.size)}
+
+
+def bench_chances(n_okrs: int, repeats: int, workdir: Path) -> dict:
+    dataset = read_dataset(workdir / f"okrs_{n_okrs}.json")
+    for okr in dataset.okrs:
+        for kr in okr["krs"]:
+            kr["chart"] = kr["chart"][:6]
+    table = build_kr_table(dataset.okrs)
+    projection = build_projection(dataset.okrs, table)
+    runs = [build_chances(dataset.okrs, table, projection) for _ in range(repeats)]
+    times = [r.seconds for r in runs]
+    simulated = runs[-1].paths > 0
+    return {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "simulated": int(simulated.sum()),
+        "min_paths": int(runs[-1].paths[simulated].min()) if simulated.any() else 0,
+        "max_margin": float(runs[-1].margin[simulated].max()) if simulated.any() else 0.0,
+    }
+
+
+# ─── Comparação com baseline ─────────────────────────────────────────
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Lista de regressões de tempo acima de ``tolerance`` (0.25 = +25%)."""
+    regressions = []
+    for size, scenarios in report["results"].items():
+        for name, current in scenarios.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before:
+                continue
+            if current["median_s"] > before["median_s"] * (1 + tolerance):
+                regressions.append(
+                    f"{size} OKRs / {name}: {before['median_s'] * 1000:.1f} ms -> {current['median_s'] * 1000:.1f} ms"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500], help="quantidade de OKRs por dataset")
+    parser.add_argument("--repeats", type=int, default=5, help="repetições por cenário")
+    parser.add_argument("--output", type=Path, help="arquivo JSON do relatório (padrão: stdout)")
+    parser.add_argument("--baseline", type=Path, help="relatório anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="piora relativa aceita (padrão 0.25)")
+    parser.add_argument("--first-paint", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.first_paint:
+        return _first_paint(args.first_paint)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Aquecimento: imports e compilação do script não entram nas medições.
+        bench_size(min(args.sizes), 1, Path(tmp))
+        results = {str(n): bench_size(n, args.repeats, Path(tmp)) for n in args.sizes}
+        for n in args.sizes:
+            results[str(n)]["process_start"] = bench_process_start(n, args.repeats, Path(tmp))
+            results[str(n)]["projection"] = bench_projection(n, args.repeats, Path(tmp))
+            results[str(n)]["chances"] = bench_chances(n, args.repeats, Path(tmp))
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "streamlit": st.__version__,
+            "machine": platform.machine(),
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    for size, scenarios in results.items():
+        line = "  ".join(
+            f"{name}={s['median_s'] * 1000:.1f}ms" + (f"/{s['delta_bytes'] / 1024:.1f}KB" if "delta_bytes" in s else "")
+            for name, s in scenarios.items()
+        )
+        print(f"[{size:>4} OKRs] {line}", file=sys.stderr)
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSÃO {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
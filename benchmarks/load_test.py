@@ -0,0 +1,464 @@
+"""Teste de carga com muitas sessões simultâneas contra um servidor local.
+
+Sobe ``streamlit run dashboard-okrs.py`` num diretório temporário (com
+``secrets.toml`` e um dataset sintético) e abre ``--sessions`` websockets
+em ``/_stcore/stream``, falando o mesmo protocolo do navegador
+(``BackMsg``/``ForwardMsg``). Cada sessão simulada:
+
+- carrega a página (``first_run``) e entra com a senha (``login``);
+- repete ``--actions`` vezes: abre o diálogo de um card (``open_dialog``),
+  troca de KR algumas vezes (``switch_kr``) e fecha (``close_dialog``),
+  com pausas aleatórias de ``--think`` segundos em média;
+- responde aos ``run_every`` dos fragments como o navegador
+  (``auto_rerun``), inclusive enquanto fica parada;
+- fica conectada até todas terminarem, como uma aba aberta.
+
+Uma interação sem ``script_finished`` em ``--timeout`` segundos encerra a
+sessão como falha; um ``auto_rerun`` sem resposta no intervalo é contado em
+``dropped_auto_reruns`` (o servidor descarta os de fragments que não
+existem mais).
+
+Cliques dentro de fragments (cards, diálogo) são enviados com o
+``fragment_id``, como no navegador. O relatório traz p50/p95/p99 por tipo de
+interação (do envio até o ``script_finished``), CPU e RSS do processo do
+servidor lidos de ``/proc`` (só Linux), o crescimento de RSS por sessão
+conectada e a memória contabilizada pelo app (``okr_dashboard.sessions``,
+lida do endpoint de métricas)::
+
+    python benchmarks/load_test.py --sessions 300 --ramp 30 --output load.json
+
+Com ``--url`` o teste roda contra um servidor já no ar (use ``--password`` e,
+para CPU/RSS, ``--pid``).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import secrets
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+import streamlit as st
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from bench_dashboard import APP, ROOT, synthetic_okrs
+
+INTERACTIONS = ("first_run", "login", "open_dialog", "switch_kr", "close_dialog", "auto_rerun")
+_WIDGETS = ("button", "text_input")
+_EARLY = ForwardMsg.ScriptFinishedStatus.FINISHED_EARLY_FOR_RERUN
+
+
+# ─── Servidor ────────────────────────────────────────────────────────
+def start_server(workdir: Path, data_file: Path, port: int, password: str) -> subprocess.Popen:
+    """``streamlit run`` com o config do repositório e uma senha própria."""
+    config_dir = workdir / ".streamlit"
+    config_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copy(ROOT / ".streamlit" / "config.toml", config_dir / "config.toml")
+    (config_dir / "secrets.toml").write_text(f"password = {json.dumps(password)}\n", encoding="utf-8")
+    command = [sys.executable, "-m", "streamlit", "run", str(APP), "--server.port", str(port)]
+    command += ["--server.headless", "true", "--browser.gatherUsageStats", "false"]
+    # Métricas ligadas: o relatório lê a memória das sessões em /metrics.json.
+    env = {**os.environ, "OKRS_DATA_PATH": str(data_file), "OKRS_METRICS": "1", "OKRS_METRICS_PORT": str(port + 1)}
+    log = open(workdir / "server.log", "wb")
+    return subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_healthy(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"{base_url}/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"servidor não respondeu em {base_url} após {timeout:.0f}s")
+        time.sleep(0.2)
+
+
+def app_gauges(metrics_url: str | None) -> dict | None:
+    """Gauges do app (sessões, bytes de session_state e de caches), se disponíveis."""
+    if not metrics_url:
+        return None
+    try:
+        with urllib.request.urlopen(f"{metrics_url}/metrics.json", timeout=5) as response:
+            return json.loads(response.read()).get("gauges")
+    except OSError:
+        return None
+
+
+# ─── CPU/RSS via /proc ───────────────────────────────────────────────
+class ProcessSampler:
+    """Amostra CPU (utime+stime) e RSS de um processo em intervalos fixos."""
+
+    def __init__(self, pid: int, interval: float = 0.5) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.samples: list[dict] = []
+        self._ticks = os.sysconf("SC_CLK_TCK")
+
+    def read(self) -> tuple[float, int]:
+        with open(f"/proc/{self.pid}/stat", encoding="ascii") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_s = (int(fields[11]) + int(fields[12])) / self._ticks
+        with open(f"/proc/{self.pid}/status", encoding="ascii") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        return cpu_s, rss_kb
+
+    def sample(self, connected: int) -> dict:
+        cpu_s, rss_kb = self.read()
+        sample = {"t": time.monotonic(), "cpu_s": cpu_s, "rss_kb": rss_kb, "connected": connected}
+        self.samples.append(sample)
+        return sample
+
+    async def run(self, stats: "LoadStats", stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            self.sample(stats.connected)
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def summary(self, baseline: dict, loaded: dict, after: dict) -> dict:
+        cpu_pct = [
+            100 * (b["cpu_s"] - a["cpu_s"]) / (b["t"] - a["t"])
+            for a, b in zip(self.samples, self.samples[1:])
+            if b["t"] > a["t"]
+        ]
+        elapsed = self.samples[-1]["t"] - self.samples[0]["t"] if len(self.samples) > 1 else 0.0
+        cpu_s = self.samples[-1]["cpu_s"] - self.samples[0]["cpu_s"] if self.samples else 0.0
+        sessions = loaded["connected"]
+        return {
+            "cpu_s": cpu_s,
+            "cpu_pct_mean": 100 * cpu_s / elapsed if elapsed else None,
+            "cpu_pct_p95": _percentile(sorted(cpu_pct), 95),
+            "cpu_pct_max": max(cpu_pct, default=None),
+            "rss_baseline_mb": baseline["rss_kb"] / 1024,
+            "rss_peak_mb": max(s["rss_kb"] for s in self.samples) / 1024,
+            "rss_loaded_mb": loaded["rss_kb"] / 1024,
+            "rss_after_close_mb": after["rss_kb"] / 1024,
+            "sessions_connected": sessions,
+            "rss_per_session_kb": (loaded["rss_kb"] - baseline["rss_kb"]) / sessions if sessions else None,
+        }
+
+
+# ─── Sessão simulada ─────────────────────────────────────────────────
+class LoadStats:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = {name: [] for name in INTERACTIONS}
+        self.errors: list[str] = []
+        self.app_exceptions = 0
+        self.dropped_auto_reruns = 0
+        self.connected = 0
+        self.finished = 0
+
+
+def _rerun(widgets: list[WidgetState] = (), fragment_id: str = "", auto: bool = False) -> bytes:
+    msg = BackMsg()
+    state = msg.rerun_script
+    state.SetInParent()
+    state.widget_states.widgets.extend(widgets)
+    state.fragment_id = fragment_id
+    state.is_auto_rerun = auto
+    return msg.SerializeToString()
+
+
+class SimulatedSession:
+    def __init__(self, ws, stats: LoadStats, rng: random.Random, think: float, timeout: float = 120.0) -> None:
+        self.ws = ws
+        self.stats = stats
+        self.rng = rng
+        self.think_mean = think
+        self.timeout = timeout
+        # chave do widget -> (id do widget, fragment_id em que foi desenhado)
+        self.widgets: dict[str, tuple[str, str]] = {}
+        # fragment_id -> [intervalo, próximo disparo]
+        self.auto_reruns: dict[str, list[float]] = {}
+
+    async def _run(self, interaction: str, payload: bytes, timeout: float | None = None) -> None:
+        start = time.perf_counter()
+        await self.ws.send(payload)
+        try:
+            await asyncio.wait_for(self._until_finished(), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            if interaction != "auto_rerun":
+                raise TimeoutError(f"{interaction} sem resposta em {timeout or self.timeout:.0f}s") from None
+            # O servidor descarta run_every de fragments que sumiram num rerun
+            # completo; o navegador só dispara de novo no próximo intervalo.
+            self.stats.dropped_auto_reruns += 1
+            return
+        self.stats.latencies[interaction].append(time.perf_counter() - start)
+
+    async def _until_finished(self) -> None:
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "delta":
+                self._collect(msg)
+            elif kind == "auto_rerun":
+                interval = msg.auto_rerun.interval
+                self.auto_reruns[msg.auto_rerun.fragment_id] = [interval, time.monotonic() + interval]
+            elif kind == "script_finished" and msg.script_finished != _EARLY:
+                return
+
+    def _collect(self, msg: ForwardMsg) -> None:
+        element = msg.delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.stats.app_exceptions += 1
+        elif kind in _WIDGETS:
+            widget_id = getattr(element, kind).id
+            # "$$ID-<hash>-<key>"
+            self.widgets[widget_id.split("-", 2)[-1]] = (widget_id, msg.delta.fragment_id)
+
+    async def click(self, kind: str, key: str) -> None:
+        widget_id, fragment_id = self.widgets[key]
+        await self._run(kind, _rerun([WidgetState(id=widget_id, trigger_value=True)], fragment_id))
+
+    async def idle(self, seconds: float) -> None:
+        """Pausa respondendo aos ``run_every`` que vencerem no meio."""
+        deadline = time.monotonic() + seconds
+        while True:
+            due = min(self.auto_reruns.items(), key=lambda item: item[1][1], default=None)
+            if due is None or due[1][1] > deadline:
+                await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+                return
+            fragment_id, (interval, at) = due
+            await asyncio.sleep(max(0.0, at - time.monotonic()))
+            self.auto_reruns[fragment_id][1] = time.monotonic() + interval
+            await self._run("auto_rerun", _rerun(fragment_id=fragment_id, auto=True), timeout=interval)
+
+    async def hold(self) -> None:
+        while True:
+            await self.idle(3600)
+
+    async def think(self) -> None:
+        await self.idle(self.rng.expovariate(1 / self.think_mean) if self.think_mean > 0 else 0)
+
+    async def login(self, password: str) -> None:
+        await self._run("first_run", _rerun())
+        if "password" in self.widgets:
+            widget_id, _ = self.widgets.pop("password")
+            await self._run("login", _rerun([WidgetState(id=widget_id, string_value=password)]))
+
+    async def browse(self, actions: int, switches: int) -> None:
+        for _ in range(actions):
+            cards = sorted(int(key[5:]) for key in self.widgets if key.startswith("open_"))
+            idx = self.rng.choice(cards)
+            await self.think()
+            await self.click("open_dialog", f"open_{idx}")
+            krs = [key for key in self.widgets if key.startswith(f"select_kr_{idx}_")]
+            for _ in range(switches if krs else 0):
+                await self.think()
+                await self.click("switch_kr", self.rng.choice(krs))
+            await self.think()
+            await self.click("close_dialog", f"close_kr_{idx}")
+
+
+async def run_session(
+    n: int, url: str, password: str, args: argparse.Namespace, stats: LoadStats, release: asyncio.Event
+) -> None:
+    await asyncio.sleep(args.ramp * n / max(1, args.sessions))
+    rng = random.Random(args.seed + n)
+    try:
+        async with websockets.connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=60) as ws:
+            stats.connected += 1
+            try:
+                session = SimulatedSession(ws, stats, rng, args.think, args.timeout)
+                await session.login(password)
+                await session.browse(args.actions, args.switches)
+                stats.finished += 1
+                # Aba aberta: segue respondendo aos run_every até todas terminarem.
+                holding = asyncio.ensure_future(session.hold())
+                await release.wait()
+                holding.cancel()
+            finally:
+                stats.connected -= 1
+    except Exception as exc:  # conta e segue: uma sessão não derruba o teste
+        stats.errors.append(f"sessão {n}: {type(exc).__name__}: {exc}")
+
+
+# ─── Relatório ───────────────────────────────────────────────────────
+def _percentile(values: list[float], q: float) -> float | None:
+    """Percentil por nearest-rank de uma lista já ordenada."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
+
+
+def latency_summary(latencies: dict[str, list[float]]) -> dict:
+    summary = {}
+    everything = sorted(v for values in latencies.values() for v in values)
+    for name, values in [*latencies.items(), ("all", everything)]:
+        values = sorted(values)
+        if not values:
+            continue
+        summary[name] = {
+            "count": len(values),
+            "p50_ms": _percentile(values, 50) * 1000,
+            "p95_ms": _percentile(values, 95) * 1000,
+            "p99_ms": _percentile(values, 99) * 1000,
+            "max_ms": values[-1] * 1000,
+            "mean_ms": statistics.fmean(values) * 1000,
+        }
+    return summary
+
+
+async def run_load(
+    args: argparse.Namespace, url: str, password: str, sampler: ProcessSampler | None, metrics_url: str | None
+) -> dict:
+    # Aquecimento: imports, dataset e caches do servidor não entram no RSS por sessão.
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=60) as ws:
+        warmup = SimulatedSession(ws, LoadStats(), random.Random(args.seed), think=0)
+        await warmup.login(password)
+        await warmup.browse(1, 1)
+    await asyncio.sleep(args.settle)
+
+    stats = LoadStats()
+    release = asyncio.Event()
+    stop_sampling = asyncio.Event()
+    baseline = sampler.sample(0) if sampler else None
+    sampling = asyncio.ensure_future(sampler.run(stats, stop_sampling)) if sampler else None
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    tasks = [asyncio.ensure_future(run_session(n, url, password, args, stats, release)) for n in range(args.sessions)]
+    while stats.finished + len(stats.errors) < args.sessions:
+        await asyncio.sleep(0.2)
+    wall = time.perf_counter() - started
+    # Todas conectadas e paradas: RSS com a carga inteira de sessões.
+    await asyncio.sleep(1.0)
+    loaded = sampler.sample(stats.connected) if sampler else None
+    gauges = await asyncio.to_thread(app_gauges, metrics_url)
+    release.set()
+    await asyncio.gather(*tasks)
+    await asyncio.sleep(args.settle)
+    after = sampler.sample(0) if sampler else None
+    stop_sampling.set()
+    if sampling:
+        await sampling
+
+    return {
+        "wall_s": wall,
+        "sessions": {"started": args.sessions, "completed": stats.finished, "failed": len(stats.errors)},
+        "latency": latency_summary(stats.latencies),
+        "server": sampler.summary(baseline, loaded, after) if sampler else None,
+        "app_sessions": gauges,
+        "client_cpu_s": time.process_time() - cpu_started,
+        "app_exceptions": stats.app_exceptions,
+        "dropped_auto_reruns": stats.dropped_auto_reruns,
+        "errors": stats.errors[:20],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50, help="sessões simultâneas (padrão 50)")
+    parser.add_argument("--ramp", type=float, default=10.0, help="segundos para abrir todas as sessões")
+    parser.add_argument("--actions", type=int, default=3, help="diálogos abertos por sessão")
+    parser.add_argument("--switches", type=int, default=2, help="trocas de KR por diálogo")
+    parser.add_argument("--think", type=float, default=1.0, help="pausa média entre cliques, em segundos")
+    parser.add_argument("--okrs", type=int, default=30, help="OKRs no dataset sintético")
+    parser.add_argument("--data", type=Path, help="arquivo de dados em vez do sintético")
+    parser.add_argument("--port", type=int, default=8765, help="porta do servidor local")
+    parser.add_argument("--url", help="servidor já no ar (ex.: http://127.0.0.1:8501)")
+    parser.add_argument("--password", help="senha do servidor de --url")
+    parser.add_argument("--pid", type=int, help="PID do servidor de --url, para CPU/RSS")
+    parser.add_argument("--metrics-url", help="endpoint OKRS_METRICS_PORT do servidor de --url")
+    parser.add_argument("--timeout", type=float, default=120.0, help="espera máxima por interação, em segundos")
+    parser.add_argument("--settle", type=float, default=5.0, help="espera após fechar as sessões, antes do RSS final")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="arquivo JSON do relatório (padrão: stdout)")
+    args = parser.parse_args(argv)
+    if args.url and not args.password:
+        parser.error("--url requer --password")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        server = None
+        if args.url:
+            base_url, password, pid = args.url.rstrip("/"), args.password, args.pid
+        else:
+            data_file = args.data
+            if data_file is None:
+                data_file = workdir / "okrs.json"
+                data_file.write_text(json.dumps(synthetic_okrs(args.okrs), ensure_ascii=False), encoding="utf-8")
+            password = secrets.token_hex(8)
+            server = start_server(workdir, data_file.resolve(), args.port, password)
+            base_url, pid = f"http://127.0.0.1:{args.port}", server.pid
+        try:
+            wait_healthy(base_url)
+            sampler = ProcessSampler(pid) if pid and Path(f"/proc/{pid}").exists() else None
+            ws_url = base_url.replace("http", "ws", 1) + "/_stcore/stream"
+            metrics_url = args.metrics_url or (None if args.url else f"http://127.0.0.1:{args.port + 1}")
+            results = asyncio.run(run_load(args, ws_url, password, sampler, metrics_url))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "streamlit": st.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            **{k: v for k, v in vars(args).items() if k not in ("password", "output")},
+        },
+        **results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    for name, s in results["latency"].items():
+        print(
+            f"{name:>12}: n={s['count']:<5} p50={s['p50_ms']:.0f}ms p95={s['p95_ms']:.0f}ms p99={s['p99_ms']:.0f}ms",
+            file=sys.stderr,
+        )
+    server_stats = results["server"]
+    if server_stats:
+        print(
+            f"servidor: CPU média {server_stats['cpu_pct_mean']:.0f}% (p95 {server_stats['cpu_pct_p95']:.0f}%), "
+            f"RSS {server_stats['rss_baseline_mb']:.0f} -> {server_stats['rss_loaded_mb']:.0f} MB com "
+            f"{server_stats['sessions_connected']} sessões ({server_stats['rss_per_session_kb']:.0f} KB/sessão), "
+            f"{server_stats['rss_after_close_mb']:.0f} MB após fechar",
+            file=sys.stderr,
+        )
+    gauges = results["app_sessions"]
+    if gauges:
+        print(
+            f"app: {gauges.get('sessions', 0):.0f} sessões, session_state "
+            f"{gauges.get('session_state_bytes', 0) / 1024:.0f} KB, caches {gauges.get('session_cache_bytes', 0) / 1024:.0f} KB "
+            f"(maior sessão {gauges.get('session_bytes_max', 0) / 1024:.1f} KB)",
+            file=sys.stderr,
+        )
+    sessions = results["sessions"]
+    print(f"{sessions['completed']}/{sessions['started']} sessões em {results['wall_s']:.1f}s", file=sys.stderr)
+    for error in results["errors"]:
+        print(f"ERRO {error}", file=sys.stderr)
+    return 1 if sessions["failed"] or results["app_exceptions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
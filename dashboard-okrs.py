@@ -1,6 +1,33 @@
+import time
+
 import streamlit as st
-import pandas as pd
-import altair as alt
+
+from okr_dashboard import metrics
+from okr_dashboard.assets import asset_url, logo_file, stylesheet_html
+from okr_dashboard.auth import AUTH_COOKIE, set_cookie_script, sign_token, verify_token
+from okr_dashboard.charts import kr_chart_spec, okr_chart_spec
+from okr_dashboard.grid import CARD_KR_ROWS, PAGE_SIZE, Page, grid_rows, paginate
+from okr_dashboard.history import has_history, resolve_kr_series
+from okr_dashboard.incremental import dashboard_graph, live_graph
+from okr_dashboard.metrics import timer
+from okr_dashboard.periods import GRANULARITIES
+from okr_dashboard.projection import kr_projection
+from okr_dashboard.refresh import REFRESH_SECONDS, current_dataset, refresh_error
+from okr_dashboard.sessions import track_session
+from okr_dashboard.simulation import kr_chances
+from okr_dashboard.squads import squad_tree
+from okr_dashboard.state import state_from_query_params, sync_query_params
+from okr_dashboard.status import STATUS_COLORS
+from okr_dashboard.table import kr_table
+from okr_dashboard.templates import (
+    card_html,
+    dialog_header_html,
+    header_html,
+    kr_row_dialog_html,
+    squad_row_html,
+    summary_html,
+)
+from okr_dashboard.values import format_like
 
 # ─── Page Config ─────────────────────────────────────────────────────
 st.set_page_config(
@@ -10,17 +37,28 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
+# Métricas por seção (OKRS_METRICS=1); sem custo quando desligadas.
+run_started = time.perf_counter()
+metrics.ensure_server()
+
 # ─── Autenticação ────────────────────────────────────────────────────
 def check_password():
-    """Retorna True se o usuário digitou a senha correta."""
+    """Retorna True se o usuário digitou a senha correta (ou tem o cookie de login)."""
 
     def password_entered():
         if st.session_state["password"] == st.secrets["password"]:
             st.session_state["password_correct"] = True
+            st.session_state["issue_auth_cookie"] = True
             del st.session_state["password"]
         else:
             st.session_state["password_correct"] = False
 
+    # Sessão nova com cookie de login válido (ex.: websocket reconectou).
+    if "password_correct" not in st.session_state and verify_token(
+        st.secrets["password"], st.context.cookies.get(AUTH_COOKIE)
+    ):
+        st.session_state["password_correct"] = True
+
     if "password_correct" not in st.session_state:
         st.markdown(
             '<div style="text-align:center;padding:100px 0;">'
@@ -44,349 +82,159 @@ def check_password():
         st.error("😕 Senha incorreta. Tente novamente.")
         return False
 
+    if st.session_state.pop("issue_auth_cookie", False):
+        st.iframe(set_cookie_script(sign_token(st.secrets["password"])), height=1)
     return True
 
 
-if not check_password():
+with timer("auth"):
+    authenticated = check_password()
+if not authenticated:
     st.stop()
 
 
-# ─── Constants ───────────────────────────────────────────────────────
-STATUS_COLORS = {
-    "green": "#34D399",
-    "yellow": "#FBBF24",
-    "red": "#F87171",
-    "no_data": "#6B7B94",
-}
-STATUS_LABELS = {
-    "green": "On Track",
-    "yellow": "Atenção",
-    "red": "Em Risco",
-    "no_data": "Sem dados",
-}
-
 # ─── Data ────────────────────────────────────────────────────────────
-OKRS = [
-    {
-        "title": "CRESCIMENTO",
-        "subtitle": "Impulsionar o crescimento sustentável e rentável",
-        "accent": "#54CA30",
-        "status": "green",
-        "chart": [8.1, 8.5, 9.2, 9.0, 9.8, 10.2, 10.5, 11.0, 11.3, 11.8, 12.0, 12.4],
-        "krs": [
-            {"name": "Receita", "val": "R$ 12.4M", "ant": "R$ 11.8M", "meta": "R$ 12.0M", "pct": 100},
-            {"name": "Receita Nacional (NB)", "val": "R$ 8.7M", "ant": "R$ 8.2M", "meta": "R$ 8.5M", "pct": 100},
-            {"name": "Receita Internacional (XB)", "val": "R$ 3.7M", "ant": "R$ 3.5M", "meta": "R$ 4.0M", "pct": 93},
-        ],
-    },
-    {
-        "title": "INOVAÇÃO / PRODUTO",
-        "subtitle": "Consolidar liderança em inovação e diferenciação",
-        "accent": "#54CA30",
-        "status": "green",
-        "chart": [1.2, 1.4, 1.6, 1.8, 2.0, 2.1, 2.3, 2.5, 2.7, 2.8, 2.9, 3.1],
-        "krs": [
-            {"name": "Receita prod. < 24 meses", "val": "R$ 3.1M", "ant": "R$ 2.9M", "meta": "R$ 3.0M", "pct": 100},
-            {"name": "% clientes c/ novos prod.", "val": "34%", "ant": "31%", "meta": "35%", "pct": 97},
-            {"name": "% clientes c/ novas func.", "val": "28%", "ant": "25%", "meta": "30", "pct": 93},
-            {"name": "Taxa de Falhas Críticas", "val": "0.12%", "ant": "0.15%", "meta": "≤ 0.10%", "pct": 83},
-            {"name": "Índice inovação percebida", "val": "8.1", "ant": "7.8", "meta": "8.0", "pct": 100},
-            {"name": "Taxa de conversão", "val": "72.5%", "ant": "70.1%", "meta": "72.0%", "pct": 100},
-        ],
-    },
-    {
-        "title": "EXCELÊNCIA OPERACIONAL",
-        "subtitle": "Elevar a excelência operacional e eficiência",
-        "accent": "#54CA30",
-        "status": "yellow",
-        "chart": [310, 305, 298, 295, 290, 288, 285, 283, 280, 282, 284, 285],
-        "krs": [
-            {"name": "Receita por pessoa", "val": "R$ 285K", "ant": "R$ 290K", "meta": "R$ 300K", "pct": 95},
-            {"name": "Tempo onboarding NB", "val": "12 dias", "ant": "14 dias", "meta": "≤ 10 dias", "pct": 83},
-            {"name": "Tempo onboarding XB", "val": "18 dias", "ant": "20 dias", "meta": "≤ 15 dias", "pct": 83},
-            {"name": "% processos documentados", "val": "67%", "ant": "62%", "meta": "75%", "pct": 89},
-        ],
-    },
-    {
-        "title": "PESSOAS",
-        "subtitle": "Desenvolver pessoas e lideranças para o próximo ciclo",
-        "accent": "#0058B5",
-        "status": "green",
-        "chart": [58, 60, 62, 63, 64, 66, 67, 68, 69, 70, 71, 72],
-        "krs": [
-            {"name": "Índice de engajamento", "val": "81%", "ant": "78%", "meta": "80%", "pct": 100},
-            {"name": "% de certificação interna", "val": "63%", "ant": "58%", "meta": "70%", "pct": 90},
-            {"name": "eNPS", "val": "72", "ant": "68", "meta": "70", "pct": 100},
-            {"name": "Pontuação GPTW", "val": "84", "ant": "81", "meta": "85", "pct": 99},
-        ],
-    },
-    {
-        "title": "CLIENTES",
-        "subtitle": "Garantir experiências fluidas que impulsionem satisfação",
-        "accent": "#0058B5",
-        "status": "red",
-        "chart": [72, 71, 70, 69, 70, 69, 68, 69, 68, 67, 68, 68],
-        "krs": [
-            {"name": "NPS", "val": "+68", "ant": "+71", "meta": "+75", "pct": 91},
-            {"name": "% Contas Não Ativadas", "val": "15%", "ant": "17%", "meta": "≤ 10%", "pct": 67},
-            {"name": "MRR Churn Rate", "val": "1.8%", "ant": "2.1%", "meta": "≤ 1.5%", "pct": 83},
-            {"name": "% atendimentos no SLA", "val": "94%", "ant": "92%", "meta": "97%", "pct": 97},
-            {"name": "Taxa de chargeback", "val": "R$ 142K", "ant": "R$ 155K", "meta": "≤ R$ 120K", "pct": 85},
-            {"name": "CSAT", "val": "4.3/5", "ant": "4.2/5", "meta": "4.5/5", "pct": 96},
-            {"name": "Indicador de branding", "val": "—", "ant": "—", "meta": "A definir", "pct": 0},
-            {"name": "Nº solic./contas ativas", "val": "0.32", "ant": "0.35", "meta": "≤ 0.25", "pct": 78},
-        ],
-    },
-]
+# Carregado de data/okrs.json (ou OKRS_DATA_PATH) e compartilhado entre sessões;
+# a thread de refresh do processo troca o dataset quando a fonte muda.
+with timer("data"):
+    dataset = current_dataset()
+    OKRS = dataset.okrs
+    # Status, cores e resumo de todos os KRs, calculados uma vez por versão.
+    table = kr_table(dataset)
+    # Projeção de fim de ciclo de todos os KRs (linear/EWMA), também por versão.
+    projection = kr_projection(dataset)
+    # Chance de atingir a meta (Monte Carlo com orçamento de tempo), também por versão.
+    chances = kr_chances(dataset)
+    # Roll-ups dos squads, também por versão.
+    squads = squad_tree(dataset)
+    # Registra a versão no histórico de invalidações da fonte (usado no refresh).
+    dashboard_graph(dataset)
 
 # ─── Helpers ─────────────────────────────────────────────────────────
-def pct_color(pct: int) -> str:
-    if pct <= 0:
-        return "#6B7B94"
-    if pct >= 95:
-        return "#34D399"
-    if pct >= 70:
-        return "#FBBF24"
-    return "#F87171"
-
-
-def okr_status_from_krs(krs: list[dict]) -> str:
-    pcts = [kr.get("pct", 0) for kr in krs if kr.get("pct", 0) > 0]
-    if not pcts:
-        return "no_data"
-    if any(p < 70 for p in pcts):
-        return "red"
-    if any(p < 95 for p in pcts):
-        return "yellow"
-    return "green"
-
-def resolve_kr_series(okr: dict, kr: dict, kr_idx: int) -> tuple[list[float], str]:
-    """Resolve the chart series for a KR.
-
-    Uses only the series already present in the KR payload.
-    """
-    kr_series = kr.get("chart")
-    if isinstance(kr_series, list) and len(kr_series) > 0:
-        return kr_series, "kr"
-
-    return [], "none"
-
-
-def infer_y_axis_config(kr: dict) -> tuple[str, str]:
-    """Infer Y-axis title and numeric format from KR metadata."""
-    probe = " ".join([str(kr.get("name", "")), str(kr.get("val", "")), str(kr.get("ant", "")), str(kr.get("meta", ""))]).lower()
-    if "r$" in probe:
-        return "Valor (R$)", ",.2f"
-    if "%" in probe:
-        return "Percentual (%)", ".1f"
-    if "dia" in probe:
-        return "Dias", ".0f"
-    if "/5" in probe:
-        return "Pontuação (0-5)", ".2f"
-    if "nps" in probe or "enps" in probe:
-        return "Pontos (NPS)", ".0f"
-    if "pontuação" in probe or "indice" in probe or "índice" in probe:
-        return "Índice", ".2f"
-    return "Valor", ",.2f"
+def sync_url():
+    """Espelha OKR/KR/página abertos nos query params (links compartilháveis)."""
+    sync_query_params(st.query_params, st.session_state)
 
 
 def open_okr(idx: int):
     st.session_state["selected_okr"] = idx
     st.session_state["selected_kr_idx"] = 0
+    st.session_state["selected_dialog"] = "okr"
+    sync_url()
+
+
+def open_squads(idx: int):
+    st.session_state["selected_okr"] = idx
+    st.session_state["selected_squad_idx"] = 0
+    st.session_state["selected_dialog"] = "squads"
+    sync_url()
 
 
 def close_okr():
     st.session_state["selected_okr"] = None
     st.session_state["selected_kr_idx"] = None
+    sync_url()
 
 
-# ─── Dialog ──────────────────────────────────────────────────────────
-def okr_dialog_legacy_unused(okr: dict, idx: int):
-    accent = okr["accent"]
-    status = okr_status_from_krs(okr["krs"])
-    sc = STATUS_COLORS[status]
-
-    st.markdown(
-        f"""
-        <div style="
-            background: linear-gradient(160deg, #181D2C 0%, #141822 100%);
-            border: 1px solid #2B3350;
-            border-left: 6px solid {accent};
-            border-radius: 18px;
-            padding: 18px;
-            margin-bottom: 12px;
-        ">
-          <div style="display:flex;justify-content:space-between;align-items:center;gap:12px;">
-            <div>
-              <div style="color:{accent};font-weight:800;letter-spacing:1.3px;font-size:0.85rem;">
-                {okr["title"]}
-              </div>
-              <div style="color:#6B7B94;margin-top:6px;line-height:1.35;">
-                {okr["subtitle"]}
-              </div>
-            </div>
-            <div style="display:flex;align-items:center;gap:10px;white-space:nowrap;">
-              <span style="width:10px;height:10px;border-radius:50%;background:{sc};display:inline-block;"></span>
-              <span style="color:#9DB2CC;font-size:0.85rem;">{STATUS_LABELS[status]}</span>
-            </div>
-          </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    st.subheader("Key Results")
-    for kr in okr["krs"]:
-        pc = pct_color(kr["pct"])
-        w = min(kr["pct"], 100)
-        pct_text = f'{kr["pct"]}%' if kr["pct"] > 0 else "—"
-        st.markdown(
-            f"""
-            <div style="padding:10px 6px;border-top:1px solid rgba(255,255,255,0.06);">
-              <div style="display:flex;justify-content:space-between;align-items:baseline;margin-bottom:6px;">
-                <span style="color:#8090A8;font-size:0.85rem;font-weight:600;">{kr["name"]}</span>
-                <span style="color:#FFF;font-size:0.95rem;font-weight:800;white-space:nowrap;">{kr["val"]}</span>
-              </div>
-              <div style="display:flex;align-items:center;gap:10px;margin-bottom:4px;">
-                <div style="flex:1;height:4px;background:rgba(255,255,255,0.08);border-radius:4px;overflow:hidden;">
-                  <div style="width:{w}%;height:100%;background:{pc};"></div>
-                </div>
-                <span style="min-width:36px;text-align:right;color:{pc};font-weight:800;font-size:0.8rem;">{pct_text}</span>
-              </div>
-              <div style="color:#4A5670;font-size:0.75rem;">Ant: {kr["ant"]} · Meta: {kr["meta"]}</div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+def select_kr(kr_idx: int):
+    st.session_state["selected_kr_idx"] = kr_idx
+    sync_url()
 
-    st.markdown("<div style='height:10px;'></div>", unsafe_allow_html=True)
 
-    months = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-    series = okr.get("chart", [])
-    df = pd.DataFrame({"Mês": months[: len(series)], "Valor": series})
+def select_squad(squad_idx: int):
+    st.session_state["selected_squad_idx"] = squad_idx
+    sync_url()
 
-    st.subheader("Evolução (últimos 12 meses)")
-    st.line_chart(df, x="Mês", y="Valor", use_container_width=True)
 
-    st.markdown("<div style='height:10px;'></div>", unsafe_allow_html=True)
-    if st.button("Fechar", use_container_width=True, key=f"close_{idx}"):
-        close_okr()
-        st.rerun()
+def go_to_page(page: int):
+    st.session_state["grid_page"] = page
+    sync_url()
 
 
-# ─── Session State ────────────────────────────────────────────────────
-@st.dialog("Detalhes do OKR", width="large")
+# ─── Dialog ──────────────────────────────────────────────────────────
+@st.dialog("Detalhes do OKR", width="large", on_dismiss=close_okr)
 def okr_dialog_kr(okr: dict, idx: int):
     accent = okr["accent"]
-    status = okr_status_from_krs(okr["krs"])
-    sc = STATUS_COLORS[status]
+    status = table.okr_status[idx]
+    kr_colors = table.colors_for(idx)
+    kr_projections = chances.texts_for(table, idx)
     selected_kr_idx = st.session_state.get("selected_kr_idx", 0)
     if selected_kr_idx is None or not (0 <= selected_kr_idx < len(okr["krs"])):
         selected_kr_idx = 0
         st.session_state["selected_kr_idx"] = selected_kr_idx
 
-    st.markdown(
-        f"""
-        <div style="
-            background: linear-gradient(160deg, #181D2C 0%, #141822 100%);
-            border: 1px solid #2B3350;
-            border-left: 6px solid {accent};
-            border-radius: 18px;
-            padding: 18px;
-            margin-bottom: 12px;
-        ">
-          <div style="display:flex;justify-content:space-between;align-items:center;gap:12px;">
-            <div>
-              <div style="color:{accent};font-weight:800;letter-spacing:1.3px;font-size:0.85rem;">
-                {okr["title"]}
-              </div>
-              <div style="color:#6B7B94;margin-top:6px;line-height:1.35;">
-                {okr["subtitle"]}
-              </div>
-            </div>
-            <div style="display:flex;align-items:center;gap:10px;white-space:nowrap;">
-              <span style="width:10px;height:10px;border-radius:50%;background:{sc};display:inline-block;"></span>
-              <span style="color:#9DB2CC;font-size:0.85rem;">{STATUS_LABELS[status]}</span>
-            </div>
-          </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    st.subheader("Key Results (clique para selecionar)")
+    st.markdown(dialog_header_html(okr, status), unsafe_allow_html=True)
+
+    st.subheader("Key Results")
     for kr_idx, kr in enumerate(okr["krs"]):
         is_selected = kr_idx == selected_kr_idx
-        if st.button(
-            f'{"Selecionado - " if is_selected else ""}{kr["name"]} | {kr["val"]}',
-            key=f"select_kr_{idx}_{kr_idx}",
-            use_container_width=True,
-        ):
-            st.session_state["selected_kr_idx"] = kr_idx
-            st.rerun()
-
-        pc = pct_color(kr["pct"])
-        w = min(kr["pct"], 100)
-        pct_text = f'{kr["pct"]}%' if kr["pct"] > 0 else "—"
-        row_border = f"1px solid {accent}" if is_selected else "1px solid rgba(255,255,255,0.04)"
-        row_bg = "rgba(255,255,255,0.03)" if is_selected else "transparent"
         st.markdown(
-            f"""
-            <div style="padding:10px 10px;border:{row_border};border-radius:10px;background:{row_bg};margin:6px 0;">
-              <div style="display:flex;justify-content:space-between;align-items:baseline;margin-bottom:6px;">
-                <span style="color:#8090A8;font-size:0.85rem;font-weight:600;">{kr["name"]}</span>
-                <span style="color:#FFF;font-size:0.95rem;font-weight:800;white-space:nowrap;">{kr["val"]}</span>
-              </div>
-              <div style="display:flex;align-items:center;gap:10px;margin-bottom:4px;">
-                <div style="flex:1;height:4px;background:rgba(255,255,255,0.08);border-radius:4px;overflow:hidden;">
-                  <div style="width:{w}%;height:100%;background:{pc};"></div>
-                </div>
-                <span style="min-width:36px;text-align:right;color:{pc};font-weight:800;font-size:0.8rem;">{pct_text}</span>
-              </div>
-              <div style="color:#4A5670;font-size:0.75rem;">Ant: {kr["ant"]} · Meta: {kr["meta"]}</div>
-            </div>
-            """,
+            kr_row_dialog_html(kr, kr_colors[kr_idx], accent, is_selected, kr_projections[kr_idx]),
             unsafe_allow_html=True,
         )
+        # Só escolhe o KR da projeção e do histórico longo; o foco do gráfico
+        # fica no navegador. O diálogo é um fragment: o clique reexecuta só ele.
+        st.button(
+            "Em detalhe" if is_selected else "Ver detalhes",
+            key=f"select_kr_{idx}_{kr_idx}",
+            type="tertiary",
+            on_click=select_kr,
+            args=(kr_idx,),
+        )
 
     st.markdown("<div style='height:10px;'></div>", unsafe_allow_html=True)
 
     selected_kr = okr["krs"][selected_kr_idx]
-    months = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-    series, series_source = resolve_kr_series(okr, selected_kr, selected_kr_idx)
-    df = pd.DataFrame({"Mês": months[: len(series)], "Valor": series})
-
-    st.subheader(f'Evolução (últimos 12 meses) - {selected_kr["name"]}')
-    if series_source == "none":
-        st.caption("Sem dados de série para este KR/OKR.")
-    if len(series) > 0:
-        y_min = min(series)
-        y_max = max(series)
-        y_pad = (y_max - y_min) * 0.12 if y_max != y_min else max(abs(y_max) * 0.12, 1)
-        y_domain = [y_min - y_pad, y_max + y_pad]
-        y_title, y_format = infer_y_axis_config(selected_kr)
-
-        chart = (
-            alt.Chart(df)
-            .mark_line(point=True, strokeWidth=2.5)
-            .encode(
-                x=alt.X(
-                    "Mês:N",
-                    sort=["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"],
-                    axis=alt.Axis(title="Mês", labelAngle=0),
-                ),
-                y=alt.Y(
-                    "Valor:Q",
-                    scale=alt.Scale(domain=y_domain, nice=True, zero=False),
-                    axis=alt.Axis(title=y_title, format=y_format),
-                ),
-                tooltip=[alt.Tooltip("Mês:N", title="Mês"), alt.Tooltip("Valor:Q", title=y_title, format=y_format)],
-            )
-            .properties(height=320)
-        )
-        st.altair_chart(chart, use_container_width=True)
+    with timer("dialog_series"):
+        all_series = [resolve_kr_series(okr, kr, kr_idx) for kr_idx, kr in enumerate(okr["krs"])]
+
+    # Todos os KRs num só gráfico: trocar o foco ou comparar KRs não volta ao servidor.
+    st.subheader(f'Evolução dos KRs - {okr["title"]}')
+    if any(series.values for series in all_series):
+        with timer("dialog_chart"):
+            spec = okr_chart_spec(dataset.version, okr, all_series)
+            st.vega_lite_chart(spec)
+        st.caption("Escolha o KR em foco no seletor abaixo do gráfico; clique nas linhas para comparar KRs.")
     else:
-        st.info("Sem dados de evolução para este KR.")
+        st.info("Sem dados de evolução para os KRs deste OKR.")
+
+    # Histórico longo: o KR selecionado pode ser visto por mês, trimestre, ano ou dia.
+    if has_history(okr["id"], selected_kr["id"]):
+        granularity = st.segmented_control(
+            "Período",
+            options=["M", "Q", "Y", "raw"],
+            format_func=lambda g: GRANULARITIES[g].label,
+            default="M",
+            key=f"granularity_{idx}",
+        ) or "M"
+        with timer("dialog_series"):
+            series = resolve_kr_series(okr, selected_kr, selected_kr_idx, granularity=granularity)
+        st.subheader(f'Evolução {GRANULARITIES[granularity].adjective} - {selected_kr["name"]}')
+        if len(series.values) > 0:
+            with timer("dialog_chart"):
+                spec = kr_chart_spec(
+                    dataset.version,
+                    okr,
+                    selected_kr,
+                    series.labels,
+                    series.values,
+                    variant=(series.source, series.version),
+                    x_title=GRANULARITIES[granularity].x_title,
+                )
+                st.vega_lite_chart(spec, width="stretch")
+    kr_pos = table.kr_slice(idx).start + selected_kr_idx
+    if kr_projections[selected_kr_idx]:
+        remaining = int(projection.remaining[kr_pos])
+        horizon = f"em {remaining} {'mês' if remaining == 1 else 'meses'}" if remaining else "no fim do ciclo"
+        val = selected_kr["values"]["val"]
+        parts = [
+            f"Projeção {horizon}: {kr_projections[selected_kr_idx]}",
+            f"linear {format_like(val, projection.linear[kr_pos])}",
+            f"EWMA {format_like(val, projection.ewma[kr_pos])}",
+        ]
+        if chances.paths[kr_pos]:
+            parts.append(f"{int(chances.paths[kr_pos])} caminhos simulados")
+        st.caption(" · ".join(parts))
 
     st.markdown("<div style='height:10px;'></div>", unsafe_allow_html=True)
     if st.button("Fechar", use_container_width=True, key=f"close_kr_{idx}"):
@@ -394,336 +242,182 @@ def okr_dialog_kr(okr: dict, idx: int):
         st.rerun()
 
 
+
+@st.dialog("Squads do OKR", width="large", on_dismiss=close_okr)
+def squads_dialog(okr: dict, idx: int):
+    accent = okr["accent"]
+    node = squads.node(okr["id"])
+    st.markdown(dialog_header_html(okr, table.okr_status[idx]), unsafe_allow_html=True)
+
+    children = squads.children(okr["id"])
+    if not children:
+        st.caption("Nenhum squad vinculado a este OKR.")
+    else:
+        st.markdown(
+            squad_row_html(node, f"Roll-up de {len(children)} squads (média ponderada)"), unsafe_allow_html=True
+        )
+        selected_squad_idx = st.session_state.get("selected_squad_idx") or 0
+        if not (0 <= selected_squad_idx < len(children)):
+            selected_squad_idx = 0
+
+        st.subheader("Squads (clique para ver os KRs)")
+        for squad_idx, squad in enumerate(children):
+            is_selected = squad_idx == selected_squad_idx
+            st.button(
+                f'{"Selecionado - " if is_selected else ""}{squad.name} | {squad.pct}%',
+                key=f"select_squad_{idx}_{squad_idx}",
+                use_container_width=True,
+                on_click=select_squad,
+                args=(squad_idx,),
+            )
+            detail = f"{len(squad.children)} KRs · peso {squad.weight:g}"
+            st.markdown(squad_row_html(squad, detail, accent, is_selected), unsafe_allow_html=True)
+
+        selected = children[selected_squad_idx]
+        st.subheader(f"Key Results - {selected.name}")
+        for kr, kr_node in zip(okr["squads"][selected_squad_idx]["krs"], squads.children(selected.node_id)):
+            st.markdown(kr_row_dialog_html(kr, STATUS_COLORS[kr_node.status]), unsafe_allow_html=True)
+
+    st.markdown("<div style='height:10px;'></div>", unsafe_allow_html=True)
+    if st.button("Fechar", use_container_width=True, key=f"close_squads_{idx}"):
+        close_okr()
+        st.rerun()
+
+
+# ─── Session State ───────────────────────────────────────────────────
 if "selected_okr" not in st.session_state:
+    # Sessão nova: OKR/KR/página vêm da URL (?okr=4&kr=2) e o diálogo abre
+    # já neste run, sem cliques nem st.rerun().
     st.session_state["selected_okr"] = None
+    st.session_state.update(state_from_query_params(st.query_params, OKRS, PAGE_SIZE))
 if "selected_kr_idx" not in st.session_state:
     st.session_state["selected_kr_idx"] = None
+if "grid_page" not in st.session_state:
+    st.session_state["grid_page"] = 0
+if "selected_dialog" not in st.session_state:
+    st.session_state["selected_dialog"] = "okr"
 
+# Só um diálogo por run: ``card_actions`` não abre outro se este já abriu.
+dialog_open = False
 if st.session_state["selected_okr"] is not None:
     i = int(st.session_state["selected_okr"])
     if 0 <= i < len(OKRS):
-        okr_dialog_kr(OKRS[i], i)
+        dialog_open = True
+        if st.session_state["selected_dialog"] == "squads":
+            squads_dialog(OKRS[i], i)
+        else:
+            okr_dialog_kr(OKRS[i], i)
 
 # ─── CSS ─────────────────────────────────────────────────────────────
-st.markdown(
-    """<style>
-@import url('https://fonts.googleapis.com/css2?family=Montserrat:wght@600;700;800&family=Nunito:wght@400;500;600;700;800&display=swap');
-
-/* === GLOBAL === */
-.stApp {
-    background: radial-gradient(ellipse at 12% 8%, #141B2D 0%, #0F1117 50%, #0B0E14 100%);
-    font-family: 'Nunito', system-ui, -apple-system, 'Segoe UI', sans-serif;
-}
-#MainMenu, footer, header { visibility: hidden; }
-.block-container { padding-top: 2rem; padding-bottom: 2rem; max-width: 1500px; }
-[data-testid="stHorizontalBlock"] { gap: 1.1rem; align-items: stretch; }
-[data-testid="stColumn"] > div,
-[data-testid="stColumn"] > div > div { height: 100%; }
-[data-testid="stElementToolbar"] { display: none !important; }
-[data-testid="stToolbar"] { display: none !important; }
-
-/* === HEADER === */
-.hdr {
-    display: flex;
-    align-items: center;
-    justify-content: space-between;
-    padding-bottom: 1rem;
-    margin-bottom: 1.2rem;
-    border-bottom: 1px solid #1C2132;
-}
-.hdr-title {
-    font-family: 'Montserrat', 'Segoe UI', system-ui, sans-serif;
-    font-size: 1.7rem;
-    font-weight: 800;
-    color: #FFF;
-    margin: 0;
-    letter-spacing: -0.3px;
-}
-.hdr-sub{
-    font-size: 1.7rem;
-    font-weight: 800;
-    line-height: 1.05;
-    margin-top: 0;
-    color: rgba(246,246,246,0.92);
-    font-family: 'Montserrat','Segoe UI',system-ui,sans-serif;
-    letter-spacing: -0.3px;
-}
-.hdr-logo-right{
-  height: 48px;
-  width: auto;
-  opacity: 0.95;
-  background: transparent;
-  border: none;
-  padding: 0;
-  border-radius: 0;
-  margin-left: 12px;
-}
-
-/* === SUMMARY === */
-.sum-row { display: flex; gap: 0.8rem; margin-bottom: 1.4rem; }
-.sum-card {
-    flex: 1;
-    background: rgba(255,255,255,0.035);
-    border: 1px solid #1C2132;
-    border-radius: 12px;
-    padding: 14px 0;
-    text-align: center;
-    transition: background 0.2s;
-}
-.sum-card:hover { background: rgba(255,255,255,0.06); }
-.sum-val { font-size: 1.5rem; font-weight: 800; color: #FFF; }
-.sum-lbl {
-    font-size: 0.68rem;
-    color: #5E6E85;
-    text-transform: uppercase;
-    letter-spacing: 1.2px;
-    margin-top: 2px;
-}
-
-/* === OKR CARD === */
-.okr-card {
-    background: linear-gradient(160deg, #181D2C 0%, #141822 100%);
-    border: 1px solid #232940;
-    border-radius: 16px;
-    padding: 20px 20px 16px;
-    height: 420px;
-    display: flex;
-    flex-direction: column;
-    position: relative;
-    overflow: hidden;
-    transition: transform 180ms ease, box-shadow 180ms ease, border-color 180ms ease;
-}
-.okr-card:hover { transform: translateY(-3px); border-color: #384060; box-shadow: 0 16px 48px rgba(0,0,0,0.4); }
-
-.c-head { display: flex; align-items: center; justify-content: space-between; gap: 10px; margin-bottom: 4px; }
-.c-head-left { display:flex; align-items:center; gap:10px; min-width:0; }
-.c-title { font-family: 'Montserrat', 'Segoe UI', system-ui, sans-serif; font-size: 0.8rem; font-weight: 700; letter-spacing: 1.5px; text-transform: uppercase; }
-.c-dot { width: 9px; height: 9px; border-radius: 50%; display: inline-block; flex-shrink: 0; animation: dot-pulse 2.5s ease-in-out infinite; }
-@keyframes dot-pulse {
-    0%, 100% { box-shadow: 0 0 4px 1px currentColor; }
-    50% { box-shadow: 0 0 12px 3px currentColor; }
-}
-.c-sub { color: #6B7B94; font-size: 0.76rem; margin-bottom: 14px; line-height: 1.35; }
-
-/* ============================================================
-   AÇÕES DO CARD ("Veja mais" e "Squads")
-   Escopo pelo key do container para evitar conflito global.
-   ============================================================ */
-div[class*="st-key-okr_actions_"] {
-    margin-bottom: 12px;
-    padding-right: 0;
-    padding-top: 0;
-    overflow: visible;
-}
-div[class*="st-key-okr_actions_"] [data-testid="stHorizontalBlock"] {
-    display: flex;
-    flex-wrap: nowrap;
-    justify-content: flex-start;
-    align-items: center;
-    gap: 0.6rem;
-}
-div[class*="st-key-okr_actions_"] [data-testid="stHorizontalBlock"] > div {
-    flex: 0 0 auto !important;
-    width: auto !important;
-    min-width: 112px;
-}
-div[class*="st-key-okr_actions_"] [data-testid="stButton"] {
-    flex: 0 0 auto;
-    width: auto !important;
-}
-
-/* Estilo pill dos botões do card */
-div[class*="st-key-okr_actions_"] [data-testid="stButton"] button {
-    display: inline-flex !important;
-    justify-content: center !important;
-    width: 100% !important;
-    border-radius: 999px !important;
-    padding: 5px 14px !important;
-    font-size: 0.72rem !important;
-    font-weight: 700 !important;
-    background: rgba(255,255,255,0.06) !important;
-    border: 1px solid rgba(255,255,255,0.16) !important;
-    color: rgba(246,246,246,0.88) !important;
-    line-height: 1.2 !important;
-    min-height: unset !important;
-    height: auto !important;
-    white-space: nowrap !important;
-    transition: background 180ms ease, border-color 180ms ease;
-}
-div[class*="st-key-okr_actions_"] [data-testid="stButton"] button:hover {
-    background: rgba(255,255,255,0.12) !important;
-    border-color: rgba(255,255,255,0.30) !important;
-}
-
-/* Card body */
-.c-body { display: grid; grid-template-columns: 1fr; gap: 12px; flex: 1; min-height: 0; }
-.c-krs { display: flex; flex-direction: column; overflow-y: auto; padding-right: 6px; }
-.c-krs::-webkit-scrollbar { width: 4px; }
-.c-krs::-webkit-scrollbar-track { background: transparent; }
-.c-krs::-webkit-scrollbar-thumb { background: rgba(255,255,255,0.12); border-radius: 2px; }
-.c-krs::-webkit-scrollbar-thumb:hover { background: rgba(255,255,255,0.25); }
-
-/* KR row */
-.kr { padding: 9px 0 8px; border-top: 1px solid rgba(255,255,255,0.05); }
-.kr:first-child { border-top: none; padding-top: 0; }
-.kr-top { display: flex; justify-content: space-between; align-items: baseline; margin-bottom: 5px; }
-.kr-nm { color: #8090A8; font-size: 0.76rem; font-weight: 500; }
-.kr-vl { color: #FFF; font-size: 0.92rem; font-weight: 700; white-space: nowrap; }
-.kr-bar-row { display: flex; align-items: center; gap: 8px; margin-bottom: 3px; }
-.kr-track { flex: 1; height: 3px; background: rgba(255,255,255,0.07); border-radius: 2px; overflow: hidden; }
-.kr-fill { height: 100%; border-radius: 2px; transition: width 0.8s cubic-bezier(0.4,0,0.2,1); }
-.kr-pct { font-size: 0.68rem; font-weight: 600; min-width: 30px; text-align: right; }
-.kr-meta { color: #4A5670; font-size: 0.65rem; letter-spacing: 0.2px; }
-
-/* === FOOTER === */
-.ftr {
-    text-align: center;
-    color: #3D4A60;
-    font-size: 0.72rem;
-    padding-top: 1.2rem;
-    margin-top: 1.8rem;
-    border-top: 1px solid #1C2132;
-    letter-spacing: 0.5px;
-}
-
-/* === RESPONSIVE === */
-@media (max-width: 1100px) { .hdr { flex-direction: column; align-items: flex-start; gap: 0.8rem; } }
-@media (max-width: 768px) {
-    .sum-row { flex-wrap: wrap; }
-    .sum-card { min-width: 45%; }
-    .hdr-title { font-size: 1.3rem; }
-    .block-container { padding-top: 1.2rem; }
-}
-</style>""",
-    unsafe_allow_html=True,
-)
+with timer("css"):
+    st.markdown(stylesheet_html(), unsafe_allow_html=True)
 
 # ─── Header ──────────────────────────────────────────────────────────
-st.markdown(
-    """
-<div class="hdr">
-    <div>
-        <div class="hdr-title">OKRs Estratégicos</div>
-        <div class="hdr-sub">PagBrasil &middot; Indicadores de Performance</div>
-    </div>
-    <img class="hdr-logo-right" src="https://i.imgur.com/CYyv2PD.png" alt="PagBrasil" />
-</div>
-""",
-    unsafe_allow_html=True,
-)
+with timer("header"):
+    logo = logo_file()
+    st.markdown(header_html(asset_url(logo) if logo else None), unsafe_allow_html=True)
+
+# ─── Refresh ─────────────────────────────────────────────────────────
+def shows_changes(changed: set[str]) -> bool:
+    """Se a sessão exibe algo invalidado (resumo, card da página ou diálogo aberto)."""
+    if "summary" in changed or st.session_state["selected_okr"] is not None:
+        return True
+    page = paginate(len(OKRS), st.session_state["grid_page"])
+    return any(f'card:{OKRS[i]["id"]}' in changed for i in range(page.start, page.stop))
+
+
+@st.fragment(run_every=REFRESH_SECONDS if REFRESH_SECONDS > 0 else None)
+def data_version_watcher() -> None:
+    """Roda sozinho a cada intervalo; reexecuta o app só se o que a sessão vê mudou."""
+    error = refresh_error()
+    if error:
+        st.warning(f"Não foi possível atualizar os dados; exibindo a última versão carregada. ({error})")
+    latest = current_dataset()
+    if latest.version == dataset.version:
+        return
+    # Compara a nova versão com a anterior e pergunta o que mudou desde a exibida.
+    dashboard_graph(latest)
+    changed = live_graph(latest.path).changed_since(dataset.version)
+    if changed is None or shows_changes(changed):
+        st.rerun(scope="app")
+
+
+data_version_watcher()
 
 # ─── Summary Metrics ─────────────────────────────────────────────────
-total_krs = sum(len(o["krs"]) for o in OKRS)
-okr_statuses = [okr_status_from_krs(o["krs"]) for o in OKRS]
-on_track = sum(1 for s in okr_statuses if s == "green")
-attention = sum(1 for s in okr_statuses if s == "yellow")
-at_risk = sum(1 for s in okr_statuses if s == "red")
-valid_pcts = [kr["pct"] for o in OKRS for kr in o["krs"] if kr.get("pct", 0) > 0]
-avg_pct = round(sum(valid_pcts) / len(valid_pcts)) if valid_pcts else 0
-
-st.markdown(
-    f"""
-<div class="sum-row">
-    <div class="sum-card">
-        <div class="sum-val">{total_krs}</div>
-        <div class="sum-lbl">Key Results</div>
-    </div>
-    <div class="sum-card">
-        <div class="sum-val" style="color:#34D399">{on_track}</div>
-        <div class="sum-lbl">On Track</div>
-    </div>
-    <div class="sum-card">
-        <div class="sum-val" style="color:#FBBF24">{attention}</div>
-        <div class="sum-lbl">Atenção</div>
-    </div>
-    <div class="sum-card">
-        <div class="sum-val" style="color:#F87171">{at_risk}</div>
-        <div class="sum-lbl">Em Risco</div>
-    </div>
-    <div class="sum-card">
-        <div class="sum-val">{avg_pct}%</div>
-        <div class="sum-lbl">Progresso Médio</div>
-    </div>
-</div>
-""",
-    unsafe_allow_html=True,
-)
+with timer("summary"):
+    st.markdown(summary_html(table.summary), unsafe_allow_html=True)
 
 # ─── Card Renderer ───────────────────────────────────────────────────
-def render_card(okr: dict, idx: int) -> None:
-    accent = okr["accent"]
-    status = okr_status_from_krs(okr["krs"])
-    sc = STATUS_COLORS[status]
-
-    rows = ""
-    for kr in okr["krs"]:
-        pc = pct_color(kr["pct"])
-        w = min(kr["pct"], 100)
-        pct_text = f'{kr["pct"]}%' if kr["pct"] > 0 else "—"
-        rows += (
-            f'<div class="kr">'
-            f'  <div class="kr-top">'
-            f'    <span class="kr-nm">{kr["name"]}</span>'
-            f'    <span class="kr-vl">{kr["val"]}</span>'
-            f'  </div>'
-            f'  <div class="kr-bar-row">'
-            f'    <div class="kr-track">'
-            f'      <div class="kr-fill" style="width:{w}%;background:{pc}"></div>'
-            f'    </div>'
-            f'    <span class="kr-pct" style="color:{pc}">{pct_text}</span>'
-            f'  </div>'
-            f'  <div class="kr-meta">Ant: {kr["ant"]}  ·  Meta: {kr["meta"]}</div>'
-            f'</div>'
-        )
-
-    # ① Botões PRIMEIRO — mesma posição do header com escopo estável
+@st.fragment
+def card_actions(okr: dict, idx: int) -> None:
+    """Botões do card; o clique reexecuta só este fragment e abre o diálogo."""
     with st.container(
         key=f"okr_actions_{idx}",
         horizontal=True,
         horizontal_alignment="left",
         gap="small",
     ):
-        open_clicked = st.button("Veja mais", key=f"open_{idx}")
-        squads_clicked = st.button("Squads", key=f"squads_{idx}")
+        open_clicked = st.button("Veja mais", key=f"open_{idx}", on_click=open_okr, args=(idx,))
+        squads_clicked = st.button("Squads", key=f"squads_{idx}", on_click=open_squads, args=(idx,))
 
-    if open_clicked or squads_clicked:
-        open_okr(idx)
-        st.rerun()
+    # Os callbacks rodam antes do script: num run completo o bloco de Session
+    # State já abriu o diálogo; num rerun só deste fragment, ele abre aqui.
+    if dialog_open:
+        return
+    if open_clicked:
+        okr_dialog_kr(okr, idx)
+    elif squads_clicked:
+        squads_dialog(okr, idx)
 
-    # ② Card HTML DEPOIS — botões ficam acima com espaçamento fixo
-    st.markdown(
-        f"""
-        <div class="okr-card" style="border-left:4px solid {accent};">
-          <div class="c-head">
-            <div class="c-head-left">
-              <span class="c-title" style="color:{accent}">{okr["title"]}</span>
-              <span class="c-dot" style="background:{sc};color:{sc}"></span>
-            </div>
-          </div>
-          <div class="c-sub">{okr["subtitle"]}</div>
-          <div class="c-body">
-            <div class="c-krs">{rows}</div>
-          </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-
-# ─── Layout: Row 1 (3 cards) ────────────────────────────────────────
-row1 = st.columns(3)
-for i in range(3):
-    with row1[i]:
-        render_card(OKRS[i], i)
-
-st.markdown('<div style="height: 18px;"></div>', unsafe_allow_html=True)
-
-# ─── Layout: Row 2 (2 cards centered) ───────────────────────────────
-_, col_p, col_c, _ = st.columns([0.5, 1, 1, 0.5])
-with col_p:
-    render_card(OKRS[3], 3)
-with col_c:
-    render_card(OKRS[4], 4)
+
+def render_card(okr: dict, idx: int) -> None:
+    with timer("render_card"):
+        # ① Botões PRIMEIRO — mesma posição do header com escopo estável
+        card_actions(okr, idx)
+
+        # ② Card HTML DEPOIS — botões ficam acima com espaçamento fixo
+        st.markdown(
+            card_html(
+                okr,
+                table.okr_status[idx],
+                table.colors_for(idx),
+                max_rows=CARD_KR_ROWS,
+                projections=chances.texts_for(table, idx),
+            ),
+            unsafe_allow_html=True,
+        )
+
+
+# ─── Layout: grade paginada ──────────────────────────────────────────
+def grid_pager(page: Page) -> None:
+    with st.container(key="grid_pager", horizontal=True, horizontal_alignment="center", vertical_alignment="center"):
+        st.button("‹ Anterior", key="grid_prev", on_click=go_to_page, args=(page.number - 1,), disabled=page.number == 0)
+        st.markdown(f"Página {page.number + 1} de {page.count} · {len(OKRS)} OKRs", width="content")
+        st.button(
+            "Próxima ›", key="grid_next", on_click=go_to_page, args=(page.number + 1,), disabled=page.number + 1 >= page.count
+        )
+
+
+@st.fragment
+def okr_grid() -> None:
+    """Cards da página atual; trocar de página reexecuta só este fragment."""
+    if current_dataset().version != dataset.version:
+        # Dados novos que o watcher não precisou exibir: atualiza a página inteira.
+        st.rerun(scope="app")
+    page = paginate(len(OKRS), st.session_state["grid_page"])
+    for n, (weights, indices) in enumerate(grid_rows(page.start, page.stop)):
+        if n:
+            st.markdown('<div style="height: 18px;"></div>', unsafe_allow_html=True)
+        for col, i in zip(st.columns(weights), indices):
+            if i is not None:
+                with col:
+                    render_card(OKRS[i], i)
+    if page.count > 1:
+        grid_pager(page)
+
+
+okr_grid()
 
 # ─── Footer ──────────────────────────────────────────────────────────
 st.markdown(
@@ -734,3 +428,8 @@ st.markdown(
 """,
     unsafe_allow_html=True,
 )
+
+# Memória da sessão (session_state e caches por sessão) e limpeza das paradas.
+track_session(st.session_state)
+metrics.observe("rerun", time.perf_counter() - run_started)
+metrics.maybe_export()
@@ -0,0 +1 @@
+"""Módulos de apoio do dashboard de OKRs (dados, cálculos e renderização)."""
@@ -0,0 +1,435 @@
+"""Alertas por limiar sobre todos os KRs, avaliados em lote.
+
+Regras declarativas (JSON) são avaliadas contra a ``KRTable`` inteira de uma
+vez: para cada (métrica, operador) os limiares de todas as regras viram uma
+coluna e a comparação com os valores de todos os KRs é um único broadcast
+(regras x KRs), sem laço por KR nem por regra::
+
+    {
+      "rules": [
+        {"id": "kr-vermelho", "metric": "pct", "op": "<", "value": 70, "severity": "alta"},
+        {"id": "tres-quedas", "metric": "declines", "op": ">=", "value": 3},
+        {"id": "longe-da-meta", "metric": "gap_pct", "op": ">", "value": 20, "okr": "clientes"},
+        {"id": "okr-em-risco", "metric": "okr_status", "op": "in", "value": ["red"]}
+      ]
+    }
+
+Métricas (por KR):
+
+- ``pct``: progresso (KRs sem dados ficam de fora, como em
+  ``okr_status_from_krs``);
+- ``status`` / ``okr_status``: status do KR e do OKR (``green``,
+  ``yellow``, ``red``, ``no_data``), com os limiares de ``status``;
+- ``declines``: pioras consecutivas no fim da série mensal do KR (a mesma
+  da projeção: quedas ou, com ``≤`` na meta, altas);
+- ``gap`` / ``gap_pct``: distância até a meta na unidade de ``val`` e em %
+  da meta (positiva quando falta);
+- ``projected_pct``: pct projetado no fim do ciclo (``okr_dashboard.projection``).
+
+Operadores: ``<``, ``<=``, ``>``, ``>=``, ``==``, ``!=`` e, para status,
+``in``. ``okr``/``kr`` restringem a regra a um OKR ou KR (ids do dataset);
+uma regra cujo escopo não corresponde a nenhum KR é reportada em
+``unmatched_rules`` e gera um aviso no CLI. Com ``--every``, uma rodada que
+falha (fonte ilegível, por exemplo) é reportada e a próxima roda no horário.
+
+Um alerta é emitido quando a condição passa a valer para (regra, OKR, KR) e
+não se repete enquanto ela continuar valendo; quando deixa de valer, a
+próxima vez volta a alertar. Os alertas vão para uma caixa de saída local:
+JSON Lines (com o estado ao lado, ``<arquivo>.state.json``) ou, se o
+arquivo for ``.sqlite``/``.db``, as tabelas ``alert_outbox`` e
+``alert_state`` (fora do ``meta.version`` do catálogo, então gravar alertas
+não invalida os caches do dashboard). O resultado fica em colunas
+(``Alerts``): só os alertas novos viram payload e o estado só é regravado
+quando o conjunto de ativos muda. Para rodar periodicamente::
+
+    python -m okr_dashboard.alerts regras.json --data data/okrs.json --outbox alertas.jsonl --every 300
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from okr_dashboard.data import SQLITE_FORMATS, data_path, read_dataset
+from okr_dashboard.projection import build_projection
+from okr_dashboard.status import PCT_ATTENTION, PCT_ON_TRACK
+from okr_dashboard.table import KRTable, build_kr_table
+
+STATUSES = ("no_data", "green", "yellow", "red")
+STATUS_METRICS = ("status", "okr_status")
+NUMERIC_METRICS = ("pct", "declines", "gap", "gap_pct", "projected_pct")
+METRICS = NUMERIC_METRICS + STATUS_METRICS
+OPS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    metric: str
+    op: str
+    value: float | tuple[str, ...]
+    severity: str = "aviso"
+    okr: str | None = None
+    kr: str | None = None
+
+
+def _status_code(value, rule_id: str = "") -> int:
+    if value not in STATUSES:
+        raise ValueError(f"regra {rule_id!r}: status {value!r} desconhecido (use {', '.join(STATUSES)})")
+    return STATUSES.index(value)
+
+
+def load_rules(path: Path) -> list[Rule]:
+    """Lê e valida as regras (ids únicos, métrica, operador e valor)."""
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    entries = raw.get("rules", []) if isinstance(raw, dict) else raw
+    rules, seen = [], set()
+    for n, entry in enumerate(entries, 1):
+        rule_id = str(entry.get("id") or f"regra-{n}")
+        if rule_id in seen:
+            raise ValueError(f"regra {rule_id!r} repetida")
+        seen.add(rule_id)
+        metric, op, value = entry.get("metric"), entry.get("op"), entry.get("value")
+        if metric not in METRICS:
+            raise ValueError(f"regra {rule_id!r}: métrica {metric!r} desconhecida (use {', '.join(METRICS)})")
+        if op == "in":
+            if metric not in STATUS_METRICS or not isinstance(value, list):
+                raise ValueError(f"regra {rule_id!r}: 'in' só vale para status, com uma lista")
+            value = tuple(STATUSES[_status_code(v, rule_id)] for v in value)
+        elif op not in OPS:
+            raise ValueError(f"regra {rule_id!r}: operador {op!r} desconhecido")
+        elif metric in STATUS_METRICS:
+            _status_code(value, rule_id)
+        elif not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError(f"regra {rule_id!r}: valor numérico esperado, veio {value!r}")
+        rules.append(
+            Rule(rule_id, metric, op, value, str(entry.get("severity", "aviso")), entry.get("okr"), entry.get("kr"))
+        )
+    return rules
+
+
+# ─── Métricas ────────────────────────────────────────────────────────
+def _declines(series: np.ndarray, lower_is_better: np.ndarray) -> np.ndarray:
+    """Pioras consecutivas no fim de cada série (contadas do último ponto para trás)."""
+    steps = np.diff(series, axis=1)
+    worse = np.where(lower_is_better[:, None], steps > 0, steps < 0)
+    return np.cumprod(worse[:, ::-1], axis=1).sum(axis=1).astype(np.float64)
+
+
+def kr_metrics(okrs: list[dict], table: KRTable) -> dict[str, np.ndarray]:
+    """Colunas das métricas (um valor por KR, na ordem da tabela)."""
+    pct = np.where(table.pct > 0, table.pct, np.nan)
+    status = np.select(
+        [np.isnan(pct), pct >= PCT_ON_TRACK, pct >= PCT_ATTENTION],
+        [STATUSES.index("no_data"), STATUSES.index("green"), STATUSES.index("yellow")],
+        default=STATUSES.index("red"),
+    )
+    okr_status = np.array([STATUSES.index(s) for s in table.okr_status], dtype=np.int64)[table.okr_pos]
+    projection = build_projection(okrs, table)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gap = np.where(table.lower_is_better, table.val - table.meta, table.meta - table.val)
+        gap_pct = gap / np.abs(table.meta) * 100
+    return {
+        "pct": pct,
+        "status": status,
+        "okr_status": okr_status,
+        "declines": _declines(projection.series, table.lower_is_better),
+        "gap": gap,
+        "gap_pct": np.where(np.isfinite(gap_pct), gap_pct, np.nan),
+        "projected_pct": projection.projected_pct,
+    }
+
+
+# ─── Avaliação ───────────────────────────────────────────────────────
+def _scope(rules: list[Rule], table: KRTable) -> np.ndarray:
+    """Máscara (regras x KRs) das regras restritas por ``okr``/``kr``."""
+    okr_index = {okr_id: i for i, okr_id in enumerate(table.okr_ids)}
+    rule_okr = np.array([okr_index.get(r.okr, -2) if r.okr else -1 for r in rules])[:, None]
+    mask = (rule_okr == -1) | (rule_okr == table.okr_pos[None, :])
+    if any(r.kr for r in rules):
+        # Ids como inteiros: comparar strings (regras x KRs) seria lento.
+        codes: dict[str, int] = {}
+        kr_codes = np.array([codes.setdefault(kr_id, len(codes)) for kr_id in table.kr_ids])
+        rule_kr = np.array([codes.get(r.kr, -2) if r.kr else -1 for r in rules])[:, None]
+        mask &= (rule_kr == -1) | (rule_kr == kr_codes[None, :])
+    return mask
+
+
+def unmatched_rules(rules: list[Rule], table: KRTable) -> list[str]:
+    """Ids das regras cujo ``okr``/``kr`` não corresponde a nenhum KR do dataset (nunca disparam)."""
+    scoped = [rule for rule in rules if rule.okr or rule.kr]
+    if not scoped:
+        return []
+    matches = _scope(scoped, table).any(axis=1)
+    return [rule.id for rule, ok in zip(scoped, matches.tolist()) if not ok]
+
+
+def evaluate(rules: list[Rule], metrics: dict[str, np.ndarray], table: KRTable) -> tuple[np.ndarray, np.ndarray]:
+    """Índices (regra, KR) dos pares cuja condição vale agora, em ordem de regra."""
+    groups: dict[tuple[str, str], list[int]] = {}
+    for i, rule in enumerate(rules):
+        groups.setdefault((rule.metric, rule.op), []).append(i)
+    rule_idx, kr_idx = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    for (metric, op), idx in groups.items():
+        values = metrics[metric]
+        group = [rules[i] for i in idx]
+        if op == "in":
+            # Cada regra vira um bitmask dos status aceitos.
+            bits = np.array([sum(1 << STATUSES.index(s) for s in r.value) for r in group], dtype=np.int64)
+            hit = ((bits[:, None] >> values[None, :]) & 1).astype(bool)
+        else:
+            if metric in STATUS_METRICS:
+                thresholds = np.array([_status_code(r.value) for r in group], dtype=np.float64)
+            else:
+                thresholds = np.array([r.value for r in group], dtype=np.float64)
+            with np.errstate(invalid="ignore"):
+                hit = OPS[op](values[None, :], thresholds[:, None])
+        hit &= _scope(group, table)
+        rows, cols = np.nonzero(hit)
+        rule_idx.append(np.asarray(idx)[rows])
+        kr_idx.append(cols)
+    rule_idx, kr_idx = np.concatenate(rule_idx), np.concatenate(kr_idx)
+    order = np.lexsort((kr_idx, rule_idx))
+    return rule_idx[order], kr_idx[order]
+
+
+def _message(rule: Rule, okr: dict, kr: dict, value) -> str:
+    shown = STATUSES[int(value)] if rule.metric in STATUS_METRICS else f"{value:g}"
+    expected = ", ".join(rule.value) if rule.op == "in" else rule.value
+    return f'{okr["title"]} / {kr["name"]}: {rule.metric} = {shown} ({rule.op} {expected})'
+
+
+@dataclass(frozen=True)
+class Alerts:
+    """Alertas que valem agora, em colunas: o par ``(rule_idx[i], kr_idx[i])`` é um alerta.
+
+    Chaves e payloads só são montados quando pedidos (``keys``,
+    ``materialize``), então milhões de alertas ativos custam dois arrays.
+    """
+
+    rules: list[Rule]
+    okrs: list[dict]
+    table: KRTable
+    metrics: dict[str, np.ndarray]
+    rule_idx: np.ndarray
+    kr_idx: np.ndarray
+    version: str
+    created_at: str
+
+    def __len__(self) -> int:
+        return int(self.rule_idx.size)
+
+    @cached_property
+    def _krs(self) -> list[tuple[dict, dict]]:
+        return [(okr, kr) for okr in self.okrs for kr in okr["krs"]]
+
+    def keys(self) -> list[tuple[str, str, str]]:
+        """Chave (regra, OKR, KR) de cada alerta, na ordem das colunas."""
+        rule_ids = np.array([rule.id for rule in self.rules], dtype=object)[self.rule_idx]
+        okr_ids = np.array(self.table.okr_ids, dtype=object)[self.table.okr_pos[self.kr_idx]]
+        kr_ids = np.array(self.table.kr_ids, dtype=object)[self.kr_idx]
+        return list(zip(rule_ids.tolist(), okr_ids.tolist(), kr_ids.tolist()))
+
+    def materialize(self, positions) -> list[dict]:
+        """Payloads dos alertas nas ``positions`` dadas (por exemplo, só os novos)."""
+        alerts = []
+        for rule_idx, kr_idx in zip(self.rule_idx[positions].tolist(), self.kr_idx[positions].tolist()):
+            rule = self.rules[rule_idx]
+            okr, kr = self._krs[kr_idx]
+            value = self.metrics[rule.metric][kr_idx].item()
+            alerts.append(
+                {
+                    "created_at": self.created_at,
+                    "rule": rule.id,
+                    "severity": rule.severity,
+                    "okr_id": okr["id"],
+                    "kr_id": kr["id"],
+                    "metric": rule.metric,
+                    "value": STATUSES[int(value)] if rule.metric in STATUS_METRICS else value,
+                    "threshold": list(rule.value) if rule.op == "in" else rule.value,
+                    "message": _message(rule, okr, kr, value),
+                    "version": self.version,
+                }
+            )
+        return alerts
+
+
+def build_alerts(rules: list[Rule], okrs: list[dict], table: KRTable, version: str) -> Alerts:
+    """Alertas que valem agora (colunares; ver ``Alerts``)."""
+    metrics = kr_metrics(okrs, table)
+    rule_idx, kr_idx = evaluate(rules, metrics, table)
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    return Alerts(rules, okrs, table, metrics, rule_idx, kr_idx, version, now)
+
+
+# ─── Caixa de saída ──────────────────────────────────────────────────
+class FileOutbox:
+    """Alertas em JSON Lines (só acréscimo) e as chaves ativas num JSON ao lado."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.state_path = self.path.with_name(self.path.name + ".state.json")
+
+    def active(self) -> set[tuple]:
+        try:
+            return {tuple(key) for key in json.loads(self.state_path.read_text(encoding="utf-8"))}
+        except FileNotFoundError:
+            return set()
+
+    def commit(self, new: list[dict], active: set[tuple]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if new:
+            with self.path.open("a", encoding="utf-8") as out:
+                out.writelines(json.dumps(alert, ensure_ascii=False) + "\n" for alert in new)
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp.write_text(json.dumps(sorted(active), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+
+class SQLiteOutbox:
+    """Tabelas ``alert_outbox`` (alertas, com ``delivered``) e ``alert_state``."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS alert_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT NOT NULL,
+        rule TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        okr_id TEXT NOT NULL,
+        kr_id TEXT NOT NULL,
+        message TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        delivered INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS alert_state (
+        rule TEXT NOT NULL,
+        okr_id TEXT NOT NULL,
+        kr_id TEXT NOT NULL,
+        PRIMARY KEY (rule, okr_id, kr_id)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = str(path)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def active(self) -> set[tuple]:
+        with self._connect() as conn:
+            return set(conn.execute("SELECT rule, okr_id, kr_id FROM alert_state").fetchall())
+
+    def commit(self, new: list[dict], active: set[tuple]) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO alert_outbox (created_at, rule, severity, okr_id, kr_id, message, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (*(a[k] for k in ("created_at", "rule", "severity", "okr_id", "kr_id", "message")),
+                         json.dumps(a, ensure_ascii=False))
+                        for a in new
+                    ],
+                )
+                conn.execute("DELETE FROM alert_state")
+                conn.executemany("INSERT INTO alert_state VALUES (?, ?, ?)", sorted(active))
+        finally:
+            conn.close()
+
+
+def open_outbox(path: str | Path) -> FileOutbox | SQLiteOutbox:
+    return SQLiteOutbox(path) if Path(path).suffix.lower() in SQLITE_FORMATS else FileOutbox(path)
+
+
+def run_once(rules: list[Rule], source: str | Path, outbox: FileOutbox | SQLiteOutbox) -> dict:
+    """Avalia as regras contra a fonte e grava só os alertas novos."""
+    start = time.perf_counter()
+    dataset = read_dataset(source)
+    table = build_kr_table(dataset.okrs)
+    loaded = time.perf_counter()
+    current = build_alerts(rules, dataset.okrs, table, dataset.version)
+    evaluated = time.perf_counter()
+    before = outbox.active()
+    keys = current.keys()
+    active = set(keys)
+    # Só os alertas novos viram payload.
+    new = current.materialize(np.fromiter((key not in before for key in keys), dtype=bool, count=len(keys)))
+    resolved = len(before - active)
+    if new or resolved:
+        outbox.commit(new, active)
+    return {
+        "version": dataset.version,
+        "rules": len(rules),
+        "unmatched_rules": unmatched_rules(rules, table),
+        "krs": int(table.pct.size),
+        "firing": len(current),
+        "new": len(new),
+        "resolved": resolved,
+        "load_s": loaded - start,
+        "evaluate_s": evaluated - loaded,
+        "write_s": time.perf_counter() - evaluated,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rules", type=Path, help="regras em JSON")
+    parser.add_argument("--data", type=Path, help="fonte dos OKRs (padrão: OKRS_DATA_PATH ou data/okrs.json)")
+    parser.add_argument("--outbox", type=Path, default=Path("alertas.jsonl"), help="JSON Lines ou SQLite")
+    parser.add_argument("--every", type=float, default=0, help="reavalia a cada N segundos (0: uma vez)")
+    args = parser.parse_args(argv)
+
+    try:
+        rules = load_rules(args.rules)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    source = args.data or data_path()
+    if not Path(source).is_file():
+        parser.error(f"fonte dos OKRs não encontrada: {source}")
+    outbox = open_outbox(args.outbox)
+    warned: set[str] = set()
+    while True:
+        try:
+            stats = run_once(rules, source, outbox)
+        except Exception as exc:  # uma rodada com erro não derruba o agendamento
+            print(f"falha ao avaliar os alertas: {type(exc).__name__}: {exc}", file=sys.stderr)
+            if args.every <= 0:
+                return 1
+        else:
+            for rule_id in stats["unmatched_rules"]:
+                if rule_id not in warned:
+                    print(f"aviso: regra {rule_id!r}: okr/kr não corresponde a nenhum KR do dataset", file=sys.stderr)
+            warned = set(stats["unmatched_rules"])
+            print(
+                f"{stats['rules']} regras x {stats['krs']} KRs em {stats['evaluate_s'] * 1000:.1f} ms: "
+                f"{stats['firing']} ativos, {stats['new']} novos, {stats['resolved']} resolvidos",
+                file=sys.stderr,
+            )
+            if args.every <= 0:
+                return 0
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""CSS, fontes e logo servidos pelo próprio app a partir de ``static/``.
+
+Com ``server.enableStaticServing`` (ver ``.streamlit/config.toml``) o
+Streamlit expõe ``static/`` em ``app/static/``. As URLs levam ``?v=<hash>``
+do conteúdo, então o navegador reaproveita o arquivo entre reruns e sessões
+e só baixa de novo quando ele muda. A cada rerun vai para o cliente apenas
+um ``<style>@import ...</style>`` de poucos bytes, e não a folha inteira.
+
+As fontes e o logo não são baixados em tempo de execução (a rede de produção
+não alcança Google Fonts nem imgur). Para popular ``static/`` no build::
+
+    python -m okr_dashboard.assets fetch
+
+Sem os arquivos, o CSS cai nas fontes do sistema e o cabeçalho usa
+``static/logo.svg`` (versionado no repositório) no lugar do ``logo.png``.
+Os scripts do Vega em ``static/vendor/`` só são usados pelo export estático
+(``okr_dashboard.export``).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import sys
+import urllib.request
+from pathlib import Path
+
+from okr_dashboard.cache import LRUCache
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+STATIC_URL = "app/static"
+STYLESHEET = "dashboard.css"
+LOGOS = {"logo.png": "image/png", "logo.svg": "image/svg+xml"}  # em ordem de preferência
+
+GOOGLE_FONTS_CSS = "https://fonts.googleapis.com/css2?family=Montserrat:wght@600..800&family=Nunito:wght@400..800&display=swap"
+LOGO_URL = "https://i.imgur.com/CYyv2PD.png"
+# Bibliotecas do Vega usadas pelo export estático (mesmas versões do Altair).
+VEGA_SCRIPTS = {
+    "vega.min.js": "https://cdn.jsdelivr.net/npm/vega@6",
+    "vega-lite.min.js": "https://cdn.jsdelivr.net/npm/vega-lite@6.4.1",
+    "vega-embed.min.js": "https://cdn.jsdelivr.net/npm/vega-embed@7",
+}
+# O Google só devolve woff2 para navegadores que declaram suporte.
+_FETCH_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+_digests: LRUCache[str] = LRUCache(maxsize=64)
+_inline: LRUCache[str] = LRUCache(maxsize=4)
+
+
+def _stat(name: str):
+    try:
+        return (STATIC_DIR / name).stat()
+    except FileNotFoundError:
+        return None
+
+
+def asset_url(name: str) -> str | None:
+    """URL versionada de ``static/<name>``, ou None se o arquivo não existe."""
+    stat = _stat(name)
+    if stat is None:
+        return None
+
+    def digest() -> str:
+        return hashlib.sha1((STATIC_DIR / name).read_bytes()).hexdigest()[:10]
+
+    version = _digests.get_or_set((name, stat.st_mtime_ns, stat.st_size), digest)
+    return f"{STATIC_URL}/{name}?v={version}"
+
+
+def logo_file() -> str | None:
+    """Logo baixado pelo ``fetch`` ou, sem ele, o wordmark versionado."""
+    return next((name for name in LOGOS if _stat(name) is not None), None)
+
+
+def static_serving_enabled() -> bool:
+    from streamlit import config
+
+    return bool(config.get_option("server.enableStaticServing"))
+
+
+def stylesheet_html() -> str:
+    """Tag que aplica ``static/dashboard.css`` na página.
+
+    Com o static serving ligado é só um ``@import`` da URL versionada; sem
+    ele, a folha vai inline (comportamento antigo) para a página não ficar
+    sem estilo.
+    """
+    url = asset_url(STYLESHEET)
+    if url is None:
+        return ""
+    if static_serving_enabled():
+        return f"<style>@import url('{url}');</style>"
+    stat = _stat(STYLESHEET)
+    return _inline.get_or_set(
+        (stat.st_mtime_ns, stat.st_size),
+        lambda: f"<style>\n{(STATIC_DIR / STYLESHEET).read_text(encoding='utf-8')}</style>",
+    )
+
+
+# ─── Download para o build ───────────────────────────────────────────
+def _download(url: str) -> bytes:
+    request = urllib.request.Request(url, headers={"User-Agent": _FETCH_UA})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def _write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    print(f"{path.relative_to(STATIC_DIR.parent)} ({len(data) / 1024:.1f} KB)")
+
+
+def fetch(force: bool = False) -> None:
+    """Baixa fontes (subset latin), logo e scripts do Vega para ``static/``."""
+    css = _download(GOOGLE_FONTS_CSS).decode("utf-8")
+    blocks = re.findall(r"/\*\s*latin\s*\*/\s*@font-face\s*\{([^}]*)\}", css)
+    if not blocks:
+        raise RuntimeError("resposta do Google Fonts sem bloco latin")
+    for block in blocks:
+        family = re.search(r"font-family:\s*'([^']+)'", block).group(1)
+        src = re.search(r"url\(([^)]+)\)", block).group(1)
+        path = STATIC_DIR / "fonts" / f"{family}-latin.woff2"
+        if force or not path.exists():
+            _write(path, _download(src))
+
+    logo = STATIC_DIR / "logo.png"
+    if force or not logo.exists():
+        _write(logo, _download(LOGO_URL))
+
+    for name, url in VEGA_SCRIPTS.items():
+        path = STATIC_DIR / "vendor" / name
+        if force or not path.exists():
+            _write(path, _download(url))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Assets estáticos do dashboard.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fetch_parser = sub.add_parser("fetch", help="baixa fontes, logo e Vega para static/")
+    fetch_parser.add_argument("--force", action="store_true", help="baixa de novo mesmo se já existirem")
+    args = parser.parse_args(argv)
+
+    if args.command == "fetch":
+        fetch(force=args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
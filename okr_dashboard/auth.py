@@ -0,0 +1,44 @@
+"""Token de login assinado, guardado em cookie, para sessões que reconectam.
+
+Depois da senha correta o app grava ``okrs_auth=<expira>.<hmac>`` num cookie
+(HMAC-SHA256 com a própria senha como chave). Uma sessão nova, por exemplo
+após o websocket reconectar num servidor que já descartou a sessão antiga,
+lê o cookie via ``st.context.cookies`` e entra sem pedir a senha de novo.
+Trocar a senha invalida todos os tokens emitidos.
+
+``OKRS_SESSION_TTL_HOURS`` define a validade (12h).
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import os
+import time
+
+AUTH_COOKIE = "okrs_auth"
+SESSION_TTL_SECONDS = int(float(os.environ.get("OKRS_SESSION_TTL_HOURS", "12")) * 3600)
+
+
+def _signature(secret: str, expires: int) -> str:
+    return hmac.new(secret.encode("utf-8"), f"okrs:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def sign_token(secret: str, ttl: int = SESSION_TTL_SECONDS, now: float | None = None) -> str:
+    expires = int((now or time.time()) + ttl)
+    return f"{expires}.{_signature(secret, expires)}"
+
+
+def verify_token(secret: str, token: str | None, now: float | None = None) -> bool:
+    if not token or "." not in token:
+        return False
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < (now or time.time()):
+        return False
+    return hmac.compare_digest(signature, _signature(secret, int(expires)))
+
+
+def set_cookie_script(token: str, ttl: int = SESSION_TTL_SECONDS) -> str:
+    """Script para ``st.iframe`` (iframe same-origin) que grava o cookie."""
+    cookie = f"{AUTH_COOKIE}={token}; max-age={ttl}; path=/; SameSite=Strict"
+    return f"<script>window.parent.document.cookie = {json.dumps(cookie)};</script>"
@@ -0,0 +1,143 @@
+"""Cache LRU simples e thread-safe, compartilhado entre sessões do processo.
+
+``SizedLRUCache`` também limita os bytes guardados (medidos na inserção por
+``sizeof``, por padrão ``deep_sizeof``). Os caches com ``name`` entram no
+registro do processo e aparecem em ``cache_report()``.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Mapping
+from typing import Generic, TypeVar
+
+import numpy as np
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Mapeia chave -> valor, descartando o item usado há mais tempo."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, V] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: V | None = None) -> V | None:
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], V]) -> V:
+        """Valor em cache para ``key``; chama ``factory`` só em caso de miss."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = factory()
+        self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_OPAQUE = (type, type(sys), type(len), type(lambda: None), threading.Thread)
+
+
+def deep_sizeof(obj, seen: set[int] | None = None) -> int:
+    """Bytes aproximados de ``obj`` e de tudo que ele referencia (sem repetir objetos)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, _OPAQUE):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, SizedLRUCache):
+        return obj.nbytes
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, Mapping):
+        return size + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        size += deep_sizeof(getattr(obj, slot, None), seen)
+    return size
+
+
+_registry: weakref.WeakValueDictionary[str, SizedLRUCache] = weakref.WeakValueDictionary()
+
+
+class SizedLRUCache(LRUCache[V]):
+    """LRU limitado em entradas e em bytes (tamanho medido na inserção)."""
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        max_bytes: int = 2**26,
+        sizeof: Callable[[V], int] = deep_sizeof,
+        name: str | None = None,
+    ):
+        super().__init__(maxsize)
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.evictions = 0
+        self._sizes: dict = {}
+        if name is not None:
+            _registry[name] = self
+
+    def set(self, key: Hashable, value: V) -> None:
+        size = self.sizeof(value)
+        with self._lock:
+            self.nbytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._data[key] = value
+            self._data.move_to_end(key)
+            # Mantém ao menos a entrada recém-inserida, mesmo se maior que o limite.
+            while len(self._data) > 1 and (len(self._data) > self.maxsize or self.nbytes > self.max_bytes):
+                old_key, _ = self._data.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+
+def cache_report() -> dict[str, dict]:
+    """Entradas, bytes e descartes de cada cache registrado do processo."""
+    return {
+        name: {"entries": len(cache), "bytes": cache.nbytes, "max_bytes": cache.max_bytes, "evictions": cache.evictions}
+        for name, cache in sorted(_registry.items())
+    }
@@ -0,0 +1,250 @@
+"""Specs Vega-Lite dos gráficos de evolução dos KRs.
+
+A spec de cada KR é montada uma vez por versão dos dados e fica em cache no
+processo (LRU limitado a ``OKRS_CHART_CACHE_MB``, 64 MB, somando as duas
+specs); o diálogo só envia o dicionário pronto. Séries maiores que o
+orçamento de pontos (``CHART_POINT_BUDGET``) são reduzidas com
+Largest-Triangle-Three-Buckets, que preserva picos e vales da curva.
+
+``okr_chart_spec`` junta todos os KRs de um OKR numa única spec de
+pequenos múltiplos (um painel por KR, cada um com o formato de eixo do seu
+KR). O KR em foco é um parâmetro ligado a um seletor e um clique numa linha
+a marca para comparação, então trocar ou comparar KRs acontece no navegador,
+sem rerun no servidor. Os painéis são chaveados pelo índice do KR no OKR,
+então KRs com o mesmo nome continuam em painéis separados.
+"""
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+from okr_dashboard.cache import SizedLRUCache
+
+CHART_POINT_BUDGET = int(os.environ.get("OKRS_CHART_POINT_BUDGET", "300"))
+CHART_CACHE_BYTES = int(float(os.environ.get("OKRS_CHART_CACHE_MB", "64")) * 2**20)
+VEGA_LITE_SCHEMA = "https://vega.github.io/schema/vega-lite/v6.4.1.json"
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Índices dos ``n_out`` pontos escolhidos pelo LTTB (sempre ordenados)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets entre o primeiro e o último ponto, que são sempre mantidos.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(labels: list[str], values: list[float], budget: int) -> tuple[list[str], list[float]]:
+    if len(values) <= budget:
+        return labels, values
+    y = np.asarray(values, dtype=np.float64)
+    keep = lttb(np.arange(len(y), dtype=np.float64), y, budget)
+    return [labels[i] for i in keep], y[keep].tolist()
+
+
+def _y_domain(values: list[float]) -> list[float]:
+    y_min, y_max = min(values), max(values)
+    y_pad = (y_max - y_min) * 0.12 if y_max != y_min else max(abs(y_max) * 0.12, 1)
+    return [y_min - y_pad, y_max + y_pad]
+
+
+def build_chart_spec(
+    labels: list[str], values: list[float], axis: tuple[str, str], budget: int, x_title: str = "Mês"
+) -> dict:
+    labels, values = downsample(labels, values, budget)
+    y_title, y_format = axis
+    y_domain = _y_domain(values)
+    # Mesma spec que o Altair geraria, montada direto: sem validação de
+    # schema nem conversão via DataFrame, que custavam ~10 ms por gráfico.
+    return {
+        "$schema": VEGA_LITE_SCHEMA,
+        "config": {"view": {"continuousWidth": 300, "continuousHeight": 300}},
+        "data": {"values": [{"Mês": label, "Valor": float(value)} for label, value in zip(labels, values)]},
+        "mark": {"type": "line", "point": len(values) <= 60, "strokeWidth": 2.5},
+        "encoding": {
+            "tooltip": [
+                {"field": "Mês", "title": x_title, "type": "nominal"},
+                {"field": "Valor", "format": y_format, "title": y_title, "type": "quantitative"},
+            ],
+            "x": {
+                "axis": {"labelAngle": 0, "labelOverlap": True, "title": x_title},
+                "field": "Mês",
+                "sort": list(labels),
+                "type": "nominal",
+            },
+            "y": {
+                "axis": {"format": y_format, "title": y_title},
+                "field": "Valor",
+                "scale": {"domain": y_domain, "nice": True, "zero": False},
+                "type": "quantitative",
+            },
+        },
+        "height": 320,
+    }
+
+
+_specs: SizedLRUCache[dict] = SizedLRUCache(maxsize=2048, max_bytes=CHART_CACHE_BYTES, name="chart_specs")
+
+
+def kr_chart_spec(
+    version: str,
+    okr: dict,
+    kr: dict,
+    labels: list[str],
+    values: list[float],
+    budget: int = CHART_POINT_BUDGET,
+    variant: tuple = (),
+    x_title: str = "Mês",
+) -> dict:
+    """Spec do gráfico do KR, em cache por (versão dos dados, OKR, KR, orçamento).
+
+    ``variant`` distingue séries diferentes do mesmo KR (granularidade,
+    janela, versão do histórico). A spec é compartilhada entre sessões e não
+    deve ser alterada.
+    """
+    key = ("kr", version, okr["id"], kr["id"], budget, variant, x_title)
+    return _specs.get_or_set(key, lambda: build_chart_spec(labels, values, kr["axis"], budget, x_title))
+
+
+# ─── Pequenos múltiplos (todos os KRs do OKR) ────────────────────────
+FOCUS_PARAM = "kr_foco"
+COMPARE_PARAM = "comparar"
+MUTED_COLOR = "#4A5670"
+COMPARE_COLOR = "#9DB2CC"
+
+
+def build_okr_chart_spec(
+    names: list[str],
+    series: list[tuple[list[str], list[float]]],
+    axes: list[tuple[str, str]],
+    accent: str,
+    budget: int,
+    x_title: str = "Mês",
+    columns: int = 2,
+) -> dict:
+    """Spec com um painel por KR com série.
+
+    Os dados de todos os painéis vão uma vez só em ``data`` e cada painel
+    filtra o seu KR pelo índice (campo ``kr``). ``kr_foco`` (seletor, começa
+    no primeiro painel) pinta o painel em foco com ``accent`` e ``comparar``
+    (clique, com toggle) destaca outros KRs.
+    """
+    rows: list[dict] = []
+    panels: list[dict] = []
+    shown: list[int] = []
+    for i, (name, (labels, values), (y_title, y_format)) in enumerate(zip(names, series, axes)):
+        if not values:
+            continue
+        labels, values = downsample(labels, values, budget)
+        rows += [{"kr": i, "KR": name, "Mês": label, "Valor": float(value)} for label, value in zip(labels, values)]
+        shown.append(i)
+        focused = f"datum.kr == {FOCUS_PARAM}"
+        panels.append(
+            {
+                "name": f"kr_{i}",
+                "title": {"text": name, "anchor": "start", "fontSize": 12},
+                "transform": [{"filter": {"field": "kr", "equal": i}}],
+                "mark": {"type": "line", "point": len(values) <= 60},
+                "encoding": {
+                    "tooltip": [
+                        {"field": "KR", "type": "nominal"},
+                        {"field": "Mês", "title": x_title, "type": "nominal"},
+                        {"field": "Valor", "format": y_format, "title": y_title, "type": "quantitative"},
+                    ],
+                    "x": {
+                        "axis": {"labelAngle": 0, "labelOverlap": True, "title": None},
+                        "field": "Mês",
+                        "sort": list(labels),
+                        "type": "nominal",
+                    },
+                    "y": {
+                        "axis": {"format": y_format, "title": None, "tickCount": 4},
+                        "field": "Valor",
+                        "scale": {"domain": _y_domain(values), "nice": True, "zero": False},
+                        "type": "quantitative",
+                    },
+                    "color": {
+                        "condition": [
+                            {"test": focused, "value": accent},
+                            {"param": COMPARE_PARAM, "empty": False, "value": COMPARE_COLOR},
+                        ],
+                        "value": MUTED_COLOR,
+                    },
+                    "strokeWidth": {"condition": {"test": focused, "value": 3}, "value": 1.5},
+                },
+                "width": 280,
+                "height": 130,
+            }
+        )
+    if not panels:
+        return {}
+    return {
+        "$schema": VEGA_LITE_SCHEMA,
+        "data": {"values": rows},
+        "params": [
+            {
+                "name": FOCUS_PARAM,
+                "value": shown[0],
+                "bind": {
+                    "input": "select",
+                    "options": shown,
+                    "labels": [names[i] for i in shown],
+                    "name": "KR em foco ",
+                },
+            },
+            {
+                "name": COMPARE_PARAM,
+                "select": {"type": "point", "fields": ["kr"], "toggle": "true"},
+                "views": [panel["name"] for panel in panels],
+            },
+        ],
+        "concat": panels,
+        "columns": columns,
+    }
+
+
+def okr_chart_spec(
+    version: str,
+    okr: dict,
+    series: list,
+    budget: int = CHART_POINT_BUDGET,
+    x_title: str = "Mês",
+) -> dict:
+    """Spec de pequenos múltiplos do OKR, em cache por (versão, OKR, orçamento).
+
+    ``series`` traz um ``KRSeries`` por KR (na ordem de ``okr["krs"]``); as
+    versões das séries entram na chave. Vazio quando nenhum KR tem série. A
+    spec é compartilhada entre sessões e não deve ser alterada.
+    """
+    variant = tuple((s.source, s.version) for s in series)
+    return _specs.get_or_set(
+        ("okr", version, okr["id"], budget, variant, x_title),
+        lambda: build_okr_chart_spec(
+            [kr["name"] for kr in okr["krs"]],
+            [(s.labels, s.values) for s in series],
+            [kr["axis"] for kr in okr["krs"]],
+            okr["accent"],
+            budget,
+            x_title,
+        ),
+    )
+
+
+def clear_cache() -> None:
+    """Esvazia o cache de specs (usado pelos benchmarks para medir a frio)."""
+    _specs.clear()
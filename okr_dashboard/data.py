@@ -0,0 +1,252 @@
+"""Carregamento dos OKRs a partir de um arquivo local (JSON, CSV, Parquet ou SQLite).
+
+O arquivo é lido e parseado uma única vez por processo e a cópia parseada é
+compartilhada entre todas as sessões. A cópia é invalidada quando o ``mtime``
+ou o tamanho do arquivo mudam, e também expira após ``DATA_TTL_SECONDS``.
+Conteúdo idêntico (mesmo hash) reaproveita o parse anterior.
+
+Formatos aceitos:
+
+- ``.json``: ``{"okrs": [...]}`` (ou a lista diretamente), no mesmo formato
+  do antigo literal ``OKRS``.
+- ``.csv`` / ``.parquet``: uma linha por KR, com as colunas ``okr_id``,
+  ``okr_title``, ``okr_subtitle``, ``okr_accent``, ``okr_status``,
+  ``okr_chart``, ``kr_id``, ``kr_name``, ``kr_val``, ``kr_ant``,
+  ``kr_meta``, ``kr_pct`` e ``kr_chart``. Séries (``*_chart``) podem ser listas ou strings JSON.
+  Opcionais: ``kr_weight`` e, para KRs de squad, ``squad_id``,
+  ``squad_name`` e ``squad_weight`` (linhas com ``squad_name`` vão para o
+  squad, não para o OKR da empresa).
+
+No JSON, os squads ficam em ``okr["squads"]``: ``{"name", "weight", "krs"}``
+com KRs no mesmo formato (e ``weight`` opcional). Ver ``okr_dashboard.squads``.
+
+``.sqlite``/``.sqlite3``/``.db`` lê o catálogo de ``okr_dashboard.db``.
+
+OKRs, squads e KRs sem ``id`` recebem um slug derivado do título/nome. Os campos
+``val``/``ant``/``meta`` são parseados e o ``pct`` é calculado no carregamento
+(ver ``okr_dashboard.values``); ``pct``/``kr_pct`` na fonte é opcional.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+
+import streamlit as st
+
+from okr_dashboard.values import prepare_okrs
+
+DEFAULT_DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "okrs.json"
+DATA_TTL_SECONDS = int(os.environ.get("OKRS_DATA_TTL", "300"))
+
+SQLITE_FORMATS = (".sqlite", ".sqlite3", ".db")
+SUPPORTED_FORMATS = (".json", ".csv", ".parquet", *SQLITE_FORMATS)
+
+
+@dataclass(frozen=True)
+class OKRDataset:
+    """OKRs parseados e os metadados usados para invalidar o cache.
+
+    ``okrs`` é compartilhado entre sessões e deve ser tratado como somente
+    leitura. ``version`` é o hash do conteúdo do arquivo.
+    """
+
+    okrs: list[dict]
+    version: str
+    path: str
+    mtime_ns: int
+
+
+def data_path() -> Path:
+    """Caminho da fonte de dados (``OKRS_DATA_PATH`` ou ``data/okrs.json``)."""
+    return Path(os.environ.get("OKRS_DATA_PATH", DEFAULT_DATA_PATH))
+
+
+# ─── Parsing ─────────────────────────────────────────────────────────
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _as_series(value) -> list[float] | None:
+    if _is_missing(value):
+        return None
+    if isinstance(value, str):
+        if not value.strip():
+            return None
+        value = json.loads(value)
+    return [float(v) for v in value]
+
+
+def _okrs_from_rows(rows: list[dict]) -> list[dict]:
+    okrs: dict[str, dict] = {}
+    for row in rows:
+        title = row["okr_title"]
+        okr = okrs.get(title)
+        if okr is None:
+            okr = okrs[title] = {
+                "id": None if _is_missing(row.get("okr_id")) else row["okr_id"],
+                "title": title,
+                "subtitle": "" if _is_missing(row.get("okr_subtitle")) else row["okr_subtitle"],
+                "accent": ("" if _is_missing(row.get("okr_accent")) else str(row["okr_accent"]).strip()) or "#54CA30",
+                "status": None if _is_missing(row.get("okr_status")) else row["okr_status"],
+                "chart": _as_series(row.get("okr_chart")) or [],
+                "krs": [],
+            }
+        if _is_missing(row.get("kr_name")):
+            continue
+        kr = {
+            "id": None if _is_missing(row.get("kr_id")) else row["kr_id"],
+            "name": row["kr_name"],
+            "val": "—" if _is_missing(row.get("kr_val")) else str(row["kr_val"]),
+            "ant": "—" if _is_missing(row.get("kr_ant")) else str(row["kr_ant"]),
+            "meta": "—" if _is_missing(row.get("kr_meta")) else str(row["kr_meta"]),
+            "pct": 0 if _is_missing(row.get("kr_pct")) else int(round(float(row["kr_pct"]))),
+        }
+        series = _as_series(row.get("kr_chart"))
+        if series:
+            kr["chart"] = series
+        if not _is_missing(row.get("kr_weight")):
+            kr["weight"] = float(row["kr_weight"])
+        if _is_missing(row.get("squad_name")):
+            okr["krs"].append(kr)
+            continue
+        squads = okr.setdefault("squads", {})
+        squad = squads.get(row["squad_name"])
+        if squad is None:
+            squad = squads[row["squad_name"]] = {
+                "id": None if _is_missing(row.get("squad_id")) else row["squad_id"],
+                "name": row["squad_name"],
+                "weight": 1.0 if _is_missing(row.get("squad_weight")) else float(row["squad_weight"]),
+                "krs": [],
+            }
+        squad["krs"].append(kr)
+    for okr in okrs.values():
+        if "squads" in okr:
+            okr["squads"] = list(okr["squads"].values())
+    return list(okrs.values())
+
+
+def slugify(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "item"
+
+
+def _unique_id(base: str, seen: set[str]) -> str:
+    candidate, n = base, 2
+    while candidate in seen:
+        candidate, n = f"{base}-{n}", n + 1
+    seen.add(candidate)
+    return candidate
+
+
+def assign_ids(okrs: list[dict]) -> list[dict]:
+    """Garante ``id`` estável em cada OKR, squad e KR (slug do título/nome)."""
+    okr_seen: set[str] = set()
+    for okr in okrs:
+        okr["id"] = _unique_id(okr.get("id") or slugify(okr["title"]), okr_seen)
+        kr_seen: set[str] = set()
+        for kr in okr["krs"]:
+            kr["id"] = _unique_id(kr.get("id") or slugify(kr["name"]), kr_seen)
+        squad_seen: set[str] = set()
+        for squad in okr.get("squads", []):
+            squad["id"] = _unique_id(squad.get("id") or slugify(squad["name"]), squad_seen)
+            squad_kr_seen: set[str] = set()
+            for kr in squad["krs"]:
+                kr["id"] = _unique_id(kr.get("id") or slugify(kr["name"]), squad_kr_seen)
+    return okrs
+
+
+def content_hash(okr: dict) -> str:
+    """Hash do conteúdo exibido de um OKR (chave do cache de HTML)."""
+    shown = [okr.get("title"), okr.get("subtitle"), okr.get("accent")]
+    shown += [[kr["name"], kr["val"], kr["ant"], kr["meta"], kr["pct"]] for kr in okr["krs"]]
+    return hashlib.sha1(json.dumps(shown, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def finalize_okrs(okrs: list[dict]) -> list[dict]:
+    prepare_okrs(assign_ids(okrs))
+    for okr in okrs:
+        okr["hash"] = content_hash(okr)
+    return okrs
+
+
+def parse_okrs(raw: bytes, fmt: str) -> list[dict]:
+    """Converte o conteúdo bruto do arquivo na lista de OKRs."""
+    if fmt == ".json":
+        payload = json.loads(raw)
+        return finalize_okrs(payload["okrs"] if isinstance(payload, dict) else payload)
+
+    import pandas as pd
+
+    if fmt == ".csv":
+        df = pd.read_csv(io.BytesIO(raw))
+    elif fmt == ".parquet":
+        df = pd.read_parquet(io.BytesIO(raw))
+    else:
+        raise ValueError(f"Formato de dados não suportado: {fmt} (use {', '.join(SUPPORTED_FORMATS)})")
+    return finalize_okrs(_okrs_from_rows(df.to_dict("records")))
+
+
+def source_signature(path: str | Path) -> tuple[int, int]:
+    """Identifica a revisão da fonte sem lê-la: ``(mtime_ns, tamanho)``.
+
+    Para SQLite é a ``meta.version`` do banco (o mtime do arquivo principal
+    não muda enquanto as escritas estão no WAL).
+    """
+    path = Path(path)
+    if path.suffix.lower() in SQLITE_FORMATS:
+        from okr_dashboard import db
+
+        return db.data_version(path), 0
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_dataset(path: str | Path) -> OKRDataset:
+    """Lê e parseia o arquivo sem passar pelo cache."""
+    path = Path(path)
+    if path.suffix.lower() in SQLITE_FORMATS:
+        from okr_dashboard import db
+
+        return db.read_dataset(path)
+    stat = path.stat()
+    raw = path.read_bytes()
+    version = hashlib.sha256(raw).hexdigest()[:16]
+    return OKRDataset(
+        okrs=parse_okrs(raw, path.suffix.lower()),
+        version=version,
+        path=str(path),
+        mtime_ns=stat.st_mtime_ns,
+    )
+
+
+# ─── Cache ───────────────────────────────────────────────────────────
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _parse_cached(version: str, fmt: str, _raw: bytes) -> list[dict]:
+    return parse_okrs(_raw, fmt)
+
+
+@st.cache_resource(ttl=DATA_TTL_SECONDS, max_entries=4, show_spinner=False)
+def _load_cached(path: str, mtime_ns: int, size: int) -> OKRDataset:
+    if Path(path).suffix.lower() in SQLITE_FORMATS:
+        return read_dataset(path)
+    raw = Path(path).read_bytes()
+    version = hashlib.sha256(raw).hexdigest()[:16]
+    return OKRDataset(
+        okrs=_parse_cached(version, Path(path).suffix.lower(), raw),
+        version=version,
+        path=path,
+        mtime_ns=mtime_ns,
+    )
+
+
+def load_okrs(path: str | Path | None = None) -> OKRDataset:
+    """Retorna o dataset compartilhado, recarregando se o arquivo mudou."""
+    path = Path(path) if path is not None else data_path()
+    return _load_cached(str(path), *source_signature(path))
@@ -0,0 +1,457 @@
+"""Backend SQLite para o catálogo de OKRs/KRs e o histórico dos KRs.
+
+Um único arquivo guarda o catálogo (``okrs``, ``squads``, ``krs``) e as
+séries (``kr_history``: a série bruta com ``granularity = 'raw'`` e os
+roll-ups ``M``/``Q``/``Y`` com os mesmos agregados do histórico em Arrow).
+A chave primária de ``kr_history`` é ``(okr_id, squad_id, kr_id,
+granularity, period)`` (``squad_id`` vazio para KRs da empresa, como em
+``krs``) e a tabela é ``WITHOUT ROWID``, então a série de um KR numa
+granularidade é um range contíguo do índice. ``read_history`` faz uma
+consulta parametrizada por KR, granularidade e intervalo de datas.
+
+Leituras que combinam a versão com os dados (``read_dataset``,
+``read_history``) rodam numa única transação de leitura (``snapshot``): no
+modo WAL todas as consultas dela veem o mesmo commit, então o conteúdo
+sempre corresponde à versão informada.
+
+As conexões vêm de um pool por arquivo, compartilhado por todas as sessões
+do processo (modo WAL: leitores concorrentes não bloqueiam a escrita). O
+dashboard abre o banco só para leitura (``mode=ro``): um arquivo que não
+existe ou sem as tabelas do catálogo é um erro, não um banco vazio. Só o
+import (e a ingestão com ``--db``) cria o arquivo e o schema
+(``create_schema``).
+Cada escrita incrementa ``meta.version``, que vira a versão do dataset e
+invalida os caches por versão (tabela de KRs, specs dos gráficos).
+
+Uso: aponte ``OKRS_DATA_PATH`` para um ``.sqlite``/``.db`` (ou use
+``OKRS_DB_PATH`` só para o histórico) e importe os dados com::
+
+    python -m okr_dashboard.db import --db data/okrs.sqlite --okrs data/okrs.json --history data/history
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+from okr_dashboard.data import SQLITE_FORMATS, OKRDataset, finalize_okrs, read_dataset as read_source
+from okr_dashboard.history import AGGREGATES, compute_rollups, history_dir
+from okr_dashboard.periods import GRANULARITIES
+
+POOL_SIZE = int(os.environ.get("OKRS_DB_POOL_SIZE", "8"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS okrs (
+    okr_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    subtitle TEXT NOT NULL DEFAULT '',
+    accent TEXT NOT NULL DEFAULT '#54CA30',
+    status TEXT,
+    chart TEXT
+);
+CREATE TABLE IF NOT EXISTS squads (
+    okr_id TEXT NOT NULL,
+    squad_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    weight REAL NOT NULL DEFAULT 1,
+    PRIMARY KEY (okr_id, squad_id)
+);
+CREATE TABLE IF NOT EXISTS krs (
+    okr_id TEXT NOT NULL,
+    squad_id TEXT NOT NULL DEFAULT '',
+    kr_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    val TEXT,
+    ant TEXT,
+    meta TEXT,
+    pct INTEGER,
+    weight REAL,
+    history_agg TEXT,
+    chart TEXT,
+    PRIMARY KEY (okr_id, squad_id, kr_id)
+);
+"""
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kr_history (
+    okr_id TEXT NOT NULL,
+    squad_id TEXT NOT NULL DEFAULT '',
+    kr_id TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    period TEXT NOT NULL,
+    last REAL,
+    mean REAL,
+    sum REAL,
+    min REAL,
+    max REAL,
+    count REAL,
+    PRIMARY KEY (okr_id, squad_id, kr_id, granularity, period)
+) WITHOUT ROWID;
+"""
+
+
+CATALOG_TABLES = ("meta", "okrs", "squads", "krs", "kr_history")
+
+
+def _ensure_history(conn: sqlite3.Connection) -> None:
+    """Cria ``kr_history``; em bancos antigos (sem ``squad_id``) migra as séries como KRs da empresa."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(kr_history)")]
+    if not columns:
+        conn.execute(HISTORY_SCHEMA)
+        return
+    if "squad_id" in columns:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("ALTER TABLE kr_history RENAME TO kr_history_old")
+        conn.execute(HISTORY_SCHEMA)
+        conn.execute(
+            "INSERT INTO kr_history SELECT okr_id, '', kr_id, granularity, period, last, mean, sum, min, max, count "
+            "FROM kr_history_old"
+        )
+        conn.execute("DROP TABLE kr_history_old")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def create_schema(path: str | Path) -> None:
+    """Cria o arquivo e as tabelas (ou migra ``kr_history``); usado pelos comandos de import."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        _ensure_history(conn)
+    finally:
+        conn.close()
+
+
+def _check_schema(conn: sqlite3.Connection, path: str) -> None:
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = [name for name in CATALOG_TABLES if name not in tables]
+    if missing:
+        raise ValueError(
+            f"{path} não é um banco do dashboard (faltam as tabelas {', '.join(missing)}); "
+            "importe os dados com python -m okr_dashboard.db import"
+        )
+    if "squad_id" not in [row[1] for row in conn.execute("PRAGMA table_info(kr_history)")]:
+        raise ValueError(f"{path} tem o formato antigo de kr_history; rode python -m okr_dashboard.db import para migrar")
+
+
+# ─── Pool ────────────────────────────────────────────────────────────
+class ConnectionPool:
+    """Até ``size`` conexões reaproveitadas entre threads (sessões).
+
+    Só leitura por padrão; com ``writable`` as conexões podem gravar, mas o
+    arquivo e o schema já devem existir (``create_schema``).
+    """
+
+    def __init__(self, path: str | Path, size: int = POOL_SIZE, writable: bool = False) -> None:
+        if not Path(path).is_file():
+            raise FileNotFoundError(
+                f"Banco SQLite não encontrado: {path} (confira OKRS_DATA_PATH/OKRS_DB_PATH "
+                "ou crie com python -m okr_dashboard.db import)"
+            )
+        self.path = str(path)
+        self.size = size
+        self.writable = writable
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        with self.connection() as conn:
+            _check_schema(conn, self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"{Path(self.path).as_uri()}?mode={'rw' if self.writable else 'ro'}"
+        conn = sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False, isolation_level=None)
+        if self.writable:
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            conn = self._connect() if create else self._idle.get(timeout=30)
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('version', '1') "
+                "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+            )
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def snapshot(self):
+        """Conexão numa transação de leitura: todas as consultas veem o mesmo commit."""
+        with self.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+
+
+_pools: dict[tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str | Path, writable: bool = False) -> ConnectionPool:
+    """Pool do arquivo (de leitura ou de escrita), um de cada por processo."""
+    key = (str(Path(path).resolve()), writable)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(key[0], writable=writable)
+    return pool
+
+
+def database_path() -> Path | None:
+    """Banco do histórico: ``OKRS_DB_PATH`` ou a fonte de dados, se for SQLite."""
+    if os.environ.get("OKRS_DB_PATH"):
+        return Path(os.environ["OKRS_DB_PATH"])
+    source = os.environ.get("OKRS_DATA_PATH", "")
+    if Path(source).suffix.lower() in SQLITE_FORMATS:
+        return Path(source)
+    return None
+
+
+def _version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def data_version(path: str | Path) -> int:
+    with get_pool(path).connection() as conn:
+        return _version(conn)
+
+
+# ─── Catálogo ────────────────────────────────────────────────────────
+def _dump_series(series) -> str | None:
+    return json.dumps([float(v) for v in series]) if series is not None and len(series) else None
+
+
+def write_okrs(path: str | Path, okrs: list[dict]) -> None:
+    """Substitui o catálogo inteiro numa transação."""
+    okr_rows, squad_rows, kr_rows = [], [], []
+
+    def kr_row(okr_id: str, squad_id: str, pos: int, kr: dict) -> tuple:
+        fields = (kr.get(f) for f in ("val", "ant", "meta", "pct_source", "weight", "history_agg"))
+        return (okr_id, squad_id, kr["id"], pos, kr["name"], *fields, _dump_series(kr.get("chart")))
+
+    for pos, okr in enumerate(okrs):
+        okr_rows.append(
+            (
+                okr["id"],
+                pos,
+                okr["title"],
+                okr.get("subtitle", ""),
+                okr.get("accent", "#54CA30"),
+                okr.get("status"),
+                _dump_series(okr.get("chart")),
+            )
+        )
+        kr_rows += [kr_row(okr["id"], "", i, kr) for i, kr in enumerate(okr["krs"])]
+        for s_pos, squad in enumerate(okr.get("squads", [])):
+            squad_rows.append((okr["id"], squad["id"], s_pos, squad["name"], float(squad.get("weight", 1.0))))
+            kr_rows += [kr_row(okr["id"], squad["id"], i, kr) for i, kr in enumerate(squad["krs"])]
+
+    with get_pool(path, writable=True).transaction() as conn:
+        conn.execute("DELETE FROM okrs")
+        conn.execute("DELETE FROM squads")
+        conn.execute("DELETE FROM krs")
+        conn.executemany("INSERT INTO okrs VALUES (?, ?, ?, ?, ?, ?, ?)", okr_rows)
+        conn.executemany("INSERT INTO squads VALUES (?, ?, ?, ?, ?)", squad_rows)
+        conn.executemany("INSERT INTO krs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", kr_rows)
+
+
+def read_okrs(path: str | Path) -> list[dict]:
+    """Catálogo na ordem original, no formato do JSON (antes de ``finalize_okrs``)."""
+    with get_pool(path).snapshot() as conn:
+        return _read_okrs(conn)
+
+
+def _read_okrs(conn: sqlite3.Connection) -> list[dict]:
+    okr_rows = conn.execute(
+        "SELECT okr_id, title, subtitle, accent, status, chart FROM okrs ORDER BY position"
+    ).fetchall()
+    squad_rows = conn.execute("SELECT okr_id, squad_id, name, weight FROM squads ORDER BY okr_id, position").fetchall()
+    kr_rows = conn.execute(
+        "SELECT okr_id, squad_id, kr_id, name, val, ant, meta, pct, weight, history_agg, chart "
+        "FROM krs ORDER BY okr_id, squad_id, position"
+    ).fetchall()
+
+    okrs = {}
+    for okr_id, title, subtitle, accent, status, chart in okr_rows:
+        okrs[okr_id] = {
+            "id": okr_id,
+            "title": title,
+            "subtitle": subtitle,
+            "accent": accent,
+            "status": status,
+            "chart": json.loads(chart) if chart else [],
+            "krs": [],
+        }
+    squads = {}
+    for okr_id, squad_id, name, weight in squad_rows:
+        squads[okr_id, squad_id] = squad = {"id": squad_id, "name": name, "weight": weight, "krs": []}
+        okrs[okr_id].setdefault("squads", []).append(squad)
+    for okr_id, squad_id, kr_id, name, val, ant, meta, pct, weight, agg, chart in kr_rows:
+        kr = {"id": kr_id, "name": name, "val": val or "—", "ant": ant or "—", "meta": meta or "—", "pct": pct or 0}
+        if weight is not None:
+            kr["weight"] = weight
+        if agg:
+            kr["history_agg"] = agg
+        if chart:
+            kr["chart"] = json.loads(chart)
+        (squads[okr_id, squad_id] if squad_id else okrs[okr_id])["krs"].append(kr)
+    return list(okrs.values())
+
+
+def read_dataset(path: str | Path) -> OKRDataset:
+    # Versão e catálogo do mesmo commit: um writer entre as duas leituras não os separa.
+    with get_pool(path).snapshot() as conn:
+        version = _version(conn)
+        rows = _read_okrs(conn)
+    okrs = finalize_okrs(rows)
+    # O caminho entra na versão: dois bancos na mesma versão não colidem nos caches.
+    tag = hashlib.sha1(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:8]
+    return OKRDataset(okrs=okrs, version=f"db-{tag}-{version}", path=str(path), mtime_ns=version)
+
+
+# ─── Histórico ───────────────────────────────────────────────────────
+def write_history(path: str | Path, okr_id: str, kr_id: str, dates, values, squad_id: str = "") -> None:
+    """Substitui a série bruta de um KR e os roll-ups (mesmas regras do Arrow)."""
+    df, rollups = compute_rollups(dates, values)
+    key = (okr_id, squad_id, kr_id)
+    rows = [
+        (*key, "raw", d.isoformat(), v, v, v, v, v, 1.0) for d, v in zip(df["date"].dt.date, df["value"].astype(float))
+    ]
+    for granularity, rolled in rollups.items():
+        columns = [rolled[agg].astype(float).tolist() for agg in AGGREGATES]
+        rows += [
+            (*key, granularity, period.isoformat(), *values_) for period, *values_ in zip(rolled.index.date, *columns)
+        ]
+    with get_pool(path, writable=True).transaction() as conn:
+        conn.execute("DELETE FROM kr_history WHERE okr_id = ? AND squad_id = ? AND kr_id = ?", key)
+        conn.executemany("INSERT INTO kr_history VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def has_history(path: str | Path, okr_id: str, kr_id: str, squad_id: str = "") -> bool:
+    with get_pool(path).connection() as conn:
+        row = conn.execute(
+            "SELECT 1 FROM kr_history WHERE okr_id = ? AND squad_id = ? AND kr_id = ? AND granularity = 'raw' LIMIT 1",
+            (okr_id, squad_id, kr_id),
+        ).fetchone()
+    return row is not None
+
+
+def read_history(
+    path: str | Path,
+    okr_id: str,
+    kr_id: str,
+    granularity: str = "M",
+    window: int | None = None,
+    agg: str = "last",
+    start: date | None = None,
+    end: date | None = None,
+    squad_id: str = "",
+) -> tuple[list[date], list[float], int]:
+    """Últimos ``window`` períodos (opcionalmente dentro de ``start``..``end``) e a versão lida junto."""
+    column = agg if agg in AGGREGATES else "last"
+    if window is None:
+        window = GRANULARITIES[granularity].window
+    sql = (
+        f"SELECT period, {column} FROM kr_history "
+        "WHERE okr_id = ? AND squad_id = ? AND kr_id = ? AND granularity = ?"
+    )
+    params: list = [okr_id, squad_id, kr_id, granularity]
+    if start is not None:
+        sql += " AND period >= ?"
+        params.append(start.isoformat())
+    if end is not None:
+        sql += " AND period <= ?"
+        params.append(end.isoformat())
+    sql += " ORDER BY period DESC LIMIT ?"
+    params.append(window)
+    with get_pool(path).snapshot() as conn:
+        rows = conn.execute(sql, params).fetchall()
+        version = _version(conn)
+    rows.reverse()
+    return [date.fromisoformat(p) for p, _ in rows], [v for _, v in rows], version
+
+
+def import_history_store(path: str | Path, root: Path | None = None) -> int:
+    """Copia as séries brutas do histórico em Arrow (``data/history``) para o banco."""
+    import pyarrow as pa
+
+    root = root or history_dir()
+    count = 0
+    for raw_file in sorted([*root.glob("*/*.arrow"), *root.glob("*/*/*.arrow")]):
+        if raw_file.name.count(".") > 1:  # roll-ups (<kr>.M.arrow): recalculados
+            continue
+        okr_id, *squad = raw_file.relative_to(root).parent.parts
+        table = pa.ipc.open_file(pa.memory_map(str(raw_file), "r")).read_all()
+        dates, values = table.column("date").to_pylist(), table.column("value").to_pylist()
+        write_history(path, okr_id, raw_file.stem, dates, values, squad_id=squad[0] if squad else "")
+        count += 1
+    return count
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Backend SQLite do dashboard.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="importa catálogo e/ou histórico para o banco")
+    imp.add_argument("--db", type=Path, required=True, help="arquivo SQLite (criado se não existir)")
+    imp.add_argument("--okrs", type=Path, help="fonte do catálogo (JSON, CSV ou Parquet)")
+    imp.add_argument("--history", type=Path, help="diretório do histórico em Arrow")
+    args = parser.parse_args(argv)
+
+    create_schema(args.db)
+    if args.okrs:
+        okrs = read_source(args.okrs).okrs
+        write_okrs(args.db, okrs)
+        print(f"{len(okrs)} OKRs importados", file=sys.stderr)
+    if args.history:
+        print(f"{import_history_store(args.db, args.history)} séries importadas", file=sys.stderr)
+    print(f"{args.db} versão {data_version(args.db)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
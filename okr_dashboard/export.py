@@ -0,0 +1,275 @@
+"""Export estático do dashboard (um HTML autocontido por dataset).
+
+Reaproveita os mesmos templates do app (cabeçalho, resumo e cards), a mesma
+tabela de status e as mesmas specs Vega-Lite do diálogo, sem Streamlit
+rodando. Cada arquivo de dados vira ``<saída>/<nome>.html`` com o CSS, as
+fontes e o logo embutidos e um gráfico por KR. Os datasets são processados
+em paralelo num ``ProcessPoolExecutor`` e o relatório de tempos vai para
+``--report`` (JSON) e para o stderr::
+
+    python -m okr_dashboard.export data/unidades/ --out snapshots/ --report export.json
+
+Os scripts do Vega são embutidos a partir de ``static/vendor/`` (ver
+``python -m okr_dashboard.assets fetch``); sem eles o HTML referencia o CDN
+do jsDelivr. Para PDF, imprima o HTML pelo navegador (``@media print``
+mantém um card por bloco).
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from html import escape
+from pathlib import Path
+
+from okr_dashboard.assets import LOGOS, STATIC_DIR, STYLESHEET, VEGA_SCRIPTS, logo_file
+from okr_dashboard.charts import CHART_POINT_BUDGET, build_chart_spec
+from okr_dashboard.data import SUPPORTED_FORMATS, read_dataset
+from okr_dashboard.history import resolve_kr_series
+from okr_dashboard.periods import GRANULARITIES
+from okr_dashboard.projection import build_projection
+from okr_dashboard.simulation import build_chances
+from okr_dashboard.table import build_kr_table
+from okr_dashboard.templates import card_html, header_html, kr_row_dialog_html, summary_html
+
+# Tema escuro aplicado às specs (no app quem faz isso é o tema do Streamlit).
+_CHART_CONFIG = {
+    "background": "transparent",
+    "axis": {"labelColor": "#9DB2CC", "titleColor": "#9DB2CC", "gridColor": "#232940", "domainColor": "#384060"},
+    "view": {"stroke": None},
+    "line": {"color": "#54CA30"},
+    "point": {"color": "#54CA30"},
+}
+
+_EXPORT_CSS = """
+body { margin: 0; }
+.stApp { min-height: 100vh; padding: 32px 48px; box-sizing: border-box; }
+.grid { display: grid; grid-template-columns: repeat(3, minmax(0, 1fr)); gap: 18px; margin-top: 18px; }
+.detail { margin-top: 36px; }
+.detail h2 { font-family: 'Montserrat', system-ui, sans-serif; font-size: 1rem; letter-spacing: 1.3px; margin: 28px 0 8px; }
+.kr-chart { background: #141822; border: 1px solid #232940; border-radius: 12px; padding: 12px; margin: 6px 0 16px; }
+.chart { width: 100%; }
+@media print {
+    .okr-card, .kr-chart { break-inside: avoid; }
+    .okr-card:hover { transform: none; }
+}
+"""
+
+_PAGE = """<!doctype html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+{css}
+{export_css}
+</style>
+{scripts}
+</head>
+<body>
+<div class="stApp">
+{header}
+{summary}
+<div class="grid">{cards}</div>
+<div class="detail">{detail}</div>
+<div class="ftr">Snapshot gerado em {generated} a partir de {source}</div>
+</div>
+<script>
+const specs = {specs};
+for (const [id, spec] of Object.entries(specs)) {{
+    vegaEmbed("#" + id, spec, {{actions: false, renderer: "svg"}});
+}}
+</script>
+</body>
+</html>
+""".format
+
+
+# ─── Assets embutidos ────────────────────────────────────────────────
+def _data_uri(path: Path, mime: str) -> str | None:
+    if not path.exists():
+        return None
+    return f"data:{mime};base64,{base64.b64encode(path.read_bytes()).decode('ascii')}"
+
+
+def _inline_css() -> str:
+    css = (STATIC_DIR / STYLESHEET).read_text(encoding="utf-8")
+    for font in sorted((STATIC_DIR / "fonts").glob("*.woff2")):
+        css = css.replace(f"url('fonts/{font.name}')", f"url('{_data_uri(font, 'font/woff2')}')")
+    return css
+
+
+def _scripts() -> str:
+    tags = []
+    for name, url in VEGA_SCRIPTS.items():
+        path = STATIC_DIR / "vendor" / name
+        if path.exists():
+            tags.append(f"<script>{path.read_text(encoding='utf-8')}</script>")
+        else:
+            tags.append(f'<script src="{url}"></script>')
+    return "\n".join(tags)
+
+
+# ─── Render ──────────────────────────────────────────────────────────
+def render_dataset(path: Path, assets: dict[str, str | None]) -> tuple[str, dict]:
+    """HTML do dataset e contagens/tempos de cada etapa."""
+    timings: dict[str, float] = {}
+
+    start = time.perf_counter()
+    dataset = read_dataset(path)
+    okrs = dataset.okrs
+    table = build_kr_table(okrs)
+    chances = build_chances(okrs, table, build_projection(okrs, table))
+    timings["load_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cards = []
+    for i, okr in enumerate(okrs):
+        html = card_html(okr, table.okr_status[i], table.colors_for(i), projections=chances.texts_for(table, i))
+        cards.append(f"<div>{html}</div>")
+    timings["cards_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    specs: dict[str, dict] = {}
+    detail = []
+    for i, okr in enumerate(okrs):
+        colors = table.colors_for(i)
+        texts = chances.texts_for(table, i)
+        detail.append(f'<h2 style="color:{okr["accent"]}">{escape(okr["title"])}</h2>')
+        for kr_idx, kr in enumerate(okr["krs"]):
+            detail.append(kr_row_dialog_html(kr, colors[kr_idx], projection=texts[kr_idx]))
+            series = resolve_kr_series(okr, kr, kr_idx)
+            if not series.values:
+                continue
+            x_title = GRANULARITIES["M"].x_title if series.source == "history" else "Mês"
+            spec = build_chart_spec(series.labels, series.values, kr["axis"], CHART_POINT_BUDGET, x_title)
+            spec.update(width="container", height=220, config={**spec.get("config", {}), **_CHART_CONFIG})
+            chart_id = f"chart-{len(specs)}"
+            specs[chart_id] = spec
+            detail.append(f'<div class="kr-chart"><div class="chart" id="{chart_id}"></div></div>')
+    timings["charts_s"] = time.perf_counter() - start
+
+    html = _PAGE(
+        title=f"OKRs — {escape(path.stem)}",
+        css=assets["css"],
+        export_css=_EXPORT_CSS,
+        scripts=assets["scripts"],
+        header=header_html(assets["logo"]),
+        summary=summary_html(table.summary),
+        cards="".join(cards),
+        detail="".join(detail),
+        generated=datetime.now().strftime("%d/%m/%Y %H:%M"),
+        source=escape(path.name),
+        # "</" dentro de <script> encerraria o bloco.
+        specs=json.dumps(specs, ensure_ascii=False).replace("</", "<\\/"),
+    )
+    stats = {"okrs": len(okrs), "krs": int(table.pct.size), "charts": len(specs), **timings}
+    return html, stats
+
+
+def _load_assets() -> dict[str, str | None]:
+    logo = logo_file()
+    return {
+        "css": _inline_css(),
+        "scripts": _scripts(),
+        "logo": _data_uri(STATIC_DIR / logo, LOGOS[logo]) if logo else None,
+    }
+
+
+_assets: dict[str, str | None] | None = None
+
+
+def export_one(path: str, out_dir: str) -> dict:
+    """Exporta um dataset (roda no processo do pool)."""
+    global _assets
+    start = time.perf_counter()
+    if _assets is None:
+        _assets = _load_assets()
+    src = Path(path)
+    html, stats = render_dataset(src, _assets)
+
+    write_start = time.perf_counter()
+    target = Path(out_dir) / f"{src.stem}.html"
+    target.write_text(html, encoding="utf-8")
+    stats["write_s"] = time.perf_counter() - write_start
+    stats["total_s"] = time.perf_counter() - start
+    return {"dataset": str(src), "output": str(target), "bytes": len(html.encode("utf-8")), "pid": os.getpid(), **stats}
+
+
+def collect_datasets(inputs: list[Path]) -> list[Path]:
+    paths = []
+    for item in inputs:
+        if item.is_dir():
+            paths += sorted(p for p in item.iterdir() if p.suffix.lower() in SUPPORTED_FORMATS)
+        else:
+            paths.append(item)
+    return paths
+
+
+def export_all(paths: list[Path], out_dir: Path, workers: int | None = None) -> dict:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    results, errors = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(export_one, str(p), str(out_dir)): p for p in paths}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:  # um dataset inválido não derruba o lote
+                errors.append({"dataset": str(futures[future]), "error": f"{type(exc).__name__}: {exc}"})
+    wall = time.perf_counter() - started
+
+    totals = [r["total_s"] for r in results]
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "workers": workers or os.cpu_count(),
+            "datasets": len(paths),
+            "exported": len(results),
+            "failed": len(errors),
+        },
+        "wall_s": wall,
+        "per_dataset_s": {
+            "median": statistics.median(totals) if totals else None,
+            "max": max(totals) if totals else None,
+            "sum": sum(totals),
+        },
+        "results": sorted(results, key=lambda r: r["dataset"]),
+        "errors": errors,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", type=Path, nargs="+", help="arquivos de dados ou diretórios com eles")
+    parser.add_argument("--out", type=Path, default=Path("snapshots"), help="diretório dos HTMLs (padrão: snapshots/)")
+    parser.add_argument("--workers", type=int, help="processos no pool (padrão: número de CPUs)")
+    parser.add_argument("--report", type=Path, help="arquivo JSON do relatório de tempos")
+    args = parser.parse_args(argv)
+
+    paths = collect_datasets(args.inputs)
+    if not paths:
+        parser.error("nenhum arquivo de dados encontrado")
+    report = export_all(paths, args.out, args.workers)
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    per = report["per_dataset_s"]
+    print(
+        f"{report['meta']['exported']}/{len(paths)} datasets em {report['wall_s']:.2f}s "
+        f"({report['meta']['workers']} processos; mediana {per['median'] or 0:.3f}s por dataset)",
+        file=sys.stderr,
+    )
+    for error in report["errors"]:
+        print(f"ERRO {error['dataset']}: {error['error']}", file=sys.stderr)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Posicionamento dos cards em grade e paginação.
+
+A grade é montada a partir da lista de OKRs: linhas de ``GRID_COLUMNS``
+cards e a última linha, se incompleta, centralizada (com 5 OKRs e 3 colunas
+o resultado é o layout original, 3 + 2 centralizados). Só a página atual é
+renderizada, então o custo de um rerun não cresce com o total de OKRs.
+
+Configuração (variáveis de ambiente):
+
+- ``OKRS_GRID_COLUMNS``: cards por linha (3);
+- ``OKRS_GRID_PAGE_SIZE``: cards por página (6);
+- ``OKRS_CARD_KR_ROWS``: linhas de KR exibidas no card (8); as demais
+  ficam no diálogo "Veja mais".
+"""
+from __future__ import annotations
+
+import os
+from typing import NamedTuple
+
+GRID_COLUMNS = int(os.environ.get("OKRS_GRID_COLUMNS", "3"))
+PAGE_SIZE = int(os.environ.get("OKRS_GRID_PAGE_SIZE", "6"))
+CARD_KR_ROWS = int(os.environ.get("OKRS_CARD_KR_ROWS", "8"))
+
+
+class Page(NamedTuple):
+    number: int  # 0-based, já limitado ao intervalo válido
+    count: int
+    start: int
+    stop: int
+
+
+def paginate(total: int, page: int, page_size: int = PAGE_SIZE) -> Page:
+    count = max(1, -(-total // page_size))
+    number = min(max(page, 0), count - 1)
+    start = number * page_size
+    return Page(number, count, start, min(start + page_size, total))
+
+
+def grid_rows(start: int, stop: int, columns: int = GRID_COLUMNS) -> list[tuple[list[float], list[int | None]]]:
+    """Linhas da grade para os OKRs ``start:stop``.
+
+    Cada linha é ``(pesos, índices)`` pronta para ``st.columns(pesos)``;
+    ``None`` marca as colunas de margem da última linha centralizada.
+    """
+    rows = []
+    for row_start in range(start, stop, columns):
+        indices: list[int | None] = list(range(row_start, min(row_start + columns, stop)))
+        weights = [1.0] * len(indices)
+        missing = columns - len(indices)
+        if missing:
+            weights = [missing / 2, *weights, missing / 2]
+            indices = [None, *indices, None]
+        rows.append((weights, indices))
+    return rows
@@ -0,0 +1,234 @@
+"""Histórico longo dos KRs em arquivos Arrow mapeados em memória.
+
+Cada KR tem um arquivo com as medições brutas (diárias ou semanais) e um
+arquivo por roll-up pré-calculado (mês, trimestre e ano)::
+
+    data/history/<okr_id>/<kr_id>.arrow      date, value
+    data/history/<okr_id>/<kr_id>.M.arrow    period, last, mean, sum, min, max, count
+    data/history/<okr_id>/<kr_id>.Q.arrow
+    data/history/<okr_id>/<kr_id>.Y.arrow
+
+KRs de squad ficam um nível abaixo (``<okr_id>/<squad_id>/<kr_id>.arrow``),
+então não colidem com um KR da empresa de mesmo id; as funções recebem
+``squad_id`` (vazio para KRs da empresa).
+
+Os roll-ups são calculados na escrita (``write_history``). A leitura abre o
+arquivo com ``pyarrow.memory_map`` e converte só a janela pedida, então o
+histórico completo nunca é carregado em memória; as tabelas abertas ficam
+num LRU limitado a ``OKRS_HISTORY_CACHE_MB`` (256) de arquivos mapeados.
+``pyarrow`` só é importado
+quando um arquivo é lido ou escrito. O agregado usado no gráfico
+vem de ``kr["history_agg"]`` (padrão ``"last"``).
+
+Sem histórico nem ``chart`` próprio, o KR acompanhado pelo ``chart`` do OKR
+(``headline_kr``) usa essa série.
+
+Com um banco SQLite configurado (``okr_dashboard.db.database_path``) as
+mesmas funções leem a tabela ``kr_history`` em vez dos arquivos.
+"""
+from __future__ import annotations
+
+import math
+import os
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from okr_dashboard.cache import SizedLRUCache
+from okr_dashboard.periods import GRANULARITIES, month_labels, period_label
+from okr_dashboard.values import parse_value
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+DEFAULT_HISTORY_DIR = Path(__file__).resolve().parent.parent / "data" / "history"
+ROLLUPS = {"M": "MS", "Q": "QS", "Y": "YS"}
+AGGREGATES = ("last", "mean", "sum", "min", "max", "count")
+HISTORY_CACHE_BYTES = int(float(os.environ.get("OKRS_HISTORY_CACHE_MB", "256")) * 2**20)
+
+_tables: SizedLRUCache[pa.Table] = SizedLRUCache(
+    maxsize=512, max_bytes=HISTORY_CACHE_BYTES, sizeof=lambda table: table.nbytes, name="history_tables"
+)
+
+
+class KRSeries(NamedTuple):
+    values: list[float]
+    source: str  # "history", "kr", "okr" ou "none"
+    labels: list[str]
+    version: str = ""
+
+
+def history_dir() -> Path:
+    """Diretório do histórico (``OKRS_HISTORY_DIR`` ou ``data/history``)."""
+    return Path(os.environ.get("OKRS_HISTORY_DIR", DEFAULT_HISTORY_DIR))
+
+
+def history_path(
+    okr_id: str, kr_id: str, granularity: str = "raw", root: Path | None = None, squad_id: str = ""
+) -> Path:
+    suffix = ".arrow" if granularity == "raw" else f".{granularity}.arrow"
+    folder = (root or history_dir()) / okr_id
+    return (folder / squad_id if squad_id else folder) / f"{kr_id}{suffix}"
+
+
+# ─── Escrita ─────────────────────────────────────────────────────────
+def _write_arrow(table: pa.Table, path: Path) -> None:
+    import pyarrow as pa
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def compute_rollups(dates, values):
+    """Série bruta ordenada e roll-ups por granularidade (DataFrames pandas).
+
+    ``dates``/``values`` podem vir em qualquer ordem; datas repetidas ficam
+    com o último valor.
+    """
+    import pandas as pd
+
+    df = (
+        pd.DataFrame({"date": pd.to_datetime(dates), "value": pd.to_numeric(values, errors="coerce")})
+        .dropna()
+        .drop_duplicates("date", keep="last")
+        .sort_values("date")
+    )
+    series = df.set_index("date")["value"]
+    rollups = {}
+    for granularity, freq in ROLLUPS.items():
+        rolled = series.resample(freq).agg(list(AGGREGATES))
+        rollups[granularity] = rolled[rolled["count"] > 0]
+    return df, rollups
+
+
+def write_history(okr_id: str, kr_id: str, dates, values, root: Path | None = None, squad_id: str = "") -> None:
+    """Grava a série bruta de um KR e recalcula os roll-ups."""
+    import pyarrow as pa
+
+    df, rollups = compute_rollups(dates, values)
+    raw = pa.table(
+        {
+            "date": pa.array(df["date"].dt.date, type=pa.date32()),
+            "value": pa.array(df["value"], type=pa.float64()),
+        }
+    )
+    _write_arrow(raw, history_path(okr_id, kr_id, "raw", root, squad_id))
+
+    for granularity, rolled in rollups.items():
+        table = pa.table(
+            {
+                "period": pa.array(rolled.index.date, type=pa.date32()),
+                **{agg: pa.array(rolled[agg], type=pa.float64()) for agg in AGGREGATES},
+            }
+        )
+        _write_arrow(table, history_path(okr_id, kr_id, granularity, root, squad_id))
+
+
+# ─── Leitura ─────────────────────────────────────────────────────────
+def _open(path: Path) -> tuple[pa.Table, int] | None:
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    def load() -> pa.Table:
+        import pyarrow as pa
+
+        return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+    return _tables.get_or_set((str(path), mtime_ns), load), mtime_ns
+
+
+def _database() -> Path | None:
+    from okr_dashboard import db  # db importa este módulo
+
+    return db.database_path()
+
+
+def has_history(okr_id: str, kr_id: str, squad_id: str = "") -> bool:
+    database = _database()
+    if database is not None:
+        from okr_dashboard import db
+
+        return db.has_history(database, okr_id, kr_id, squad_id)
+    return history_path(okr_id, kr_id, squad_id=squad_id).exists()
+
+
+def read_history(
+    okr_id: str,
+    kr_id: str,
+    granularity: str = "M",
+    window: int | None = None,
+    agg: str = "last",
+    squad_id: str = "",
+) -> KRSeries | None:
+    """Últimos ``window`` períodos do KR na granularidade pedida, ou None."""
+    if window is None:
+        window = GRANULARITIES[granularity].window
+    database = _database()
+    if database is not None:
+        from okr_dashboard import db
+
+        starts, values, version = db.read_history(database, okr_id, kr_id, granularity, window, agg, squad_id=squad_id)
+        if not starts:
+            return None
+        labels = [period_label(d, granularity) for d in starts]
+        return KRSeries(values, "history", labels, f"db:{granularity}:{window}:{agg}:{version}")
+
+    opened = _open(history_path(okr_id, kr_id, granularity, squad_id=squad_id))
+    if opened is None:
+        return None
+    table, mtime_ns = opened
+    tail = table.slice(max(0, table.num_rows - window))
+    if granularity == "raw":
+        starts: list[date] = tail.column("date").to_pylist()
+        values = tail.column("value").to_pylist()
+    else:
+        starts = tail.column("period").to_pylist()
+        values = tail.column(agg if agg in AGGREGATES else "last").to_pylist()
+    labels = [period_label(d, granularity) for d in starts]
+    return KRSeries(values, "history", labels, f"{granularity}:{window}:{agg}:{mtime_ns}")
+
+
+def headline_kr(okr: dict) -> int | None:
+    """Índice do KR que o ``chart`` do OKR acompanha, ou None.
+
+    É o primeiro KR cujo ``val`` é o último ponto da série, a menos de um
+    fator de mil (``R$ 12.4M`` x ``12.4``, ``R$ 285K`` x ``285``).
+    """
+    chart = okr.get("chart")
+    if not isinstance(chart, list) or not chart:
+        return None
+    last = float(chart[-1])
+    for kr_idx, kr in enumerate(okr["krs"]):
+        value = kr.get("values", {}).get("val") or parse_value(kr.get("val"))
+        if value.magnitude is not None and any(math.isclose(value.magnitude, last * 1000**k) for k in range(4)):
+            return kr_idx
+    return None
+
+
+def resolve_kr_series(
+    okr: dict, kr: dict, kr_idx: int, granularity: str = "M", window: int | None = None, squad_id: str = ""
+) -> KRSeries:
+    """Resolve the chart series for a KR.
+
+    Uses the history store roll-up at ``granularity`` (last ``window``
+    periods) when the KR has one, and falls back to the series already
+    present in the KR payload, then to the OKR ``chart`` when this is the
+    KR it tracks (``headline_kr``). ``squad_id`` selects a squad KR's history.
+    """
+    history = read_history(okr["id"], kr["id"], granularity, window, kr.get("history_agg", "last"), squad_id)
+    if history is not None and history.values:
+        return history
+
+    kr_series = kr.get("chart")
+    if isinstance(kr_series, list) and len(kr_series) > 0:
+        return KRSeries(kr_series, "kr", month_labels(len(kr_series)))
+
+    if not squad_id and headline_kr(okr) == kr_idx:
+        return KRSeries(okr["chart"], "okr", month_labels(len(okr["chart"])))
+
+    return KRSeries([], "none", [])
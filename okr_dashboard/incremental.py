@@ -0,0 +1,220 @@
+"""O que mudou entre duas versões do dataset.
+
+``DashboardGraph`` descreve as saídas do dashboard de uma versão (cards,
+status de cada OKR, resumo e roll-ups dos squads) e as dependências entre
+elas e os KRs::
+
+    kr:<okr>/<kr>            → status:<okr>, card:<okr>, summary
+    status:<okr>             → card:<okr>, summary
+    kr:<okr>/<squad>/<kr>    → rollup:<okr>/<squad>
+    rollup:<okr>/<squad>     → rollup:<okr>
+
+Nada é recalculado aqui: os valores dos nós são lidos das estruturas que o
+app já calcula uma vez por versão (``KRTable`` para status, cores e resumo,
+``SquadTree`` para os roll-ups e ``Chances.texts`` para os textos de
+projeção). O HTML dos cards continua sendo renderizado sob demanda, só
+para a página exibida.
+
+``graph.diff(previous)`` parte dos KRs cujo conteúdo exibido mudou, percorre
+os dependentes em ordem topológica e para nos nós cujo valor é igual ao da
+versão anterior. O retorno lista as saídas invalidadas (``card:...``,
+``status:...``, ``summary``, ``rollup:...``).
+
+Os grafos são imutáveis e há um por versão (``dashboard_graph``, cacheado
+como as demais estruturas). ``LiveGraph`` guarda, por fonte, o que foi
+invalidado entre versões consecutivas, e ``changed_since`` diz a uma sessão
+o que mudou desde a versão que ela está exibindo.
+"""
+from __future__ import annotations
+
+import heapq
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import streamlit as st
+
+from okr_dashboard.data import OKRDataset
+from okr_dashboard.simulation import kr_chances
+from okr_dashboard.squads import SquadTree, squad_tree
+from okr_dashboard.table import KRTable, kr_table
+
+# Campos do KR que o dashboard exibe; mudar outro campo não invalida nada.
+KR_FIELDS = ("name", "val", "ant", "meta", "pct")
+# Versões lembradas por ``LiveGraph`` para ``changed_since``.
+HISTORY_VERSIONS = 16
+
+# Ordem topológica por tipo de nó.
+_RANK = {"kr": 0, "status": 1, "rollup": 1, "card": 2, "summary": 3}
+
+
+def _rank(node: str) -> int:
+    kind, _, key = node.partition(":")
+    if kind == "rollup" and "/" not in key:
+        return 2  # roll-up do OKR vem depois dos squads
+    return _RANK[kind]
+
+
+def _dependents(node: str) -> tuple[str, ...]:
+    kind, _, key = node.partition(":")
+    okr_id, _, rest = key.partition("/")
+    if kind == "kr":
+        if "/" in rest:
+            return (f"rollup:{key.rpartition('/')[0]}",)
+        return (f"status:{okr_id}", f"card:{okr_id}", "summary")
+    if kind == "status":
+        return (f"card:{okr_id}", "summary")
+    if kind == "rollup" and rest:
+        return (f"rollup:{okr_id}",)
+    return ()
+
+
+def _shown(kr: dict) -> tuple:
+    return tuple(kr.get(f) for f in KR_FIELDS)
+
+
+@dataclass
+class Update:
+    invalidated: set[str] = field(default_factory=set)
+    recomputed: int = 0
+
+    @property
+    def cards(self) -> list[str]:
+        """IDs dos OKRs cujo card precisa ser re-renderizado."""
+        return sorted(node.split(":", 1)[1] for node in self.invalidated if node.startswith("card:"))
+
+
+class DashboardGraph:
+    """Saídas do dashboard de uma versão do dataset (imutável)."""
+
+    def __init__(self, dataset: OKRDataset, table: KRTable, squads: SquadTree, projections: tuple[str, ...]) -> None:
+        self.version = dataset.version
+        self.okrs = dataset.okrs
+        self.table = table
+        self.squads = squads
+        self.projections = projections
+        self._index = {okr_id: i for i, okr_id in enumerate(table.okr_ids)}
+
+    def texts_for(self, okr_idx: int) -> tuple[str, ...]:
+        return self.projections[self.table.kr_slice(okr_idx)] if self.projections else ()
+
+    def value(self, node: str):
+        """Valor exibido do nó, para comparar com outra versão."""
+        kind, _, key = node.partition(":")
+        if kind == "kr":
+            okr_id, _, kr_id = key.partition("/")
+            if "/" in kr_id:
+                return self.squads.node(key)
+            return next(_shown(kr) for kr in self.okrs[self._index[okr_id]]["krs"] if kr["id"] == kr_id)
+        if kind == "status":
+            return self.table.okr_status[self._index[key]]
+        if kind == "card":
+            i = self._index[key]
+            return self.okrs[i]["hash"], self.table.okr_status[i], self.table.colors_for(i), self.texts_for(i)
+        if kind == "rollup":
+            return self.squads.node(key)
+        return self.table.summary
+
+    def same_shape(self, other: DashboardGraph) -> bool:
+        """Mesmos OKRs, KRs e squads, na mesma ordem."""
+        return (
+            self.table.okr_ids == other.table.okr_ids
+            and self.table.kr_ids == other.table.kr_ids
+            and np.array_equal(self.table.offsets, other.table.offsets)
+            and list(self.squads.nodes) == list(other.squads.nodes)
+        )
+
+    def diff(self, previous: DashboardGraph) -> Update | None:
+        """Saídas que mudaram desde ``previous``; None se a estrutura mudou."""
+        if not self.same_shape(previous):
+            return None
+        seeds = []
+        for i, okr in enumerate(self.okrs):
+            old = previous.okrs[i]
+            if okr["hash"] == old["hash"]:
+                continue
+            # Título, subtítulo ou cor do OKR também entram no card e no roll-up.
+            seeds.append(f"card:{okr['id']}")
+            if okr.get("squads"):
+                seeds.append(f"rollup:{okr['id']}")
+            seeds += [f"kr:{okr['id']}/{kr['id']}" for kr, o in zip(okr["krs"], old["krs"]) if _shown(kr) != _shown(o)]
+        if self.projections != previous.projections:
+            seeds += [
+                f"card:{okr_id}"
+                for i, okr_id in enumerate(self.table.okr_ids)
+                if self.texts_for(i) != previous.texts_for(i)
+            ]
+        for key, node in self.squads.nodes.items():
+            old = previous.squads.nodes[key]
+            if node.level == "kr" and node != old:
+                seeds.append(f"kr:{key}")
+            elif node.level == "squad" and (node.name, node.weight) != (old.name, old.weight):
+                seeds.append(f"rollup:{key}")
+        return self._propagate(seeds, previous)
+
+    def _propagate(self, seeds: list[str], previous: DashboardGraph) -> Update:
+        update = Update()
+        heap = [(_rank(n), n) for n in dict.fromkeys(seeds)]
+        heapq.heapify(heap)
+        seen = {n for _, n in heap}
+        while heap:
+            _, node = heapq.heappop(heap)
+            update.recomputed += 1
+            if self.value(node) == previous.value(node):
+                continue
+            update.invalidated.add(node)
+            for dep in _dependents(node):
+                if dep not in seen:
+                    seen.add(dep)
+                    heapq.heappush(heap, (_rank(dep), dep))
+        return update
+
+
+# ─── Histórico por fonte ─────────────────────────────────────────────
+class LiveGraph:
+    """Invalidações entre as versões consecutivas de uma fonte de dados."""
+
+    def __init__(self) -> None:
+        self.latest: DashboardGraph | None = None
+        # (versão, nós invalidados para chegar nela; None quando a estrutura mudou)
+        self._history: list[tuple[str, set[str] | None]] = []
+        self._lock = threading.Lock()
+
+    def advance(self, graph: DashboardGraph) -> None:
+        """Registra o que mudou da última versão vista até ``graph.version``."""
+        with self._lock:
+            if any(v == graph.version for v, _ in self._history):
+                return  # versão atual ou uma já superada: não volta atrás
+            update = graph.diff(self.latest) if self.latest else None
+            self.latest = graph
+            invalidated = None if update is None else update.invalidated
+            self._history = [*self._history, (graph.version, invalidated)][-HISTORY_VERSIONS:]
+
+    def changed_since(self, version: str) -> set[str] | None:
+        """Nós invalidados desde ``version``; None se não dá para saber (estrutura mudou)."""
+        versions = [v for v, _ in self._history]
+        if version not in versions:
+            return None
+        changed: set[str] = set()
+        for _, invalidated in self._history[versions.index(version) + 1 :]:
+            if invalidated is None:
+                return None
+            changed |= invalidated
+        return changed
+
+
+@st.cache_resource(show_spinner=False)
+def live_graph(path: str) -> LiveGraph:
+    return LiveGraph()
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _graph_cached(version: str, _dataset: OKRDataset) -> DashboardGraph:
+    graph = DashboardGraph(_dataset, kr_table(_dataset), squad_tree(_dataset), kr_chances(_dataset).texts)
+    live_graph(_dataset.path).advance(graph)
+    return graph
+
+
+def dashboard_graph(dataset: OKRDataset) -> DashboardGraph:
+    """Grafo da versão de ``dataset``, já registrado no histórico da fonte."""
+    return _graph_cached(dataset.version, dataset)
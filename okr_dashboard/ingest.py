@@ -0,0 +1,344 @@
+"""Ingestão de eventos brutos (CSV/Parquet) em valores mensais de KR.
+
+Valores como "Taxa de chargeback" ou "% atendimentos no SLA" saem de
+milhões de linhas de transações/tickets. Um arquivo de especificação (JSON)
+diz, para cada KR, de qual arquivo vêm os eventos, qual coluna é a data e
+como agregar::
+
+    {
+      "krs": [
+        {"okr": "clientes", "kr": "taxa-de-chargeback", "source": "transacoes.csv",
+         "date": "created_at", "agg": "sum", "value": "amount", "where": {"type": "chargeback"}},
+        {"okr": "clientes", "kr": "atendimentos-no-sla", "source": "tickets.parquet",
+         "date": "opened_at", "agg": "ratio", "scale": 100,
+         "where": {"within_sla": true}, "denominator": {}}
+      ]
+    }
+
+- ``agg``: ``sum``, ``count``, ``mean``, ``min``, ``max`` ou ``ratio``;
+- ``value``: coluna numérica (sem ela, cada linha vale 1: contagem);
+- ``where``: ``{"coluna": valor}`` ou ``{"coluna": [valores]}``; no CSV a
+  comparação é pelo texto (``true`` também aceita ``True``, ``TRUE`` e ``1``);
+- ``ratio``: ``sum(value | where) / sum(denominator.value | denominator.where)``
+  por mês, vezes ``scale`` (1). ``denominator`` aceita ``value`` e ``where``.
+
+Caminhos relativos em ``source`` partem do diretório da especificação, e
+``okr``/``kr`` são os ids do dataset (os slugs de ``okr_dashboard.data``);
+para um KR de squad, ``squad`` é o id do squad.
+
+Cada arquivo é lido uma vez para todos os KRs que usam ele, em blocos de
+``OKRS_INGEST_CHUNK_ROWS`` (500000) linhas e só com as colunas usadas
+(``pandas.read_csv(chunksize=...)`` / ``ParquetFile.iter_batches``). Cada
+bloco vira agregados parciais por mês (soma, contagem, mínimo e máximo),
+que são combinados com os anteriores, então a memória depende do tamanho do
+bloco e da quantidade de meses, não do tamanho do arquivo. No fim a série
+mensal de cada KR substitui a anterior no histórico (``write_history`` do
+Arrow em ``data/history`` ou do SQLite com ``--db``), com os roll-ups::
+
+    python -m okr_dashboard.ingest specs.json --report ingest.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+CHUNK_ROWS = int(os.environ.get("OKRS_INGEST_CHUNK_ROWS", "500000"))
+AGGS = ("sum", "count", "mean", "min", "max", "ratio")
+EVENT_FORMATS = (".csv", ".parquet")
+
+
+@dataclass(frozen=True)
+class Measure:
+    """Lado de uma agregação: coluna somada (ou contagem) e filtro de linhas."""
+
+    value: str | None = None
+    where: tuple[tuple[str, tuple], ...] = ()
+
+    @classmethod
+    def from_spec(cls, spec: dict) -> Measure:
+        where = spec.get("where") or {}
+        if not isinstance(where, dict):
+            raise ValueError(f"'where' deve ser um objeto: {where!r}")
+        return cls(
+            value=spec.get("value"),
+            where=tuple((col, tuple(v) if isinstance(v, list) else (v,)) for col, v in sorted(where.items())),
+        )
+
+    @property
+    def columns(self) -> set[str]:
+        return {col for col, _ in self.where} | ({self.value} if self.value else set())
+
+
+@dataclass(frozen=True)
+class KRSpec:
+    okr_id: str
+    kr_id: str
+    source: Path
+    date: str
+    agg: str
+    measure: Measure
+    denominator: Measure | None = None
+    scale: float = 1.0
+    squad_id: str = ""
+
+    @property
+    def columns(self) -> set[str]:
+        return {self.date} | self.measure.columns | (self.denominator.columns if self.denominator else set())
+
+
+def load_specs(path: Path) -> list[KRSpec]:
+    """Lê a especificação e valida agregados, fontes e colunas obrigatórias."""
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    entries = raw.get("krs", []) if isinstance(raw, dict) else raw
+    specs = []
+    for n, entry in enumerate(entries, 1):
+        missing = [key for key in ("okr", "kr", "source", "date") if not entry.get(key)]
+        if missing:
+            raise ValueError(f"KR #{n}: faltam {', '.join(missing)}")
+        agg = entry.get("agg", "sum")
+        if agg not in AGGS:
+            raise ValueError(f"KR #{n} ({entry['kr']}): agregado {agg!r} desconhecido (use {', '.join(AGGS)})")
+        if agg == "ratio" and "denominator" not in entry:
+            raise ValueError(f"KR #{n} ({entry['kr']}): 'ratio' precisa de 'denominator'")
+        if agg in ("mean", "min", "max") and not entry.get("value"):
+            raise ValueError(f"KR #{n} ({entry['kr']}): {agg!r} precisa de 'value'")
+        source = Path(entry["source"])
+        if not source.is_absolute():
+            source = path.parent / source
+        if not any(source.name.lower().endswith(fmt) or f"{fmt}." in source.name.lower() for fmt in EVENT_FORMATS):
+            raise ValueError(f"KR #{n} ({entry['kr']}): formato não suportado: {source.name}")
+        specs.append(
+            KRSpec(
+                okr_id=entry["okr"],
+                kr_id=entry["kr"],
+                source=source,
+                date=entry["date"],
+                agg=agg,
+                measure=Measure.from_spec(entry),
+                denominator=Measure.from_spec(entry["denominator"]) if agg == "ratio" else None,
+                scale=float(entry.get("scale", 1)),
+                squad_id=entry.get("squad") or "",
+            )
+        )
+    return specs
+
+
+# ─── Leitura em blocos ───────────────────────────────────────────────
+def iter_chunks(source: Path, columns: list[str], chunk_rows: int = CHUNK_ROWS):
+    """Blocos (DataFrames pandas) com só ``columns``; nunca o arquivo inteiro."""
+    if ".parquet" in source.name.lower():
+        import pyarrow.parquet as pq
+
+        with pq.ParquetFile(source) as parquet:
+            for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+                yield batch.to_pandas()
+        return
+
+    import pandas as pd
+
+    # Texto nas colunas de filtro/data: o tipo inferido mudaria de um bloco para outro.
+    with pd.read_csv(source, usecols=columns, dtype=str, chunksize=chunk_rows) as reader:
+        yield from reader
+
+
+def _months(column) -> np.ndarray:
+    """Meses desde 1970 (``datetime64[M]`` como inteiro); -1 quando a data é inválida."""
+    import pandas as pd
+
+    dates = pd.to_datetime(column, errors="coerce", utc=True, format="ISO8601")
+    months = dates.dt.tz_localize(None).to_numpy().astype("datetime64[M]")
+    return np.where(np.isnat(months), -1, months.astype(np.int64))
+
+
+def _as_text(value) -> tuple[str, ...]:
+    if isinstance(value, bool):
+        return ("true", "True", "TRUE", "1") if value else ("false", "False", "FALSE", "0")
+    return (str(value),)
+
+
+def _mask(chunk, where) -> np.ndarray:
+    from pandas.api.types import is_string_dtype
+
+    mask = np.ones(len(chunk), dtype=bool)
+    for col, wanted in where:
+        column = chunk[col]
+        if is_string_dtype(column):
+            wanted = [text for v in wanted for text in _as_text(v)]
+        mask &= column.isin(wanted).to_numpy()
+    return mask
+
+
+def _values(chunk, measure: Measure, mask: np.ndarray) -> np.ndarray:
+    if measure.value is None:
+        return np.ones(int(mask.sum()))
+    import pandas as pd
+
+    return pd.to_numeric(chunk[measure.value][mask], errors="coerce").to_numpy(dtype=np.float64)
+
+
+@dataclass
+class Partial:
+    """Agregados parciais por mês de um lado (numerador ou denominador)."""
+
+    sum: dict[int, float] = field(default_factory=lambda: defaultdict(float))
+    count: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    min: dict[int, float] = field(default_factory=dict)
+    max: dict[int, float] = field(default_factory=dict)
+
+    def add(self, months: np.ndarray, values: np.ndarray) -> None:
+        keep = (months >= 0) & ~np.isnan(values)
+        months, values = months[keep], values[keep]
+        if not months.size:
+            return
+        keys, inverse = np.unique(months, return_inverse=True)
+        sums = np.bincount(inverse, weights=values, minlength=keys.size)
+        counts = np.bincount(inverse, minlength=keys.size)
+        lows = np.full(keys.size, np.inf)
+        highs = np.full(keys.size, -np.inf)
+        np.minimum.at(lows, inverse, values)
+        np.maximum.at(highs, inverse, values)
+        for key, s, c, lo, hi in zip(keys.tolist(), sums.tolist(), counts.tolist(), lows.tolist(), highs.tolist()):
+            self.sum[key] += s
+            self.count[key] += c
+            self.min[key] = min(self.min.get(key, lo), lo)
+            self.max[key] = max(self.max.get(key, hi), hi)
+
+
+@dataclass
+class Accumulator:
+    spec: KRSpec
+    numerator: Partial = field(default_factory=Partial)
+    denominator: Partial = field(default_factory=Partial)
+
+    def add(self, chunk, months: np.ndarray) -> None:
+        mask = _mask(chunk, self.spec.measure.where)
+        self.numerator.add(months[mask], _values(chunk, self.spec.measure, mask))
+        if self.spec.denominator is not None:
+            mask = _mask(chunk, self.spec.denominator.where)
+            self.denominator.add(months[mask], _values(chunk, self.spec.denominator, mask))
+
+    def series(self) -> tuple[np.ndarray, np.ndarray]:
+        """Datas (início do mês) e valores mensais, em ordem."""
+        agg, num = self.spec.agg, self.numerator
+        if agg == "ratio":
+            keys = sorted(k for k, v in self.denominator.sum.items() if v)
+            values = [num.sum.get(k, 0.0) / self.denominator.sum[k] for k in keys]
+        else:
+            keys = sorted(num.count)
+            pick = {
+                "sum": lambda k: num.sum[k],
+                "count": lambda k: num.count[k],
+                "mean": lambda k: num.sum[k] / num.count[k],
+                "min": lambda k: num.min[k],
+                "max": lambda k: num.max[k],
+            }[agg]
+            values = [pick(k) for k in keys]
+        dates = np.array(keys, dtype=np.int64).astype("datetime64[M]").astype("datetime64[D]")
+        return dates, np.asarray(values, dtype=np.float64) * self.spec.scale
+
+
+def ingest_source(source: Path, specs: list[KRSpec], chunk_rows: int = CHUNK_ROWS) -> tuple[list[Accumulator], dict]:
+    """Lê ``source`` uma vez em blocos e acumula todos os KRs que usam o arquivo."""
+    start = time.perf_counter()
+    accumulators = [Accumulator(spec) for spec in specs]
+    columns = sorted(set().union(*(spec.columns for spec in specs)))
+    rows = chunks = invalid_dates = 0
+    for chunk in iter_chunks(source, columns, chunk_rows):
+        month_cache: dict[str, np.ndarray] = {}
+        for acc in accumulators:
+            if acc.spec.date not in month_cache:
+                month_cache[acc.spec.date] = _months(chunk[acc.spec.date])
+            acc.add(chunk, month_cache[acc.spec.date])
+        invalid_dates += int(sum(np.count_nonzero(m < 0) for m in month_cache.values()))
+        rows += len(chunk)
+        chunks += 1
+    seconds = time.perf_counter() - start
+    stats = {
+        "source": str(source),
+        "bytes": source.stat().st_size,
+        "rows": rows,
+        "chunks": chunks,
+        "invalid_dates": invalid_dates,
+        "krs": len(specs),
+        "seconds": seconds,
+        "rows_per_s": rows / seconds if seconds else 0.0,
+    }
+    return accumulators, stats
+
+
+def ingest(
+    specs: list[KRSpec], history_root: Path | None = None, db: Path | None = None, chunk_rows: int = CHUNK_ROWS
+) -> dict:
+    """Processa todas as fontes e grava a série mensal de cada KR no histórico."""
+    from okr_dashboard import history
+
+    by_source: dict[Path, list[KRSpec]] = defaultdict(list)
+    for spec in specs:
+        by_source[spec.source].append(spec)
+
+    sources, written = [], []
+    for source, source_specs in by_source.items():
+        accumulators, stats = ingest_source(source, source_specs, chunk_rows)
+        for acc in accumulators:
+            dates, values = acc.series()
+            spec = acc.spec
+            if db is not None:
+                from okr_dashboard import db as database
+
+                database.write_history(db, spec.okr_id, spec.kr_id, dates, values, squad_id=spec.squad_id)
+            else:
+                history.write_history(spec.okr_id, spec.kr_id, dates, values, history_root, squad_id=spec.squad_id)
+            entry = {"okr": spec.okr_id, "kr": spec.kr_id, "months": int(dates.size)}
+            written.append({**entry, "squad": spec.squad_id} if spec.squad_id else entry)
+        sources.append(stats)
+    return {
+        "sources": sources,
+        "krs": written,
+        "rows": sum(s["rows"] for s in sources),
+        "seconds": sum(s["seconds"] for s in sources),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("spec", type=Path, help="especificação JSON dos KRs")
+    parser.add_argument("--history-dir", type=Path, help="histórico em Arrow (padrão: OKRS_HISTORY_DIR ou data/history)")
+    parser.add_argument("--db", type=Path, help="grava no SQLite em vez dos arquivos Arrow")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help=f"linhas por bloco (padrão {CHUNK_ROWS})")
+    parser.add_argument("--report", type=Path, help="arquivo JSON do relatório")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = load_specs(args.spec)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    if args.db:
+        from okr_dashboard import db
+
+        db.create_schema(args.db)
+    report = ingest(specs, args.history_dir, args.db, args.chunk_rows)
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    for s in report["sources"]:
+        print(
+            f"{Path(s['source']).name}: {s['rows']} linhas em {s['chunks']} blocos, {s['seconds']:.1f}s "
+            f"({s['rows_per_s']:,.0f} linhas/s; {s['invalid_dates']} datas inválidas)",
+            file=sys.stderr,
+        )
+    print(f"{len(report['krs'])} KRs gravados; pico de memória {report['peak_rss_mb']:.0f} MB", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
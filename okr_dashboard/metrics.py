@@ -0,0 +1,221 @@
+"""Timers por seção do rerun, agregados em histogramas no processo.
+
+Desligado por padrão: com ``OKRS_METRICS`` vazio/0, ``timer()`` devolve um
+context manager nulo compartilhado e ``observe()`` retorna na primeira linha.
+
+Configuração (variáveis de ambiente):
+
+- ``OKRS_METRICS=1``: liga a coleta;
+- ``OKRS_METRICS_FILE``: arquivo exportado periodicamente (``.json`` gera
+  JSON; qualquer outra extensão gera o formato texto do Prometheus);
+- ``OKRS_METRICS_EXPORT_SECONDS``: intervalo mínimo entre exports (5s);
+- ``OKRS_METRICS_PORT``: sobe um endpoint HTTP local com ``/metrics``
+  (Prometheus) e ``/metrics.json``.
+
+Os histogramas são do processo, então somam todas as sessões. O JSON inclui
+p50/p95 estimados por interpolação dentro dos buckets. Gauges vêm de
+coletores (``add_collector``) lidos na hora do export, como a memória das
+sessões (``okr_dashboard.sessions``).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from pathlib import Path
+
+METRICS_ENABLED = os.environ.get("OKRS_METRICS", "") not in ("", "0")
+METRICS_FILE = os.environ.get("OKRS_METRICS_FILE", "")
+METRICS_PORT = int(os.environ.get("OKRS_METRICS_PORT", "0") or 0)
+EXPORT_INTERVAL = float(os.environ.get("OKRS_METRICS_EXPORT_SECONDS", "5"))
+
+# Limites superiores dos buckets, em segundos.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)  # último = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+_histograms: dict[str, Histogram] = {}
+_collectors: list = []
+_lock = threading.Lock()
+_last_export = 0.0
+_server = None
+_server_failed = False
+log = logging.getLogger(__name__)
+
+
+def observe(section: str, seconds: float) -> None:
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        histogram = _histograms.get(section)
+        if histogram is None:
+            histogram = _histograms[section] = Histogram()
+        histogram.observe(seconds)
+
+
+def add_collector(collect) -> None:
+    """Registra ``collect() -> {nome: valor}``, lido a cada export como gauges."""
+    if METRICS_ENABLED and collect not in _collectors:
+        _collectors.append(collect)
+
+
+def _gauges() -> dict[str, float]:
+    gauges: dict[str, float] = {}
+    for collect in _collectors:
+        gauges.update(collect())
+    return dict(sorted(gauges.items()))
+
+
+class _Timer:
+    __slots__ = ("section", "start")
+
+    def __init__(self, section: str) -> None:
+        self.section = section
+
+    def __enter__(self) -> _Timer:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        observe(self.section, time.perf_counter() - self.start)
+
+
+def timer(section: str):
+    """``with timer("summary"): ...`` mede o bloco quando as métricas estão ligadas."""
+    return _Timer(section) if METRICS_ENABLED else _NULL_TIMER
+
+
+# ─── Exportação ──────────────────────────────────────────────────────
+def to_prometheus() -> str:
+    lines = [
+        "# HELP okrs_section_seconds Tempo por seção do rerun do dashboard.",
+        "# TYPE okrs_section_seconds histogram",
+    ]
+    with _lock:
+        for section, h in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, n in zip((*BUCKETS, "+Inf"), h.counts):
+                cumulative += n
+                lines.append(f'okrs_section_seconds_bucket{{section="{section}",le="{bound}"}} {cumulative}')
+            lines.append(f'okrs_section_seconds_sum{{section="{section}"}} {h.total:.6f}')
+            lines.append(f'okrs_section_seconds_count{{section="{section}"}} {h.count}')
+    for name, value in _gauges().items():
+        lines.append(f"# TYPE okrs_{name} gauge")
+        lines.append(f"okrs_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def to_json() -> str:
+    with _lock:
+        payload = {
+            section: {
+                "count": h.count,
+                "sum_s": h.total,
+                "p50_s": h.quantile(0.50),
+                "p95_s": h.quantile(0.95),
+                "buckets": dict(zip([str(b) for b in (*BUCKETS, "+Inf")], h.counts)),
+            }
+            for section, h in sorted(_histograms.items())
+        }
+    return json.dumps({"sections": payload, "gauges": _gauges(), "exported_at": time.time()}, indent=2)
+
+
+def export(path: str | Path) -> None:
+    path = Path(path)
+    text = to_json() if path.suffix == ".json" else to_prometheus()
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def maybe_export() -> None:
+    """Exporta para ``OKRS_METRICS_FILE`` no máximo a cada ``EXPORT_INTERVAL``."""
+    global _last_export
+    if not (METRICS_ENABLED and METRICS_FILE):
+        return
+    now = time.monotonic()
+    if now - _last_export < EXPORT_INTERVAL:
+        return
+    _last_export = now
+    export(METRICS_FILE)
+
+
+def _handler():
+    # http.server só é importado quando o endpoint está ligado.
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path == "/metrics":
+                body, content_type = to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return _MetricsHandler
+
+
+def ensure_server() -> None:
+    """Sobe o endpoint em ``127.0.0.1:OKRS_METRICS_PORT`` uma vez por processo.
+
+    Se a porta já estiver em uso (outro processo do Streamlit, por exemplo),
+    registra o erro e deixa o endpoint desligado neste processo.
+    """
+    global _server, _server_failed
+    if not (METRICS_ENABLED and METRICS_PORT) or _server is not None or _server_failed:
+        return
+    with _lock:
+        if _server is not None or _server_failed:
+            return
+        from http.server import ThreadingHTTPServer
+
+        try:
+            _server = ThreadingHTTPServer(("127.0.0.1", METRICS_PORT), _handler())
+        except OSError as exc:
+            _server_failed = True
+            log.warning("Endpoint de métricas desligado: porta %s indisponível (%s)", METRICS_PORT, exc)
+            return
+    threading.Thread(target=_server.serve_forever, name="okrs-metrics", daemon=True).start()
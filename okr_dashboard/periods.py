@@ -0,0 +1,49 @@
+"""Granularidades de período e rótulos do eixo X dos gráficos."""
+from __future__ import annotations
+
+from datetime import date
+from typing import NamedTuple
+
+MONTHS = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+
+
+class Granularity(NamedTuple):
+    label: str
+    window: int  # períodos exibidos por padrão
+    x_title: str
+    adjective: str
+
+
+GRANULARITIES = {
+    "raw": Granularity("Diário", 365, "Data", "diária"),
+    "M": Granularity("Mês", 24, "Mês", "mensal"),
+    "Q": Granularity("Trimestre", 12, "Trimestre", "trimestral"),
+    "Y": Granularity("Ano", 10, "Ano", "anual"),
+}
+
+
+def month_labels(n: int) -> list[str]:
+    """Rótulos do eixo X para uma série mensal sem datas (``Jan``, ``Fev``...).
+
+    Séries com mais de 12 pontos recebem o número do ciclo (``Jan/2``).
+    """
+    if n <= len(MONTHS):
+        return MONTHS[:n]
+    return [f"{MONTHS[i % 12]}/{i // 12 + 1}" for i in range(n)]
+
+
+def label_month(label: str) -> int:
+    """Mês (0-11) de um rótulo mensal de ``month_labels`` ou ``period_label`` (``Mar``, ``Mar/24``)."""
+    return MONTHS.index(label.partition("/")[0])
+
+
+def period_label(start: date, granularity: str) -> str:
+    """Rótulo de um período a partir da data de início (``Mar/24``, ``T2/24``, ``2024``)."""
+    if granularity == "M":
+        return f"{MONTHS[start.month - 1]}/{start.year % 100:02d}"
+    if granularity == "Q":
+        return f"T{(start.month - 1) // 3 + 1}/{start.year % 100:02d}"
+    if granularity == "Y":
+        return str(start.year)
+    return start.isoformat()
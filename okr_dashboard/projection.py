@@ -0,0 +1,220 @@
+"""Projeção de fim de ciclo dos KRs a partir da série mensal de cada um.
+
+As séries de todos os KRs são empilhadas numa matriz (um KR por linha,
+alinhadas à direita: a última coluna é o último ponto observado, NaN à
+esquerda) e dois modelos de tendência são ajustados de uma vez, sem laço
+por KR:
+
+- linear: mínimos quadrados sobre os últimos ``OKRS_CYCLE_PERIODS`` (12)
+  pontos;
+- EWMA: nível e tendência suavizados exponencialmente (Holt), com a
+  recursão andando pelas colunas e vetorizada entre os KRs.
+
+A série vem de ``resolve_kr_series`` (roll-up mensal do histórico, ``chart``
+do KR ou ``chart`` do OKR), como no diálogo. Os meses que faltam até o fim
+do ciclo saem do último rótulo: séries sem datas começam em janeiro (como em
+``month_labels``) e as do histórico trazem o mês de cada ponto. Com o
+ciclo encerrado (nenhum mês faltando) não há o que projetar e os dois
+modelos devolvem o último valor observado, não o valor ajustado. O
+valor projetado é convertido para a escala de ``val`` (a série costuma vir
+em "milhões" enquanto ``val`` é "R$ 12.4M"; sem uma potência de mil
+plausível o KR fica sem projeção) e comparado com ``meta`` com as
+mesmas regras de ``compute_pct``. ``OKRS_PROJECTION_MODEL`` escolhe o
+modelo exibido (``linear`` ou ``ewma``). O resultado é cacheado por versão
+do dataset, como a ``KRTable`` (com o histórico em Arrow, séries regravadas
+entram na próxima versão do dataset).
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import streamlit as st
+
+from okr_dashboard.data import OKRDataset
+from okr_dashboard.history import resolve_kr_series
+from okr_dashboard.periods import label_month
+from okr_dashboard.table import KRTable, kr_table
+from okr_dashboard.values import format_like
+
+CYCLE_PERIODS = int(os.environ.get("OKRS_CYCLE_PERIODS", "12"))
+PROJECTION_MODEL = os.environ.get("OKRS_PROJECTION_MODEL", "linear")
+EWMA_ALPHA = 0.5  # peso do nível
+EWMA_BETA = 0.3  # peso da tendência
+MODELS = ("linear", "ewma")
+SCALE_TOLERANCE = 2.0  # fator máximo entre val e o último ponto já na escala
+
+
+@dataclass(frozen=True)
+class Projection:
+    """Projeções por KR, na ordem da ``KRTable`` (NaN quando não há série)."""
+
+    series: np.ndarray
+    remaining: np.ndarray
+    scale: np.ndarray
+    slope: np.ndarray
+    linear: np.ndarray
+    ewma: np.ndarray
+    projected: np.ndarray
+    projected_pct: np.ndarray
+    texts: tuple[str, ...]
+
+    def texts_for(self, table: KRTable, okr_idx: int) -> tuple[str, ...]:
+        return self.texts[table.kr_slice(okr_idx)]
+
+
+def stack_series(series: list, width: int) -> tuple[np.ndarray, np.ndarray]:
+    """Matriz (KRs x ``width``) com os últimos pontos de cada série, à direita."""
+    lengths = np.fromiter((len(s) for s in series), dtype=np.int64, count=len(series))
+    kept = np.minimum(lengths, width)
+    flat = np.array([x for s, k in zip(series, kept) for x in s[len(s) - k :]], dtype=np.float64)
+    rows = np.repeat(np.arange(len(series)), kept)
+    starts = np.zeros(len(series) + 1, dtype=np.int64)
+    np.cumsum(kept, out=starts[1:])
+    cols = np.arange(flat.size) - np.repeat(starts[:-1], kept) + np.repeat(width - kept, kept)
+    matrix = np.full((len(series), width), np.nan)
+    matrix[rows, cols] = flat
+    return matrix, lengths
+
+
+def kr_series(okrs: list[dict]) -> tuple[list[list[float]], np.ndarray]:
+    """Série mensal de cada KR (na ordem da ``KRTable``) e os meses até o fim do ciclo."""
+    series, remaining = [], []
+    for okr in okrs:
+        for kr_idx, kr in enumerate(okr["krs"]):
+            resolved = resolve_kr_series(okr, kr, kr_idx, "M", CYCLE_PERIODS)
+            series.append(resolved.values)
+            last = label_month(resolved.labels[-1]) if resolved.values else CYCLE_PERIODS - 1
+            remaining.append(CYCLE_PERIODS - 1 - last % CYCLE_PERIODS)
+    return series, np.asarray(remaining, dtype=np.float64)
+
+
+def fit_linear(y: np.ndarray, remaining: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Reta de cada linha de ``y`` (NaN ignorados); devolve inclinação e valor projetado.
+
+    O eixo X tem o último ponto em 0, então o intercepto já é o valor
+    ajustado "hoje" e a projeção é ``intercepto + inclinação * remaining``.
+    """
+    mask = ~np.isnan(y)
+    x = np.arange(y.shape[1], dtype=np.float64) - (y.shape[1] - 1)
+    n = mask.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(mask, x, 0.0).sum(axis=1) / n
+        y_mean = np.where(mask, y, 0.0).sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        dy = np.where(mask, y - y_mean[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        slope = np.where(sxx > 0, (dx * dy).sum(axis=1) / sxx, 0.0)
+    intercept = y_mean - slope * x_mean
+    return np.where(n > 0, slope, np.nan), intercept + slope * remaining
+
+
+def fit_ewma(y: np.ndarray, remaining: np.ndarray, alpha: float = EWMA_ALPHA, beta: float = EWMA_BETA) -> np.ndarray:
+    """Suavização exponencial com tendência (Holt), vetorizada entre as linhas.
+
+    A recursão percorre as colunas; cada linha começa a ser suavizada no
+    seu primeiro ponto (nível = 1º valor, tendência = 0) e mantém o estado
+    nos NaN do meio da série.
+    """
+    level = np.full(y.shape[0], np.nan)
+    trend = np.zeros(y.shape[0])
+    for col in y.T:
+        seen = ~np.isnan(col)
+        start = seen & np.isnan(level)
+        step = seen & ~start
+        previous = level
+        smoothed = alpha * col + (1 - alpha) * (level + trend)
+        level = np.where(start, col, np.where(step, smoothed, level))
+        trend = np.where(step, beta * (level - previous) + (1 - beta) * trend, trend)
+    return level + trend * remaining
+
+
+def projected_pct(projected: np.ndarray, meta: np.ndarray, lower_is_better: np.ndarray) -> np.ndarray:
+    """``compute_pct`` vetorizado (1-100, NaN quando não comparável)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.where(
+            lower_is_better,
+            np.where(projected <= meta, 1.0, meta / projected),
+            projected / meta,
+        )
+    ratio = np.where(~lower_is_better & (meta == 0), np.nan, ratio)
+    return np.clip(np.floor(ratio * 100 + 0.5), 1, 100)
+
+
+def _scale(val: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """Potência de mil que leva a série à escala de ``val`` (12.4 -> R$ 12.4M).
+
+    NaN quando ``val / last`` não fica a menos de ``SCALE_TOLERANCE`` de uma
+    potência de mil: arredondar daria uma projeção errada por mil sem aviso.
+    Sem ``val`` numérico ou sem série, 1.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.log10(val / last)
+        exponent = np.round(ratio / 3) * 3
+    scale = np.where(np.abs(ratio - exponent) <= np.log10(SCALE_TOLERANCE), 10.0**exponent, np.nan)
+    return np.where(np.isfinite(ratio), scale, 1.0)
+
+
+def _comparable(kr: dict) -> bool:
+    values = kr.get("values")
+    if not values:
+        return False
+    val, meta = values["val"], values["meta"]
+    return not (val.unit and meta.unit and val.unit != meta.unit)
+
+
+def _text(kr: dict, value: float, pct: float) -> str:
+    if np.isnan(value):
+        return ""
+    val = kr.get("values", {}).get("val")
+    shown = format_like(val, value) if val is not None else f"{value:,.2f}"
+    return f"{shown} ({int(pct)}%)" if not np.isnan(pct) else shown
+
+
+def build_projection(okrs: list[dict], table: KRTable, model: str = PROJECTION_MODEL) -> Projection:
+    """Ajusta os dois modelos a todos os KRs e projeta o fim do ciclo."""
+    if model not in MODELS:
+        raise ValueError(f"Modelo de projeção desconhecido: {model!r} (use {', '.join(MODELS)})")
+    krs = [kr for o in okrs for kr in o["krs"]]
+    series, remaining = kr_series(okrs)
+    y, _ = stack_series(series, CYCLE_PERIODS)
+
+    slope, linear = fit_linear(y, remaining)
+    ewma = fit_ewma(y, remaining)
+    # Ciclo encerrado: o resultado é o último ponto, não o ajuste.
+    finished = remaining == 0
+    linear = np.where(finished, y[:, -1], linear)
+    ewma = np.where(finished, y[:, -1], ewma)
+    # Na escala de ``val``; séries sem valores negativos não projetam abaixo de zero.
+    scale = _scale(table.val, y[:, -1])
+    floor = np.where(np.nanmin(np.where(np.isnan(y), np.inf, y), axis=1) >= 0, 0.0, -np.inf)
+    linear = np.maximum(linear, floor) * scale
+    ewma = np.maximum(ewma, floor) * scale
+    slope = slope * scale
+
+    projected = linear if model == "linear" else ewma
+    comparable = np.fromiter((_comparable(kr) for kr in krs), dtype=bool, count=len(krs))
+    pct = np.where(comparable, projected_pct(projected, table.meta, table.lower_is_better), np.nan)
+    texts = tuple(_text(kr, value, p) for kr, value, p in zip(krs, projected.tolist(), pct.tolist()))
+    return Projection(
+        series=y,
+        remaining=remaining,
+        scale=scale,
+        slope=slope,
+        linear=linear,
+        ewma=ewma,
+        projected=projected,
+        projected_pct=pct,
+        texts=texts,
+    )
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _projection_cached(version: str, _okrs: list[dict], _table: KRTable) -> Projection:
+    return build_projection(_okrs, _table)
+
+
+def kr_projection(dataset: OKRDataset) -> Projection:
+    """Projeção do dataset, calculada uma vez por versão dos dados."""
+    return _projection_cached(dataset.version, dataset.okrs, kr_table(dataset))
@@ -0,0 +1,92 @@
+"""Atualização dos dados em background, compartilhada por todas as sessões.
+
+Uma thread por processo (``DatasetRefresher``, criada via
+``st.cache_resource``) verifica a fonte a cada ``OKRS_REFRESH_SECONDS``
+(30s) e, se ``mtime``/tamanho (ou a versão do banco SQLite) mudaram, relê e
+troca ``refresher.dataset`` por inteiro (uma atribuição de referência,
+atômica para quem lê). O custo de leitura da fonte é um ``stat`` (ou uma
+consulta a ``meta``) por intervalo, não por sessão nem por rerun.
+
+As sessões não consultam a fonte: ``current_dataset()`` devolve o dataset
+já carregado, e um fragment com ``run_every`` compara a versão e só
+reexecuta o app quando algo que a sessão exibe mudou (sem recarregar a
+página; o que mudou vem de ``okr_dashboard.incremental``).
+
+Com ``OKRS_REFRESH_SECONDS=0`` o app volta ao ``load_okrs`` por rerun.
+Erros de leitura (arquivo pela metade, JSON inválido) mantêm o dataset
+anterior e ficam em ``last_error`` (``refresh_error()``, exibido pelo app)
+até a próxima leitura bem-sucedida.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+import streamlit as st
+
+from okr_dashboard.data import OKRDataset, data_path, load_okrs, read_dataset, source_signature
+
+REFRESH_SECONDS = float(os.environ.get("OKRS_REFRESH_SECONDS", "30"))
+
+
+class DatasetRefresher:
+    def __init__(self, path: str | Path, interval: float = REFRESH_SECONDS) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self.checks = 0
+        self.loads = 0
+        self.last_error: str | None = None
+        self._signature = source_signature(self.path)
+        self.dataset: OKRDataset = read_dataset(self.path)
+        self.loads += 1
+        self.refreshed_at = time.time()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="okrs-refresher", daemon=True)
+        self._thread.start()
+
+    def refresh(self) -> bool:
+        """Relê a fonte se ela mudou; True quando a versão foi trocada."""
+        self.checks += 1
+        signature = source_signature(self.path)
+        if signature == self._signature:
+            return False
+        dataset = read_dataset(self.path)
+        self.loads += 1
+        self._signature = signature
+        if dataset.version == self.dataset.version:
+            return False
+        self.dataset = dataset
+        self.refreshed_at = time.time()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as exc:  # mantém o dataset anterior
+                self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+@st.cache_resource(show_spinner=False, on_release=DatasetRefresher.stop)
+def get_refresher(path: str, interval: float) -> DatasetRefresher:
+    return DatasetRefresher(path, interval)
+
+
+def current_dataset(path: str | Path | None = None) -> OKRDataset:
+    """Dataset compartilhado mais recente (sem tocar na fonte neste rerun)."""
+    if REFRESH_SECONDS <= 0:
+        return load_okrs(path)
+    return get_refresher(str(path or data_path()), REFRESH_SECONDS).dataset
+
+
+def refresh_error(path: str | Path | None = None) -> str | None:
+    """Erro da última leitura da fonte (None se ela foi lida com sucesso)."""
+    if REFRESH_SECONDS <= 0:
+        return None
+    return get_refresher(str(path or data_path()), REFRESH_SECONDS).last_error
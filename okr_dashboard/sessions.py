@@ -0,0 +1,210 @@
+"""Memória por sessão: contabilidade do ``session_state`` e caches limitados.
+
+Cada rerun chama ``track_session(st.session_state)``, que mede o estado da
+sessão (no máximo a cada ``MEASURE_SECONDS``) e registra a sessão no
+processo. Caches por sessão vêm de ``session_cache(nome)``: um LRU guardado
+no ``session_state`` e limitado em entradas e em bytes, para que o histórico
+de navegação de uma sessão não cresça sem limite.
+
+Periodicamente o processo varre as sessões registradas:
+
+- sessões paradas há mais de ``OKRS_SESSION_IDLE_MINUTES`` (15) têm os
+  caches esvaziados (o estado de navegação fica);
+- se a soma dos caches passar de ``OKRS_SESSIONS_CACHE_MB`` (64), as
+  sessões usadas há mais tempo são esvaziadas primeiro;
+- sessões encerradas somem do registro sozinhas (referências fracas).
+
+Os caches compartilhados do processo (specs dos gráficos, HTML dos cards,
+tabelas do histórico) são limitados em bytes por ``SizedLRUCache``.
+``memory_report()`` devolve o total, o detalhe por sessão e esses caches;
+com as métricas ligadas os totais também saem como gauges em
+``okr_dashboard.metrics``.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+
+from okr_dashboard import metrics
+from okr_dashboard.cache import SizedLRUCache, cache_report, deep_sizeof
+
+SESSION_CACHE_ENTRIES = int(os.environ.get("OKRS_SESSION_CACHE_ENTRIES", "32"))
+SESSION_CACHE_BYTES = int(float(os.environ.get("OKRS_SESSION_CACHE_MB", "2")) * 2**20)
+SESSIONS_CACHE_BYTES = int(float(os.environ.get("OKRS_SESSIONS_CACHE_MB", "64")) * 2**20)
+IDLE_SECONDS = float(os.environ.get("OKRS_SESSION_IDLE_MINUTES", "15")) * 60
+MEASURE_SECONDS = 5.0
+SWEEP_SECONDS = 30.0
+
+_CACHE_PREFIX = "_okrs_cache_"
+_ANCHOR_KEY = "_okrs_session"
+
+
+class SessionCache(SizedLRUCache):
+    """Cache de uma sessão, com os limites padrão por sessão."""
+
+    def __init__(self, maxsize: int = SESSION_CACHE_ENTRIES, max_bytes: int = SESSION_CACHE_BYTES):
+        super().__init__(maxsize, max_bytes)
+
+
+# ─── Registro do processo ────────────────────────────────────────────
+class _Anchor:
+    """Guardado no ``session_state``: morre junto com a sessão."""
+
+
+@dataclass
+class SessionUsage:
+    anchor: weakref.ref | None = None
+    state_bytes: int = 0
+    keys: dict[str, int] = field(default_factory=dict)
+    last_seen: float = 0.0
+    measured_at: float = 0.0
+    caches: dict[str, weakref.ref] = field(default_factory=dict)
+
+    def live_caches(self) -> dict[str, SessionCache]:
+        caches = {name: ref() for name, ref in self.caches.items()}
+        return {name: cache for name, cache in caches.items() if cache is not None}
+
+    @property
+    def cache_bytes(self) -> int:
+        return sum(cache.nbytes for cache in self.live_caches().values())
+
+
+_sessions: dict[str, SessionUsage] = {}
+_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def _session_id() -> str:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else "local"
+
+
+def _usage(session_id: str) -> SessionUsage:
+    with _lock:
+        usage = _sessions.get(session_id)
+        if usage is None:
+            usage = _sessions[session_id] = SessionUsage()
+    return usage
+
+
+def session_cache(
+    state, name: str, maxsize: int = SESSION_CACHE_ENTRIES, max_bytes: int = SESSION_CACHE_BYTES
+) -> SessionCache:
+    """Cache ``name`` da sessão atual, criado na primeira chamada."""
+    key = _CACHE_PREFIX + name
+    cache = state.get(key)
+    if not isinstance(cache, SessionCache):
+        cache = state[key] = SessionCache(maxsize, max_bytes)
+    usage = _usage(_session_id())
+    usage.caches[name] = weakref.ref(cache)
+    usage.last_seen = time.monotonic()
+    return cache
+
+
+def track_session(state, now: float | None = None) -> SessionUsage:
+    """Marca a sessão como ativa e mede o ``session_state`` (com limite de frequência)."""
+    now = time.monotonic() if now is None else now
+    usage = _usage(_session_id())
+    usage.last_seen = now
+    if usage.anchor is None or usage.anchor() is None:
+        anchor = state.get(_ANCHOR_KEY)
+        if not isinstance(anchor, _Anchor):
+            anchor = state[_ANCHOR_KEY] = _Anchor()
+        usage.anchor = weakref.ref(anchor)
+    if now - usage.measured_at >= MEASURE_SECONDS:
+        seen: set[int] = set()
+        usage.keys = {
+            str(key): deep_sizeof(value, seen)
+            for key, value in state.to_dict().items()
+            if not str(key).startswith((_CACHE_PREFIX, _ANCHOR_KEY))
+        }
+        usage.state_bytes = sum(usage.keys.values())
+        usage.measured_at = now
+    sweep(now)
+    return usage
+
+
+def sweep(now: float | None = None, force: bool = False) -> None:
+    """Esvazia caches de sessões paradas e aplica o limite global de bytes."""
+    global _last_sweep
+    now = time.monotonic() if now is None else now
+    if not force and now - _last_sweep < SWEEP_SECONDS:
+        return
+    _last_sweep = now
+    with _lock:
+        items = list(_sessions.items())
+    active = []
+    for session_id, usage in items:
+        if usage.anchor is not None and usage.anchor() is None:
+            # O session_state foi coletado: a sessão foi encerrada.
+            with _lock:
+                _sessions.pop(session_id, None)
+            continue
+        if now - usage.last_seen > IDLE_SECONDS:
+            for cache in usage.live_caches().values():
+                cache.clear()
+        active.append(usage)
+
+    total = sum(usage.cache_bytes for usage in active)
+    for usage in sorted(active, key=lambda u: u.last_seen):
+        if total <= SESSIONS_CACHE_BYTES:
+            break
+        for cache in usage.live_caches().values():
+            total -= cache.nbytes
+            cache.clear()
+
+
+def memory_report(now: float | None = None, detail: bool = True) -> dict:
+    """Totais do processo e, com ``detail``, o uso de cada sessão."""
+    now = time.monotonic() if now is None else now
+    with _lock:
+        items = list(_sessions.items())
+    per_session = []
+    for session_id, usage in items:
+        caches = usage.live_caches()
+        cache_bytes = sum(cache.nbytes for cache in caches.values())
+        per_session.append(
+            {
+                "session": session_id[:8],
+                "state_bytes": usage.state_bytes,
+                "cache_bytes": cache_bytes,
+                "cache_entries": {name: len(cache) for name, cache in caches.items()},
+                "idle_s": round(now - usage.last_seen, 1),
+                "largest_keys": dict(sorted(usage.keys.items(), key=lambda kv: -kv[1])[:5]),
+            }
+        )
+    report = {
+        "sessions": len(per_session),
+        "state_bytes": sum(s["state_bytes"] for s in per_session),
+        "cache_bytes": sum(s["cache_bytes"] for s in per_session),
+        "max_session_bytes": max((s["state_bytes"] + s["cache_bytes"] for s in per_session), default=0),
+        "limits": {
+            "session_cache_entries": SESSION_CACHE_ENTRIES,
+            "session_cache_bytes": SESSION_CACHE_BYTES,
+            "sessions_cache_bytes": SESSIONS_CACHE_BYTES,
+            "idle_seconds": IDLE_SECONDS,
+        },
+        "process_caches": cache_report(),
+    }
+    if detail:
+        report["per_session"] = sorted(per_session, key=lambda s: -(s["state_bytes"] + s["cache_bytes"]))
+    return report
+
+
+def _gauges() -> dict[str, float]:
+    report = memory_report(detail=False)
+    return {
+        "sessions": report["sessions"],
+        "session_state_bytes": report["state_bytes"],
+        "session_cache_bytes": report["cache_bytes"],
+        "session_bytes_max": report["max_session_bytes"],
+        "process_cache_bytes": sum(cache["bytes"] for cache in report["process_caches"].values()),
+    }
+
+
+metrics.add_collector(_gauges)
@@ -0,0 +1,198 @@
+"""Chance de cada KR atingir a ``meta`` no fim do ciclo (Monte Carlo).
+
+Complementa as faixas fixas de ``pct`` (70/95) com a volatilidade da série:
+os caminhos até o fim do ciclo são sorteados reamostrando (bootstrap) as
+variações mês a mês já observadas na série do KR (a mesma da projeção),
+então tendência e oscilação vêm do próprio histórico. A chance é a fração
+de caminhos que terminam do lado certo da meta (``≤`` na meta inverte o
+sentido).
+
+A simulação é vetorizada entre KRs, caminhos e horizontes (arrays KRs x
+caminhos x meses): os KRs são ordenados pelos meses que faltam e cada bloco
+sorteia até o maior horizonte do bloco, com uma máscara zerando os meses
+além do fim do ciclo de cada KR. Os blocos têm até ``CHUNK_ELEMENTS``
+elementos para limitar a memória. Cada KR começa com
+``OKRS_SIMULATION_PATHS`` (20000) caminhos; a cada bloco o ritmo medido até
+ali redistribui o que resta de ``OKRS_SIMULATION_BUDGET_MS`` (300) entre os
+KRs que faltam. O orçamento é o limite: com muitos KRs os blocos seguintes
+usam menos caminhos e, se o orçamento acaba ou caberiam menos de
+``MIN_PATHS`` caminhos por KR, a simulação para e os KRs restantes ficam
+sem chance. ``paths`` registra quantos caminhos cada KR usou e ``margin`` a
+margem de erro (95%) alcançada, exibida ao lado da chance. O resultado é
+cacheado por versão do dataset e a semente é fixa, então a mesma versão
+sempre mostra os mesmos números.
+
+KRs sem meta comparável, com menos de três pontos, com o ciclo já
+encerrado ou que ficaram fora do orçamento não são simulados e a chance
+fica NaN. Com o ciclo encerrado o
+texto mostra o resultado realizado (``meta atingida`` ou ``meta não
+atingida``, pelo último valor) em vez de uma chance.
+"""
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import streamlit as st
+
+from okr_dashboard.data import OKRDataset
+from okr_dashboard.projection import Projection, kr_projection
+from okr_dashboard.table import KRTable, kr_table
+
+SIMULATION_PATHS = int(os.environ.get("OKRS_SIMULATION_PATHS", "20000"))
+SIMULATION_BUDGET = float(os.environ.get("OKRS_SIMULATION_BUDGET_MS", "300")) / 1000
+MIN_PATHS = 200  # abaixo disso a margem passaria de ~7 pontos percentuais
+CHUNK_ELEMENTS = 2**22
+SEED = 20240101
+
+
+@dataclass(frozen=True)
+class Chances:
+    """Chance de atingir a meta por KR, na ordem da ``KRTable``."""
+
+    probability: np.ndarray
+    paths: np.ndarray
+    margin: np.ndarray
+    reached: np.ndarray
+    seconds: float
+    texts: tuple[str, ...]
+
+    def texts_for(self, table: KRTable, okr_idx: int) -> tuple[str, ...]:
+        return self.texts[table.kr_slice(okr_idx)]
+
+
+def _hits(end: np.ndarray, target: np.ndarray, lower_is_better: np.ndarray) -> np.ndarray:
+    return np.where(lower_is_better, end <= target, end >= target)
+
+
+def finished(y: np.ndarray, remaining: np.ndarray, target: np.ndarray, lower_is_better: np.ndarray) -> np.ndarray:
+    """Resultado realizado dos KRs com o ciclo encerrado (1/0), NaN nos demais."""
+    last = y[:, -1]
+    done = ~np.isnan(last) & ~np.isnan(target) & (remaining == 0)
+    return np.where(done, _hits(last, target, lower_is_better), np.nan)
+
+
+def simulate(
+    y: np.ndarray,
+    remaining: np.ndarray,
+    target: np.ndarray,
+    lower_is_better: np.ndarray,
+    paths: int = SIMULATION_PATHS,
+    budget: float = SIMULATION_BUDGET,
+    seed: int = SEED,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Fração de caminhos que atingem ``target`` em cada linha de ``y``.
+
+    ``y`` vem de ``stack_series`` (alinhada à direita, NaN à esquerda) e
+    ``target`` está na escala da série. Devolve a chance e os caminhos
+    usados por linha (0 quando a linha não foi simulada).
+    """
+    start = time.perf_counter()
+    max_paths = paths
+    rng = np.random.default_rng(seed)
+    n = y.shape[0]
+    probability = np.full(n, np.nan)
+    used = np.zeros(n, dtype=np.int64)
+
+    last = y[:, -1]
+    diffs = np.diff(y, axis=1)
+    valid = ~np.isnan(diffs)
+    counts = valid.sum(axis=1)
+    ok = ~np.isnan(last) & ~np.isnan(target)
+
+    todo = np.flatnonzero(ok & (remaining > 0) & (counts >= 2))
+    if todo.size == 0:
+        return probability, used
+    # Maiores horizontes primeiro: cada bloco sorteia só até o maior horizonte dele.
+    todo = todo[np.argsort(-remaining[todo], kind="stable")]
+    horizon = remaining.astype(np.int64)
+    # Variações observadas de cada KR, compactadas à esquerda (para sortear por índice).
+    order = np.argsort(~valid, axis=1, kind="stable")
+    pool = np.take_along_axis(diffs, order, axis=1).astype(np.float32)
+    width = pool.shape[1]
+    pool = pool.ravel()
+    counts = counts.astype(np.uint32)
+    work_left = float(remaining[todo].sum())
+    elements = 0
+    pos = 0
+    while pos < todo.size:
+        elapsed = time.perf_counter() - start
+        if elements:
+            affordable = elements / max(elapsed, 1e-9) * max(budget - elapsed, 0.0) / work_left
+            paths = int(min(affordable, max_paths))
+            # Orçamento esgotado: os KRs que faltam ficam sem chance (NaN, 0 caminhos).
+            if paths < MIN_PATHS:
+                break
+        # O primeiro bloco é pequeno: só mede o ritmo antes de gastar o orçamento.
+        limit = CHUNK_ELEMENTS if elements else CHUNK_ELEMENTS // 16
+        steps = int(horizon[todo[pos]])
+        rows = todo[pos : pos + max(1, limit // (paths * steps))]
+        # Índice uniforme em [0, counts) a partir de 16 bits aleatórios (viés desprezível).
+        draws = rng.integers(0, 2**16, (rows.size, steps, paths), dtype=np.uint16)
+        index = ((draws * counts[rows, None, None]) >> 16) + (rows.astype(np.uint32) * width)[:, None, None]
+        # Meses além do fim do ciclo de cada KR não entram na soma.
+        inside = np.arange(steps) < horizon[rows, None]
+        end = last[rows, None] + np.einsum("ksp,ks->kp", pool[index], inside.astype(np.float32))
+        probability[rows] = _hits(end, target[rows, None], lower_is_better[rows, None]).mean(axis=1)
+        used[rows] = paths
+        elements += rows.size * paths * steps
+        work_left -= float(remaining[rows].sum())
+        pos += rows.size
+    return probability, used
+
+
+def margin_of_error(probability: np.ndarray, paths: np.ndarray) -> np.ndarray:
+    """Meia largura do intervalo de 95% da chance (NaN sem simulação).
+
+    Nos extremos (0 ou 1) usa ``1 / paths`` no lugar de ``p(1 - p)``, para
+    não reportar precisão perfeita.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = np.maximum(probability * (1 - probability), 1 / paths)
+        return np.where(paths > 0, 1.96 * np.sqrt(variance / paths), np.nan)
+
+
+def _text(projected: str, probability: float, margin: float, reached: float) -> str:
+    if not np.isnan(reached):
+        result = "meta atingida" if reached else "meta não atingida"
+        return f"{projected} · {result}" if projected else result
+    if np.isnan(probability):
+        return projected
+    chance = f"chance {round(probability * 100)}%"
+    if round(margin * 100) >= 1:
+        chance += f" (±{round(margin * 100)} p.p.)"
+    return f"{projected} · {chance}" if projected else chance
+
+
+def build_chances(okrs: list[dict], table: KRTable, projection: Projection) -> Chances:
+    """Simula todos os KRs do dataset e monta o texto exibido nas linhas."""
+    start = time.perf_counter()
+    # A meta na escala da série; só KRs em que o projetado é comparável com ela.
+    target = np.where(np.isnan(projection.projected_pct), np.nan, table.meta / projection.scale)
+    probability, paths = simulate(projection.series, projection.remaining, target, table.lower_is_better)
+    margin = margin_of_error(probability, paths)
+    reached = finished(projection.series, projection.remaining, target, table.lower_is_better)
+    texts = tuple(
+        _text(text, p, m, r)
+        for text, p, m, r in zip(projection.texts, probability.tolist(), margin.tolist(), reached.tolist())
+    )
+    return Chances(
+        probability=probability,
+        paths=paths,
+        margin=margin,
+        reached=reached,
+        seconds=time.perf_counter() - start,
+        texts=texts,
+    )
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _chances_cached(version: str, _okrs: list[dict], _table: KRTable, _projection: Projection) -> Chances:
+    return build_chances(_okrs, _table, _projection)
+
+
+def kr_chances(dataset: OKRDataset) -> Chances:
+    """Chances do dataset, simuladas uma vez por versão dos dados."""
+    return _chances_cached(dataset.version, dataset.okrs, kr_table(dataset), kr_projection(dataset))
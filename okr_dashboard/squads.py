@@ -0,0 +1,131 @@
+"""Hierarquia OKR da empresa → squads → KRs dos squads, com roll-ups.
+
+Os roll-ups são calculados de baixo para cima uma vez por versão do dataset,
+numa passada vetorizada sobre todos os KRs de squad, e guardados por nó.
+Abrir um squad no diálogo é só um lookup em ``SquadTree.nodes``.
+
+Regras (as mesmas de ``okr_status_from_krs``, aplicadas à subárvore):
+
+- ``pct`` de um squad é a média dos ``pct`` válidos (> 0) dos seus KRs,
+  ponderada por ``kr["weight"]`` (padrão 1); o do OKR é a média dos squads
+  com dados, ponderada por ``squad["weight"]``;
+- ``status`` considera o menor ``pct`` válido da subárvore: abaixo de
+  ``PCT_ATTENTION`` é ``red``, abaixo de ``PCT_ON_TRACK`` é ``yellow``.
+  Assim um squad em risco deixa o OKR em risco, como um KR faria.
+
+IDs dos nós: ``<okr_id>``, ``<okr_id>/<squad_id>`` e
+``<okr_id>/<squad_id>/<kr_id>``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import streamlit as st
+
+from okr_dashboard.data import OKRDataset
+from okr_dashboard.status import PCT_ATTENTION, PCT_ON_TRACK
+
+
+@dataclass(frozen=True)
+class Rollup:
+    node_id: str
+    name: str
+    level: str  # "okr", "squad" ou "kr"
+    pct: int
+    status: str
+    weight: float
+    children: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class SquadTree:
+    nodes: dict[str, Rollup]
+
+    def node(self, node_id: str) -> Rollup | None:
+        return self.nodes.get(node_id)
+
+    def children(self, node_id: str) -> list[Rollup]:
+        node = self.nodes.get(node_id)
+        return [self.nodes[c] for c in node.children] if node else []
+
+
+def _status(min_pct: np.ndarray) -> np.ndarray:
+    return np.select(
+        [np.isinf(min_pct), min_pct < PCT_ATTENTION, min_pct < PCT_ON_TRACK],
+        ["no_data", "red", "yellow"],
+        default="green",
+    )
+
+
+def _weighted_mean(total: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    mean = np.zeros_like(total)
+    np.divide(total, weight, out=mean, where=weight > 0)
+    return np.floor(mean + 0.5).astype(np.int64)
+
+
+def build_squad_tree(okrs: list[dict]) -> SquadTree:
+    """Calcula os roll-ups de todos os nós de uma vez."""
+    squads = [(okr, squad) for okr in okrs for squad in okr.get("squads", [])]
+    krs = [kr for _, squad in squads for kr in squad["krs"]]
+    n_okrs, n_squads, n_krs = len(okrs), len(squads), len(krs)
+
+    okr_index = {id(okr): i for i, okr in enumerate(okrs)}
+    squad_okr = np.fromiter((okr_index[id(okr)] for okr, _ in squads), dtype=np.int64, count=n_squads)
+    squad_weight = np.fromiter((float(s.get("weight", 1.0)) for _, s in squads), dtype=np.float64, count=n_squads)
+    kr_squad = np.repeat(np.arange(n_squads), [len(s["krs"]) for _, s in squads]).astype(np.int64)
+    kr_pct = np.fromiter((kr.get("pct", 0) for kr in krs), dtype=np.float64, count=n_krs)
+    kr_weight = np.fromiter((float(kr.get("weight", 1.0)) for kr in krs), dtype=np.float64, count=n_krs)
+    valid = kr_pct > 0
+
+    # KR → squad
+    squad_total = np.zeros(n_squads)
+    squad_wsum = np.zeros(n_squads)
+    np.add.at(squad_total, kr_squad[valid], kr_pct[valid] * kr_weight[valid])
+    np.add.at(squad_wsum, kr_squad[valid], kr_weight[valid])
+    squad_min = np.full(n_squads, np.inf)
+    np.minimum.at(squad_min, kr_squad[valid], kr_pct[valid])
+    squad_pct = _weighted_mean(squad_total, squad_wsum)
+
+    # squad → OKR (só squads com dados entram na média)
+    has_data = squad_wsum > 0
+    okr_total = np.zeros(n_okrs)
+    okr_wsum = np.zeros(n_okrs)
+    np.add.at(okr_total, squad_okr[has_data], squad_pct[has_data] * squad_weight[has_data])
+    np.add.at(okr_wsum, squad_okr[has_data], squad_weight[has_data])
+    okr_min = np.full(n_okrs, np.inf)
+    np.minimum.at(okr_min, squad_okr, squad_min)
+    okr_pct = _weighted_mean(okr_total, okr_wsum)
+
+    kr_status = _status(np.where(valid, kr_pct, np.inf)).tolist()
+    squad_status = _status(squad_min).tolist()
+    okr_status = _status(okr_min).tolist()
+
+    nodes: dict[str, Rollup] = {}
+    k = 0
+    squad_ids: list[list[str]] = [[] for _ in okrs]
+    for s, (okr, squad) in enumerate(squads):
+        squad_id = f"{okr['id']}/{squad['id']}"
+        kr_ids = []
+        for kr in squad["krs"]:
+            kr_id = f"{squad_id}/{kr['id']}"
+            nodes[kr_id] = Rollup(kr_id, kr["name"], "kr", int(kr_pct[k]), kr_status[k], float(kr_weight[k]))
+            kr_ids.append(kr_id)
+            k += 1
+        nodes[squad_id] = Rollup(
+            squad_id, squad["name"], "squad", int(squad_pct[s]), squad_status[s], float(squad_weight[s]), tuple(kr_ids)
+        )
+        squad_ids[squad_okr[s]].append(squad_id)
+    for i, okr in enumerate(okrs):
+        nodes[okr["id"]] = Rollup(okr["id"], okr["title"], "okr", int(okr_pct[i]), okr_status[i], 1.0, tuple(squad_ids[i]))
+    return SquadTree(nodes)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _squad_tree_cached(version: str, _okrs: list[dict]) -> SquadTree:
+    return build_squad_tree(_okrs)
+
+
+def squad_tree(dataset: OKRDataset) -> SquadTree:
+    """Árvore de roll-ups do dataset, calculada uma vez por versão dos dados."""
+    return _squad_tree_cached(dataset.version, dataset.okrs)
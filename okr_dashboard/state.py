@@ -0,0 +1,71 @@
+"""Estado de navegação espelhado nos query params da URL.
+
+``?okr=4&kr=2`` abre o diálogo do OKR 4 com o KR 2 selecionado já no
+primeiro run da sessão; ``?okr=4&view=squads&squad=1`` abre o diálogo de
+squads. ``okr``, ``kr`` e ``squad`` aceitam o índice (a partir de 0, como no
+``session_state``) ou o ``id``; a URL é escrita com índices. ``page`` é a
+página da grade e, se omitida, vai para a página do OKR aberto.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+PARAMS = ("okr", "view", "kr", "squad", "page")
+
+
+def _resolve(value: str | None, items: list[dict]) -> int | None:
+    if value is None or value == "":
+        return None
+    if value.isdigit():
+        idx = int(value)
+        return idx if idx < len(items) else None
+    return next((i for i, item in enumerate(items) if item.get("id") == value), None)
+
+
+def state_from_query_params(params: Mapping[str, str], okrs: list[dict], page_size: int) -> dict:
+    """Chaves do ``session_state`` correspondentes aos params da URL."""
+    state: dict = {}
+    okr_idx = _resolve(params.get("okr"), okrs)
+    if okr_idx is not None:
+        okr = okrs[okr_idx]
+        state["selected_okr"] = okr_idx
+        if params.get("view") == "squads":
+            state["selected_dialog"] = "squads"
+            state["selected_squad_idx"] = _resolve(params.get("squad"), okr.get("squads", [])) or 0
+        else:
+            state["selected_dialog"] = "okr"
+            state["selected_kr_idx"] = _resolve(params.get("kr"), okr["krs"]) or 0
+    page = params.get("page", "")
+    if page.isdigit() and int(page) > 0:
+        state["grid_page"] = int(page) - 1
+    elif okr_idx is not None:
+        state["grid_page"] = okr_idx // page_size
+    return state
+
+
+def query_params_from_state(state: Mapping) -> dict[str, str]:
+    """Params da URL para o estado atual (sem os que estão no padrão)."""
+    params: dict[str, str] = {}
+    if state.get("grid_page"):
+        params["page"] = str(state["grid_page"] + 1)
+    okr_idx = state.get("selected_okr")
+    if okr_idx is None:
+        return params
+    params["okr"] = str(okr_idx)
+    if state.get("selected_dialog") == "squads":
+        params["view"] = "squads"
+        params["squad"] = str(state.get("selected_squad_idx") or 0)
+    else:
+        params["kr"] = str(state.get("selected_kr_idx") or 0)
+    return params
+
+
+def sync_query_params(query_params, state: Mapping) -> None:
+    """Atualiza ``st.query_params`` só nas chaves que mudaram."""
+    wanted = query_params_from_state(state)
+    for key in PARAMS:
+        if key in wanted:
+            if query_params.get(key) != wanted[key]:
+                query_params[key] = wanted[key]
+        elif key in query_params:
+            del query_params[key]
@@ -0,0 +1,40 @@
+"""Regras de status e cores compartilhadas pelo dashboard e pelos cálculos."""
+from __future__ import annotations
+
+STATUS_COLORS = {
+    "green": "#34D399",
+    "yellow": "#FBBF24",
+    "red": "#F87171",
+    "no_data": "#6B7B94",
+}
+STATUS_LABELS = {
+    "green": "On Track",
+    "yellow": "Atenção",
+    "red": "Em Risco",
+    "no_data": "Sem dados",
+}
+
+# Limiares de progresso (pct) usados por pct_color e okr_status_from_krs.
+PCT_ON_TRACK = 95
+PCT_ATTENTION = 70
+
+
+def pct_color(pct: int) -> str:
+    if pct <= 0:
+        return STATUS_COLORS["no_data"]
+    if pct >= PCT_ON_TRACK:
+        return STATUS_COLORS["green"]
+    if pct >= PCT_ATTENTION:
+        return STATUS_COLORS["yellow"]
+    return STATUS_COLORS["red"]
+
+
+def okr_status_from_krs(krs: list[dict]) -> str:
+    pcts = [kr.get("pct", 0) for kr in krs if kr.get("pct", 0) > 0]
+    if not pcts:
+        return "no_data"
+    if any(p < PCT_ATTENTION for p in pcts):
+        return "red"
+    if any(p < PCT_ON_TRACK for p in pcts):
+        return "yellow"
+    return "green"
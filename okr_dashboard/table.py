@@ -0,0 +1,124 @@
+"""Tabela colunar de KRs com status, cores e resumo calculados de uma vez.
+
+Os KRs de todos os OKRs são achatados em arrays NumPy (um elemento por KR,
+agrupados por OKR via ``okr_pos``/``offsets``) e status, cores e contadores
+do resumo saem de uma única passada vetorizada. As magnitudes parseadas de
+``val``/``ant``/``meta`` (NaN quando não numéricas) também viram colunas. O resultado é cacheado por
+versão do dataset, então cada rerun só faz lookups.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import streamlit as st
+
+from okr_dashboard.data import OKRDataset
+from okr_dashboard.status import PCT_ATTENTION, PCT_ON_TRACK, STATUS_COLORS
+
+
+@dataclass(frozen=True)
+class Summary:
+    total_krs: int
+    on_track: int
+    attention: int
+    at_risk: int
+    avg_pct: int
+
+
+@dataclass(frozen=True)
+class KRTable:
+    """KRs achatados em colunas, com os valores derivados já calculados."""
+
+    okr_ids: tuple[str, ...]
+    kr_ids: tuple[str, ...]
+    okr_pos: np.ndarray
+    offsets: np.ndarray
+    pct: np.ndarray
+    val: np.ndarray
+    ant: np.ndarray
+    meta: np.ndarray
+    lower_is_better: np.ndarray
+    kr_colors: tuple[str, ...]
+    okr_status: tuple[str, ...]
+    summary: Summary
+
+    def okr_index(self, okr_id: str) -> int:
+        return self.okr_ids.index(okr_id)
+
+    def kr_slice(self, okr_idx: int) -> slice:
+        """Posições (na tabela) dos KRs do OKR ``okr_idx``."""
+        return slice(int(self.offsets[okr_idx]), int(self.offsets[okr_idx + 1]))
+
+    def colors_for(self, okr_idx: int) -> tuple[str, ...]:
+        return self.kr_colors[self.kr_slice(okr_idx)]
+
+
+def _magnitude(kr: dict, field: str) -> float:
+    value = kr.get("values", {}).get(field)
+    return np.nan if value is None or value.magnitude is None else value.magnitude
+
+
+def build_kr_table(okrs: list[dict]) -> KRTable:
+    """Achata ``okrs`` e calcula status, cores e resumo de forma vetorizada."""
+    counts = np.fromiter((len(o["krs"]) for o in okrs), dtype=np.int64, count=len(okrs))
+    offsets = np.zeros(len(okrs) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    okr_pos = np.repeat(np.arange(len(okrs)), counts)
+    n_krs = int(offsets[-1])
+    krs = [kr for o in okrs for kr in o["krs"]]
+    pct = np.fromiter((kr.get("pct", 0) for kr in krs), dtype=np.float64, count=n_krs)
+    val, ant, meta = (
+        np.fromiter((_magnitude(kr, field) for kr in krs), dtype=np.float64, count=n_krs)
+        for field in ("val", "ant", "meta")
+    )
+    lower_is_better = np.fromiter((kr.get("lower_is_better", False) for kr in krs), dtype=bool, count=n_krs)
+
+    valid = pct > 0
+    kr_colors = np.select(
+        [~valid, pct >= PCT_ON_TRACK, pct >= PCT_ATTENTION],
+        [STATUS_COLORS["no_data"], STATUS_COLORS["green"], STATUS_COLORS["yellow"]],
+        default=STATUS_COLORS["red"],
+    )
+
+    # Menor pct válido de cada OKR: basta ele para aplicar as regras de status.
+    min_pct = np.full(len(okrs), np.inf)
+    np.minimum.at(min_pct, okr_pos[valid], pct[valid])
+    okr_status = np.select(
+        [np.isinf(min_pct), min_pct < PCT_ATTENTION, min_pct < PCT_ON_TRACK],
+        ["no_data", "red", "yellow"],
+        default="green",
+    )
+
+    valid_pcts = pct[valid]
+    summary = Summary(
+        total_krs=int(pct.size),
+        on_track=int(np.count_nonzero(okr_status == "green")),
+        attention=int(np.count_nonzero(okr_status == "yellow")),
+        at_risk=int(np.count_nonzero(okr_status == "red")),
+        avg_pct=round(float(valid_pcts.mean())) if valid_pcts.size else 0,
+    )
+    return KRTable(
+        okr_ids=tuple(o["id"] for o in okrs),
+        kr_ids=tuple(kr["id"] for kr in krs),
+        okr_pos=okr_pos,
+        offsets=offsets,
+        pct=pct,
+        val=val,
+        ant=ant,
+        meta=meta,
+        lower_is_better=lower_is_better,
+        kr_colors=tuple(kr_colors.tolist()),
+        okr_status=tuple(okr_status.tolist()),
+        summary=summary,
+    )
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _kr_table_cached(version: str, _okrs: list[dict]) -> KRTable:
+    return build_kr_table(_okrs)
+
+
+def kr_table(dataset: OKRDataset) -> KRTable:
+    """Tabela do dataset, calculada uma vez por versão dos dados."""
+    return _kr_table_cached(dataset.version, dataset.okrs)
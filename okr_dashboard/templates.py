@@ -0,0 +1,254 @@
+"""Templates HTML do cabeçalho, resumo, cards, linhas de KR/squad e diálogo.
+
+Cada template é compilado uma vez (``str.format`` ligado no import) e o HTML
+renderizado fica em cache no processo: linhas de KR pelo conteúdo exibido e
+cards pelo hash de conteúdo do OKR (``okr["hash"]``, calculado no
+carregamento). Um card inalterado sai do cache; se um KR mudou, o hash do
+OKR muda, mas só a linha desse KR é renderizada de novo. Cada um dos dois
+caches é limitado a ``OKRS_TEMPLATE_CACHE_MB`` (16) de HTML.
+"""
+from __future__ import annotations
+
+import os
+from html import escape
+
+from okr_dashboard.cache import SizedLRUCache
+from okr_dashboard.status import STATUS_COLORS, STATUS_LABELS
+
+TEMPLATE_CACHE_BYTES = int(float(os.environ.get("OKRS_TEMPLATE_CACHE_MB", "16")) * 2**20)
+
+_KR_ROW = (
+    '<div class="kr">'
+    '<div class="kr-top">'
+    '<span class="kr-nm">{name}</span>'
+    '<span class="kr-vl">{val}</span>'
+    "</div>"
+    '<div class="kr-bar-row">'
+    '<div class="kr-track">'
+    '<div class="kr-fill" style="width:{width}%;background:{color}"></div>'
+    "</div>"
+    '<span class="kr-pct" style="color:{color}">{pct_text}</span>'
+    "</div>"
+    '<div class="kr-meta">Ant: {ant}  ·  Meta: {meta}{projection}</div>'
+    "</div>"
+).format
+
+_KR_ROW_DIALOG = (
+    '<div style="padding:10px 10px;border:{border};border-radius:10px;background:{bg};margin:6px 0;">'
+    '<div style="display:flex;justify-content:space-between;align-items:baseline;margin-bottom:6px;">'
+    '<span style="color:#8090A8;font-size:0.85rem;font-weight:600;">{name}</span>'
+    '<span style="color:#FFF;font-size:0.95rem;font-weight:800;white-space:nowrap;">{val}</span>'
+    "</div>"
+    '<div style="display:flex;align-items:center;gap:10px;margin-bottom:4px;">'
+    '<div style="flex:1;height:4px;background:rgba(255,255,255,0.08);border-radius:4px;overflow:hidden;">'
+    '<div style="width:{width}%;height:100%;background:{color};"></div>'
+    "</div>"
+    '<span style="min-width:36px;text-align:right;color:{color};font-weight:800;font-size:0.8rem;">{pct_text}</span>'
+    "</div>"
+    '<div style="color:#4A5670;font-size:0.75rem;">Ant: {ant} · Meta: {meta}{projection}</div>'
+    "</div>"
+).format
+
+_SQUAD_ROW = (
+    '<div style="padding:10px 10px;border:{border};border-radius:10px;background:{bg};margin:6px 0;">'
+    '<div style="display:flex;justify-content:space-between;align-items:baseline;margin-bottom:6px;">'
+    '<span style="color:#8090A8;font-size:0.85rem;font-weight:600;">{name}</span>'
+    '<span style="display:flex;align-items:center;gap:8px;white-space:nowrap;">'
+    '<span style="width:8px;height:8px;border-radius:50%;background:{color};display:inline-block;"></span>'
+    '<span style="color:#9DB2CC;font-size:0.8rem;">{status_label}</span>'
+    "</span>"
+    "</div>"
+    '<div style="display:flex;align-items:center;gap:10px;margin-bottom:4px;">'
+    '<div style="flex:1;height:4px;background:rgba(255,255,255,0.08);border-radius:4px;overflow:hidden;">'
+    '<div style="width:{width}%;height:100%;background:{color};"></div>'
+    "</div>"
+    '<span style="min-width:36px;text-align:right;color:{color};font-weight:800;font-size:0.8rem;">{pct_text}</span>'
+    "</div>"
+    '<div style="color:#4A5670;font-size:0.75rem;">{detail}</div>'
+    "</div>"
+).format
+
+_CARD = (
+    '<div class="okr-card" style="border-left:4px solid {accent};">'
+    '<div class="c-head">'
+    '<div class="c-head-left">'
+    '<span class="c-title" style="color:{accent}">{title}</span>'
+    '<span class="c-dot" style="background:{status_color};color:{status_color}"></span>'
+    "</div>"
+    "</div>"
+    '<div class="c-sub">{subtitle}</div>'
+    '<div class="c-body">'
+    '<div class="c-krs">{rows}</div>'
+    "{more}"
+    "</div>"
+    "</div>"
+).format
+
+_CARD_MORE = '<div class="c-more">+{hidden} KRs &middot; veja mais</div>'.format
+
+_DIALOG_HEADER = (
+    '<div style="background:linear-gradient(160deg, #181D2C 0%, #141822 100%);border:1px solid #2B3350;'
+    'border-left:6px solid {accent};border-radius:18px;padding:18px;margin-bottom:12px;">'
+    '<div style="display:flex;justify-content:space-between;align-items:center;gap:12px;">'
+    "<div>"
+    '<div style="color:{accent};font-weight:800;letter-spacing:1.3px;font-size:0.85rem;">{title}</div>'
+    '<div style="color:#6B7B94;margin-top:6px;line-height:1.35;">{subtitle}</div>'
+    "</div>"
+    '<div style="display:flex;align-items:center;gap:10px;white-space:nowrap;">'
+    '<span style="width:10px;height:10px;border-radius:50%;background:{status_color};display:inline-block;"></span>'
+    '<span style="color:#9DB2CC;font-size:0.85rem;">{status_label}</span>'
+    "</div>"
+    "</div>"
+    "</div>"
+).format
+
+_HEADER = """
+<div class="hdr">
+    <div>
+        <div class="hdr-title">OKRs Estratégicos</div>
+        <div class="hdr-sub">PagBrasil &middot; Indicadores de Performance</div>
+    </div>
+    {logo}
+</div>
+""".format
+
+_SUMMARY = """
+<div class="sum-row">
+    <div class="sum-card">
+        <div class="sum-val">{total_krs}</div>
+        <div class="sum-lbl">Key Results</div>
+    </div>
+    <div class="sum-card">
+        <div class="sum-val" style="color:#34D399">{on_track}</div>
+        <div class="sum-lbl">On Track</div>
+    </div>
+    <div class="sum-card">
+        <div class="sum-val" style="color:#FBBF24">{attention}</div>
+        <div class="sum-lbl">Atenção</div>
+    </div>
+    <div class="sum-card">
+        <div class="sum-val" style="color:#F87171">{at_risk}</div>
+        <div class="sum-lbl">Em Risco</div>
+    </div>
+    <div class="sum-card">
+        <div class="sum-val">{avg_pct}%</div>
+        <div class="sum-lbl">Progresso Médio</div>
+    </div>
+</div>
+""".format
+
+_rows: SizedLRUCache[str] = SizedLRUCache(maxsize=8192, max_bytes=TEMPLATE_CACHE_BYTES, name="kr_rows_html")
+_cards: SizedLRUCache[str] = SizedLRUCache(maxsize=1024, max_bytes=TEMPLATE_CACHE_BYTES, name="cards_html")
+
+
+def _row_fields(kr: dict, color: str, projection: str = "", sep: str = " · ") -> dict:
+    pct = kr["pct"]
+    return {
+        "name": escape(str(kr["name"])),
+        "val": escape(str(kr["val"])),
+        "ant": escape(str(kr["ant"])),
+        "meta": escape(str(kr["meta"])),
+        "width": min(pct, 100),
+        "color": color,
+        "pct_text": f"{pct}%" if pct > 0 else "—",
+        "projection": f"{sep}Proj.: {escape(projection)}" if projection else "",
+    }
+
+
+def kr_row_html(kr: dict, color: str, projection: str = "") -> str:
+    """Linha de KR do card; ``projection`` é o texto da projeção de fim de ciclo."""
+    key = ("card", kr["name"], kr["val"], kr["ant"], kr["meta"], kr["pct"], color, projection)
+    return _rows.get_or_set(key, lambda: _KR_ROW(**_row_fields(kr, color, projection, "  ·  ")))
+
+
+def kr_row_dialog_html(kr: dict, color: str, accent: str = "", selected: bool = False, projection: str = "") -> str:
+    """Linha de KR do diálogo; ``selected`` destaca a borda com ``accent``."""
+    key = ("dialog", kr["name"], kr["val"], kr["ant"], kr["meta"], kr["pct"], color, accent, selected, projection)
+    border = f"1px solid {accent}" if selected else "1px solid rgba(255,255,255,0.04)"
+    bg = "rgba(255,255,255,0.03)" if selected else "transparent"
+    return _rows.get_or_set(
+        key, lambda: _KR_ROW_DIALOG(border=border, bg=bg, **_row_fields(kr, color, projection))
+    )
+
+
+def squad_row_html(node, detail: str, accent: str = "", selected: bool = False) -> str:
+    """Linha de um nó de roll-up (squad ou OKR) com pct ponderado e status."""
+    key = ("squad", node.node_id, node.name, node.pct, node.status, detail, accent, selected)
+    border = f"1px solid {accent}" if selected else "1px solid rgba(255,255,255,0.04)"
+    bg = "rgba(255,255,255,0.03)" if selected else "transparent"
+    return _rows.get_or_set(
+        key,
+        lambda: _SQUAD_ROW(
+            border=border,
+            bg=bg,
+            name=escape(node.name),
+            color=STATUS_COLORS[node.status],
+            status_label=STATUS_LABELS[node.status],
+            width=min(node.pct, 100),
+            pct_text=f"{node.pct}%" if node.pct > 0 else "—",
+            detail=escape(detail),
+        ),
+    )
+
+
+def card_html(
+    okr: dict,
+    status: str,
+    kr_colors: tuple[str, ...],
+    max_rows: int | None = None,
+    projections: tuple[str, ...] = (),
+) -> str:
+    """HTML completo do card de um OKR, em cache pelo hash de conteúdo.
+
+    Com ``max_rows``, só as primeiras linhas de KR são renderizadas e o card
+    indica quantas ficaram para o diálogo. ``projections`` traz o texto da
+    projeção de cada KR (a série não entra no hash, então ele entra na chave).
+    """
+    krs = okr["krs"] if max_rows is None else okr["krs"][:max_rows]
+    hidden = len(okr["krs"]) - len(krs)
+    projections = tuple(projections[: len(krs)]) or ("",) * len(krs)
+
+    def render() -> str:
+        return _CARD(
+            accent=okr["accent"],
+            title=escape(okr["title"]),
+            subtitle=escape(okr["subtitle"]),
+            status_color=STATUS_COLORS[status],
+            rows="".join(kr_row_html(kr, color, text) for kr, color, text in zip(krs, kr_colors, projections)),
+            more=_CARD_MORE(hidden=hidden) if hidden else "",
+        )
+
+    return _cards.get_or_set((okr["hash"], len(krs), projections), render)
+
+
+def dialog_header_html(okr: dict, status: str) -> str:
+    return _DIALOG_HEADER(
+        accent=okr["accent"],
+        title=escape(okr["title"]),
+        subtitle=escape(okr["subtitle"]),
+        status_color=STATUS_COLORS[status],
+        status_label=STATUS_LABELS[status],
+    )
+
+
+def header_html(logo_url: str | None) -> str:
+    """Cabeçalho da página; sem logo quando não há nenhum em ``static/`` (ver ``assets.logo_file``)."""
+    logo = f'<img class="hdr-logo-right" src="{escape(logo_url)}" alt="PagBrasil" />' if logo_url else ""
+    return _HEADER(logo=logo)
+
+
+def summary_html(summary) -> str:
+    """Linha de totais (KRs, status dos OKRs e progresso médio)."""
+    return _SUMMARY(
+        total_krs=summary.total_krs,
+        on_track=summary.on_track,
+        attention=summary.attention,
+        at_risk=summary.at_risk,
+        avg_pct=summary.avg_pct,
+    )
+
+
+def clear_cache() -> None:
+    """Esvazia os caches de HTML (usado pelos benchmarks para medir a frio)."""
+    _rows.clear()
+    _cards.clear()
@@ -0,0 +1,144 @@
+"""Parse dos campos de exibição dos KRs (``val``, ``ant``, ``meta``).
+
+Strings como ``"R$ 12.4M"``, ``"≤ 10 dias"``, ``"4.3/5"`` ou ``"+68"`` viram
+um ``KRValue`` com magnitude, unidade e comparador. O parse roda uma vez, no
+carregamento dos dados (``prepare_okrs``), que também calcula o ``pct`` de
+cada KR a partir de ``val`` x ``meta`` e memoiza a configuração do eixo Y.
+"""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+
+LOWER_IS_BETTER = ("≤", "<=", "<")
+MULTIPLIERS = {"": 1.0, "k": 1e3, "m": 1e6, "mi": 1e6, "b": 1e9, "bi": 1e9}
+
+_VALUE_RE = re.compile(
+    r"""^\s*
+    (?P<cmp>≤|≥|<=|>=|<|>)?\s*
+    (?P<cur>R\$)?\s*
+    (?P<num>[+-]?\d+(?:[.,]\d+)?)\s*
+    (?P<mult>bi|mi|[kmb](?![a-z]))?\s*
+    (?P<unit>%|/\s*\d+|dias?|pts|pontos)?\s*$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+@dataclass(frozen=True)
+class KRValue:
+    """Valor tipado de um campo de KR; ``magnitude`` é None se não numérico."""
+
+    raw: str
+    magnitude: float | None
+    unit: str = ""
+    comparator: str = ""
+
+    @property
+    def lower_is_better(self) -> bool:
+        return self.comparator in LOWER_IS_BETTER
+
+
+def parse_value(raw) -> KRValue:
+    text = "" if raw is None else str(raw)
+    m = _VALUE_RE.match(text)
+    if not m:
+        return KRValue(raw=text, magnitude=None)
+    num = m["num"].replace(",", ".")
+    magnitude = float(num) * MULTIPLIERS[(m["mult"] or "").lower()]
+    unit = (m["unit"] or "").replace(" ", "").lower()
+    if unit in ("dia", "dias"):
+        unit = "dias"
+    elif unit in ("pts", "pontos"):
+        unit = "pts"
+    if m["cur"]:
+        unit = "R$"
+    return KRValue(raw=text, magnitude=magnitude, unit=unit, comparator=m["cmp"] or "")
+
+
+def format_like(value: KRValue, magnitude: float) -> str:
+    """Escreve ``magnitude`` no formato de ``value`` (moeda, sufixo, unidade e casas).
+
+    ``format_like(parse_value("R$ 12.4M"), 13.1e6)`` dá ``"R$ 13.1M"``.
+    Sem formato reconhecível, devolve o número com duas casas.
+    """
+    m = _VALUE_RE.match(value.raw)
+    if not m or value.magnitude is None:
+        return f"{magnitude:,.2f}"
+    num = m["num"].replace(",", ".")
+    scale = MULTIPLIERS[(m["mult"] or "").lower()]
+    decimals = len(num.partition(".")[2])
+    shown = f"{magnitude / scale:{'+' if num.startswith('+') else ''}.{decimals}f}"
+    if "," in m["num"]:
+        shown = shown.replace(".", ",")
+    return value.raw[: m.start("num")] + shown + value.raw[m.end("num") :]
+
+
+def compute_pct(val: KRValue, meta: KRValue) -> int | None:
+    """Progresso (1-100) de ``val`` rumo a ``meta``; None se não comparável.
+
+    Com comparador ``≤`` na meta, menor é melhor e o progresso é meta/val.
+    O resultado nunca é 0 quando calculado: 0 significa "sem dados".
+    """
+    if val.magnitude is None or meta.magnitude is None:
+        return None
+    if val.unit and meta.unit and val.unit != meta.unit:
+        return None
+    if meta.lower_is_better:
+        if val.magnitude <= meta.magnitude:
+            return 100
+        ratio = meta.magnitude / val.magnitude
+    else:
+        if meta.magnitude == 0:
+            return None
+        ratio = val.magnitude / meta.magnitude
+    return min(100, max(1, math.floor(ratio * 100 + 0.5)))
+
+
+def infer_y_axis_config(kr: dict) -> tuple[str, str]:
+    """Infer Y-axis title and numeric format from KR metadata."""
+    values = kr.get("values") or {f: parse_value(kr.get(f)) for f in ("val", "ant", "meta")}
+    units = {v.unit for v in values.values()}
+    name = str(kr.get("name", "")).lower()
+    if "R$" in units or "r$" in name:
+        return "Valor (R$)", ",.2f"
+    if "%" in units or "%" in name:
+        return "Percentual (%)", ".1f"
+    if "dias" in units or "dia" in name:
+        return "Dias", ".0f"
+    if "/5" in units or "/5" in name:
+        return "Pontuação (0-5)", ".2f"
+    if "nps" in name:
+        return "Pontos (NPS)", ".0f"
+    if "pontuação" in name or "indice" in name or "índice" in name:
+        return "Índice", ".2f"
+    return "Valor", ",.2f"
+
+
+def prepare_kr(kr: dict) -> dict:
+    """Anexa ao KR os valores tipados, o ``pct`` calculado e o eixo do gráfico.
+
+    O ``pct`` informado na fonte fica guardado em ``pct_source`` e só é usado
+    quando ``val``/``meta`` não são comparáveis (ex.: meta "A definir"). Como
+    ``pct`` é sempre recalculado a partir dele, preparar o mesmo KR de novo
+    (depois de mudar ``val``, por exemplo) não deixa um ``pct`` antigo para trás.
+    """
+    if "pct_source" not in kr:
+        kr["pct_source"] = kr.get("pct")
+    values = {f: parse_value(kr.get(f)) for f in ("val", "ant", "meta")}
+    kr["values"] = values
+    kr["lower_is_better"] = values["meta"].lower_is_better
+    pct = compute_pct(values["val"], values["meta"])
+    kr["pct"] = pct if pct is not None else int(kr.get("pct_source") or 0)
+    kr["axis"] = infer_y_axis_config(kr)
+    return kr
+
+
+def prepare_okrs(okrs: list[dict]) -> list[dict]:
+    for okr in okrs:
+        for kr in okr["krs"]:
+            prepare_kr(kr)
+        for squad in okr.get("squads", []):
+            for kr in squad["krs"]:
+                prepare_kr(kr)
+    return okrs